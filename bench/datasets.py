@@ -0,0 +1,41 @@
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def make_dataset(n_rows: int, n_columns: int, numeric_fraction: float = 0.5,
+                 cardinality: int = 10, n_classes: int = 2, seed: int = 0) \
+        -> Tuple[pd.DataFrame, pd.Series]:
+    """Return a synthetic training table and target.
+
+    The first round(numeric_fraction * n_columns) columns are float64 with
+    many distinct values; the rest are object columns with cardinality
+    categories. The target has n_classes string classes, or is float64 when
+    n_classes is 0, and depends on a few columns of each kind plus noise.
+    """
+    rng = np.random.default_rng(seed)
+    n_numeric = int(round(numeric_fraction * n_columns))
+    data = {}
+    signal = np.zeros(n_rows)
+
+    for i in range(n_numeric):
+        col = rng.normal(size=n_rows).round(3)
+        data[f'num{i}'] = col
+        if i < 3:
+            signal += col
+    for i in range(n_columns - n_numeric):
+        codes = rng.integers(0, cardinality, n_rows)
+        data[f'cat{i}'] = np.array([f'c{code}' for code in range(cardinality)], dtype=object)[codes]
+        if i < 3:
+            signal += (codes % 3) - 1
+    signal += rng.normal(scale=0.5, size=n_rows)
+
+    if n_classes == 0:
+        target = pd.Series(data=signal)
+    else:
+        edges = np.quantile(signal, np.linspace(0, 1, n_classes + 1)[1:-1])
+        labels = np.array([f'class{i}' for i in range(n_classes)], dtype=object)
+        target = pd.Series(data=labels[np.searchsorted(edges, signal)])
+
+    return pd.DataFrame(data=data), target
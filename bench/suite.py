@@ -0,0 +1,92 @@
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+import pandas as pd
+
+from bench.datasets import make_dataset
+from tree.desctree import DecisionTree
+from tree.matrix import is_numeric_column
+from tree.util import information_gain
+from cart.carttree import CARTTree
+from cart.cart_utils import gini_index, lte, gt, eq, neq
+
+
+QUICK_CASES = [
+    {'n_rows': 1000, 'n_columns': 10, 'numeric_fraction': 0.5, 'cardinality': 10, 'n_classes': 2},
+    {'n_rows': 10000, 'n_columns': 10, 'numeric_fraction': 1.0, 'cardinality': 10, 'n_classes': 2},
+    {'n_rows': 10000, 'n_columns': 10, 'numeric_fraction': 0.0, 'cardinality': 100, 'n_classes': 5},
+]
+
+FULL_CASES = QUICK_CASES + [
+    {'n_rows': 100000, 'n_columns': 20, 'numeric_fraction': 0.5, 'cardinality': 20, 'n_classes': 2},
+    {'n_rows': 100000, 'n_columns': 50, 'numeric_fraction': 1.0, 'cardinality': 10, 'n_classes': 10},
+    {'n_rows': 100000, 'n_columns': 20, 'numeric_fraction': 0.0, 'cardinality': 1000, 'n_classes': 2},
+    {'n_rows': 100000, 'n_columns': 20, 'numeric_fraction': 0.8, 'cardinality': 10, 'n_classes': 0},
+]
+
+PREDICT_ROWS = 200
+
+
+def measure(fn: Callable, repeat: int) -> Dict[str, float]:
+    """Return the best wall time of repeat calls of fn and the peak traced
+    memory of one call"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn()
+        (_, peak) = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {'seconds': min(times), 'peak_bytes': peak}
+
+
+def case_operations(data: pd.DataFrame, target: pd.Series) -> Dict[str, Callable]:
+    """Return the operations benchmarked on one dataset, by name.
+
+    Trees split numeric targets by squared error; the class-count kernels
+    are only benchmarked on categorical targets.
+    """
+    regression = is_numeric_column(target)
+    params = {'criterion': 'mse'} if regression else {}
+    trees = {}
+    for tree_class in (DecisionTree, CARTTree):
+        tree = tree_class(**params)
+        tree.train(data, target)
+        trees[tree_class.__name__] = tree
+    sample = data.iloc[:PREDICT_ROWS]
+    first = data.columns[0]
+
+    ops = {}
+    for (name, tree) in trees.items():
+        tree_class = type(tree)
+        ops[f'{name}.train'] = lambda tree_class=tree_class: tree_class(**params).train(data, target)
+        ops[f'{name}.predict'] = lambda tree=tree: [tree.predict(sample.iloc[[i]])
+                                                    for i in range(sample.shape[0])]
+        ops[f'{name}.predict_batch'] = lambda tree=tree: tree.predict_batch(data)
+        flat = tree.compile()
+        ops[f'{name}.flat_predict'] = lambda flat=flat: flat.predict(data)
+    if not regression:
+        attribute = data[first]
+        (l_exp, r_exp) = (lte, gt) if is_numeric_column(attribute) else (eq, neq)
+        ops['util.information_gain'] = lambda: information_gain(target, attribute)
+        ops['cart_utils.gini_index'] = lambda: gini_index(target, attribute, attribute.iloc[0], l_exp, r_exp)
+    ops['CARTTree._best_split'] = lambda: CARTTree(**params)._best_split(data, target)
+    return ops
+
+
+def run_case(case: dict, repeat: int = 3, only: List[str] = None) -> List[dict]:
+    """Return one result record per operation benchmarked on the dataset of case"""
+    (data, target) = make_dataset(**case)
+    results = []
+    for (op, fn) in case_operations(data, target).items():
+        if only and not any(name in op for name in only):
+            continue
+        results.append({**case, 'op': op, **measure(fn, repeat)})
+    return results
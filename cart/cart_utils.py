@@ -1,6 +1,9 @@
 from typing import Tuple, Union
+import numpy as np
 import pandas as pd
 
+from tree.util import gini_counts
+
 
 def gt(a, b) -> bool:
     return a > b
@@ -41,19 +44,24 @@ def gini_index(target, attribute, val, l_exp, r_exp) -> float:
     val -- the value to split attribute on
     l_exp -- expression used to create left split
     r_exp -- expression used to create right split
-    """
-
-    count_tot = target.shape[0]
-
-    target_l = ljoin_filter(target, attribute, val, l_exp)
-    count_l = target_l.shape[0]
-
-    target_r = ljoin_filter(target, attribute, val, r_exp)
-    count_r = target_r.shape[0]
-
-    tot = (count_l/count_tot) * gini_impurity(target_l)
-    tot += (count_r/count_tot) * gini_impurity(target_r)
-    return round(tot, 4)
-
 
+    Class counts of the right split are the target's minus the left's;
+    r_exp is kept for callers and must be the complement of l_exp.
+    """
 
+    (y, classes) = pd.factorize(target)
+    n_classes = classes.shape[0]
+    mask = np.asarray(l_exp(attribute.loc[target.index], val), dtype=bool)
+    left = np.bincount(y[mask], minlength=n_classes)
+    right = np.bincount(y, minlength=n_classes) - left
+    return float(weighted_gini(left[np.newaxis], right[np.newaxis])[0])
+
+
+def weighted_gini(left, right) -> np.ndarray:
+    """Return gini index for each pair of left and right class counts"""
+    count_l = left.sum(axis=1)
+    count_r = right.sum(axis=1)
+    count_tot = count_l + count_r
+    tot = (count_l/count_tot) * np.round(gini_counts(left), 4)
+    tot += (count_r/count_tot) * np.round(gini_counts(right), 4)
+    return np.round(tot, 4)
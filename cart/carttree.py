@@ -1,120 +1,270 @@
+from concurrent.futures import Future
+from time import perf_counter
 from typing import Tuple, Union, TypedDict, Callable, List
 
+import numpy as np
 import pandas as pd
+from tree.base import BaseTree
 from tree.node import Node
 from tree.branch import Branch
-from tree.leaf import Leaf
+from tree.matrix import TrainingMatrix, encode
+from tree.instrument import TrainingCallback
+from tree.presort import node_matrix
+from tree.util import NodeCounts, best_candidate, largest_split, sample_columns, isin, notin, \
+    category_set
+from tree.criterion import Criterion, get_criterion
 from cart.cart_utils import *
 
 
 class SplitWithInfo(TypedDict):
-    data: pd.Series
+    rows: np.ndarray
+    mask: np.ndarray
     exp: Callable
     val: Union[float, str]
 
 
-class CARTTree:
-
-    def __init__(self, max_depth: int = None):
+class CARTTree(BaseTree):
+    score_method = '_best_split_value'
+
+    def __init__(self, max_depth: int = None, max_bins: int = None, n_jobs: int = None,
+                 parallel_depth: int = 0, max_features: Union[int, float, str] = None,
+                 random_state: int = None, criterion: Union[str, Criterion] = 'gini',
+                 callbacks: List[TrainingCallback] = None, min_samples_split: int = 2,
+                 min_samples_leaf: int = 1, min_impurity_decrease: float = 0.0,
+                 ccp_alpha: float = 0.0, categorical_splits: str = 'one_vs_rest',
+                 engine: str = 'sort', cache_size: int = None):
+        if categorical_splits not in ('one_vs_rest', 'ordered'):
+            raise ValueError(f'Unknown categorical_splits: {categorical_splits}')
+        if engine not in ('sort', 'presort'):
+            raise ValueError(f'Unknown engine: {engine}')
+        self.categorical_splits = categorical_splits
+        self.engine = engine
+        self.cache_size = cache_size
+        self.criterion = criterion
+        self._criterion = get_criterion(criterion)
         self.max_depth = max_depth
+        self.min_samples_split = min_samples_split
+        self.min_samples_leaf = min_samples_leaf
+        self.min_impurity_decrease = min_impurity_decrease
+        self.ccp_alpha = ccp_alpha
+        self.max_bins = max_bins
+        self.n_jobs = n_jobs
+        self.parallel_depth = parallel_depth
+        self.max_features = max_features
+        self.random_state = random_state
         self.root = None
+        self.callbacks = callbacks
+        self._pool = None
+        self._hooks = None
+        self._n_total = None
+        self._predictor = None
+        self._cache = None
+        self._rng = np.random.default_rng(random_state)
+
+    def _train_tree(self, matrix: TrainingMatrix, rows: np.ndarray, active: np.ndarray,
+                    depth: int):
+        """Recursively create subtrees that maximizes purity of target
+
+        rows are the row indices of matrix reaching this node and active marks
+        the columns still available for splitting; a column is cleared for
+        the subtrees below the node that splits on it. With the 'presort'
+        engine, numeric columns are sorted once at the node training starts
+        from and children keep their order, see tree.presort; 'sort' sorts
+        them at every node.
+        """
 
-    def train(self, data: pd.DataFrame, target: pd.Series):
-        self.root = self._train_tree(data, target, 0)
-
-    def _train_tree(self, data: pd.DataFrame, target: pd.Series, depth: int):
-        """Recursively create subtrees that maximizes purity of target """
-
-        if is_empty(target):
+        if rows.shape[0] == 0:
             return None
-        if self.should_predict(data, target, depth):
-            pred = make_prediction(target)
-            return Leaf(pred)
-
-        (impurity, attr_name, vals, is_numeric) = self._best_split(data, target)
-
-        best_attr = data.pop(attr_name)
-
-        target_splits = self._make_split(target, best_attr, vals, is_numeric)
-
-        node = Node(impurity, attr_name)
-
-        for split in target_splits:
-            branch = Branch(split['val'], split['exp'])
-            child = self._train_tree(data, split['data'], depth - 1)
+        hooks = self._hooks
+        if hooks is not None:
+            hooks.on_node_begin(depth, rows.shape[0])
+        stats = self._criterion.node_stats(matrix, rows)
+        if self.should_predict(matrix, rows, active, depth):
+            return self._make_leaf(matrix, rows, stats)
+
+        matrix = node_matrix(matrix, rows, active, self.engine)
+        if hooks is not None:
+            start = perf_counter()
+        (impurity, col, val, is_numeric, missing) = self._find_split(matrix, rows, active, stats)
+
+        if col is None:
+            return self._make_leaf(matrix, rows, stats)
+
+        active = active.copy()
+        active[col] = False
+
+        if hooks is not None:
+            scored = perf_counter()
+        row_splits = self._split_rows(matrix, rows, col, val, is_numeric, missing)
+        if missing is None:
+            missing = largest_split(row_splits)
+        if hooks is not None:
+            hooks.on_split(matrix.names[col], row_splits[0]['val'], impurity, scored - start,
+                           perf_counter() - scored)
+
+        branchs = []
+        missing_branch = None
+
+        for (part, split) in enumerate(row_splits):
+            child = self._train_child(matrix, split['rows'], active, depth + 1, split['mask'])
 
             if child is None:
                 continue
 
-            branch.child = child
-            node.add_branch(branch)
-
-        return node
+            if part == missing:
+                missing_branch = len(branchs)
+            branch = Branch(split['val'], split['exp'], child)
+            if isinstance(child, Future):
+                self._pool.defer(branch)
+            branchs.append(branch)
 
-    def should_predict(self, data: pd.DataFrame, target: pd.Series, depth: int) \
-            -> bool:
-        """Return true if any of stop criterias are reached else false"""
-        return depth == self.max_depth or \
-               contains_one_type(target) or is_empty(data)
+        return Node(impurity, matrix.names[col], branchs, missing_branch, rows.shape[0],
+                    float(stats.impurity), matrix.prediction(rows))
 
     def _best_split(self, data: pd.DataFrame, target: pd.Series) \
             -> Tuple[float, str, Union[float, str], bool]:
-        """Return the value, attribute name and purity of the attribute with lowest impurity
+        """Return the value, attribute name and purity of the attribute with lowest impurity"""
+        matrix = encode(data, target)
+        active = np.ones(matrix.n_columns, dtype=bool)
+        (impurity, col, val, is_numeric, _) = self._find_split(matrix, matrix.all_rows(), active)
+        if col is None:
+            return impurity, None, None, None
+        return impurity, matrix.names[col], self._decode_value(matrix, col, val), is_numeric
+
+    def _decode_value(self, matrix: TrainingMatrix, col: int, val: Union[float, int]) \
+            -> Union[float, str]:
+        """Return the raw value a split on encoded val of column col compares against"""
+        if isinstance(val, frozenset):
+            return category_set(matrix.categories[col], val)
+        if not matrix.is_numeric[col]:
+            return matrix.categories[col][val]
+        if matrix.bins[col] is not None:
+            return matrix.bins[col].upper[val]
+        return val
+
+    def _find_split(self, matrix: TrainingMatrix, rows: np.ndarray, active: np.ndarray,
+                    parent: NodeCounts = None) \
+            -> Tuple[float, int, Union[float, int], bool, Union[int, None]]:
+        """Return the impurity, column index, value and type of the active column
+        with lowest impurity, and the part of the split missing values go to
 
         Finds the val with lowest impurity for each atrribute and compares
-        to pick the one with lowest impurity.
+        to pick the one with lowest impurity. Categorical values are returned
+        as category codes. The part is 0 or 1, the index into the splits of
+        _split_rows, or None when no row at the node misses the value.
+        Splits decreasing the impurity of parent, the node statistics of
+        rows, by less than min_impurity_decrease, weighted by the node's
+        share of the training rows, are not made.
         """
-        least_impure = 1
+        least_impure = np.inf
         best_val = None
         best_is_numeric = None
-        best_arg_name = None
+        best_col = None
+        best_missing = None
 
-        columns = data.columns
+        cols = sample_columns(np.flatnonzero(active), self.max_features, self._rng)
+        if parent is None:
+            parent = self._criterion.node_stats(matrix, rows)
 
-        for col in columns:
-            attribute = data[col]
-            (impure, val, is_numeric) = self._best_split_value(target, attribute)
+        for (col, (impure, val, is_numeric, missing)) in zip(cols, self._score_columns(matrix, rows, cols, parent)):
             if impure < least_impure:
                 least_impure = impure
                 best_val = val
                 best_is_numeric = is_numeric
-                best_arg_name = col
+                best_col = col
+                best_missing = missing
 
-        return least_impure, best_arg_name, best_val, best_is_numeric
+        if best_col is not None and self.min_impurity_decrease > 0 and \
+                not self._decreases_enough(parent.impurity - least_impure, parent):
+            return np.inf, None, None, None, None
+        return least_impure, best_col, best_val, best_is_numeric, best_missing
 
-    def _make_split(self, target: pd.Series, attribute: pd.Series,
-                    val: Union[float, str], is_numeric: bool) \
+    def _split_rows(self, matrix: TrainingMatrix, rows: np.ndarray, col: int,
+                    val: Union[float, int], is_numeric: bool, missing: int = None) \
             -> List[SplitWithInfo]:
-        """Split target into two on val"""
+        """Split rows into two on val of column col, adding the rows missing the
+        value to split number missing"""
 
-        data_splits = []
-
-        l_exp, r_exp = self._get_exp(is_numeric)
-
-        target_l = ljoin_filter(target, attribute, val, l_exp)
-        target_r = ljoin_filter(target, attribute, val, r_exp)
-        data_splits.append({'data': target_l, 'exp': l_exp, 'val': val})
-        data_splits.append({'data': target_r, 'exp': r_exp, 'val': val})
-
-        return data_splits
-
-    def _best_split_value(self, target: pd.Series, attribute: pd.Series) \
-            -> Tuple[float, Union[float, str], bool]:
-        """Return value with the lowest gini_index"""
-
-        is_numeric = attribute.dtype == 'O'
+        if isinstance(val, frozenset):
+            l_exp, r_exp = isin, notin
+        else:
+            l_exp, r_exp = self._get_exp(is_numeric)
+
+        attribute = matrix.columns[col][rows]
+        branch_val = self._decode_value(matrix, col, val)
+        masks = [l_exp(attribute, val), r_exp(attribute, val)]
+
+        if matrix.has_missing[col]:
+            is_missing = matrix.missing_rows(col, rows)
+            masks = [mask & ~is_missing for mask in masks]
+            if missing is not None:
+                masks[missing] |= is_missing
+
+        return [{'rows': rows[masks[0]], 'mask': masks[0], 'exp': l_exp, 'val': branch_val},
+                {'rows': rows[masks[1]], 'mask': masks[1], 'exp': r_exp, 'val': branch_val}]
+
+    def _best_split_value(self, matrix: TrainingMatrix, rows: np.ndarray, col: int,
+                          parent: NodeCounts = None) \
+            -> Tuple[float, Union[float, int], bool, Union[int, None]]:
+        """Return value with the lowest impurity under the tree's criterion, and
+        the part missing values go to
+
+        Numeric attributes are sorted once, or histogrammed per bin when
+        binned, and every threshold is scored from cumulative statistics;
+        categorical attributes are scored one value against the rest from
+        per-value statistics. The other side of every split is the node's
+        statistics, parent when given, minus this side. Rows missing the
+        value join the side that scores best with them. Splits leaving
+        fewer than min_samples_leaf rows on a side are never the best.
+
+        With categorical_splits 'ordered', categorical attributes are split
+        in two sets of categories instead, scanned as thresholds over the
+        categories ordered by the criterion's category_order when it has
+        one; the value is then the frozenset of codes of the left side.
+        """
 
-        l_exp, r_exp = self._get_exp(is_numeric)
+        criterion = self._criterion
+        is_numeric = matrix.is_numeric[col]
+        if parent is None:
+            parent = criterion.node_stats(matrix, rows)
+        (values, first_seen, stats) = criterion.column_stats(matrix, col, rows)
+        if values.shape[0] == 0:
+            return np.inf, None, is_numeric, None
+        missing = None
+        if matrix.has_missing[col]:
+            missing = criterion.missing_stats(matrix, col, rows, stats, parent)
+
+        order = None
+        if not is_numeric and self.categorical_splits == 'ordered':
+            order = criterion.category_order(stats)
+            if order is not None:
+                (values, first_seen, stats) = (values[order], np.arange(order.shape[0]), stats[order])
+        ordered = is_numeric or order is not None
+
+        missing_left = None
+        if missing is not None:
+            if ordered:
+                (impurities, missing_left) = criterion.thresholds_missing(stats, True, parent, missing)
+            else:
+                (impurities, missing_left) = criterion.categories_missing(stats, parent, missing)
+        elif ordered:
+            impurities = criterion.thresholds(stats, True, parent)
+        else:
+            impurities = criterion.categories(stats, parent)
+        impurities = criterion.round(impurities)
 
-        best_gini = 1
-        best_val = None
-        for val in attribute:
-            gini = gini_index(target, attribute, val, l_exp, r_exp)
-            if gini < best_gini:
-                best_gini = gini
-                best_val = val
+        if ordered:
+            left = criterion.threshold_sizes(stats, True, parent, missing_left)
+        else:
+            left = criterion.sizes(stats)
+            if missing_left is not None:
+                left = left + np.where(missing_left, parent.n - left.sum(), 0)
+        impurities[np.minimum(left, parent.n - left) < max(self.min_samples_leaf, 1)] = np.inf
 
-        return gini, best_val, is_numeric
+        best = best_candidate(-impurities, first_seen, criterion.decimals)
+        part = None if missing is None else int(not missing_left[best])
+        val = values[best] if order is None else frozenset(values[:best + 1].tolist())
+        return impurities[best], val, is_numeric, part
 
     def _get_exp(self, is_numeric) -> Tuple[Callable, Callable]:
         """Return expression for splitting target"""
@@ -127,58 +277,3 @@ class CARTTree:
             r_exp = neq
 
         return l_exp, r_exp
-
-    def predict(self, data: pd.DataFrame) -> Union[float, str]:
-        """Predict target for data"""
-        return self._predict(data, self.root)
-
-    def _predict(self, data: pd.DataFrame, node: Node) -> Union[float, str]:
-        """Recursively follows conditions in branchs to find
-        prediction, starting at node"""
-
-        if isinstance(node, Leaf):
-            return node.prediction
-
-        val = data[node.attr_name].iloc[0]
-
-        for branch in node.branchs:
-            if branch.exp(val, branch.val):
-                return self._predict(data, branch.child)
-
-        return None
-
-    def print_tree(self) -> None:
-        self._print_tree(self.root)
-
-    def _print_tree(self, node: Node) -> None:
-        if isinstance(node, Leaf):
-            print(f'Pred: {node.prediction}')
-            return
-        for branch in node.branchs:
-            print(f'{node.attr_name} -- {branch.val} {branch.exp.__name__} --> ', end='')
-            self._print_tree(branch.child)
-            print('------')
-
-
-def make_prediction(target):
-    if target.dtype == 'O':
-        return predict_categorical(target)
-    else:
-        return predict_regression(target)
-
-
-def predict_categorical(target):
-    target_freq = target.value_counts().sort_values(ascending=False)
-    return target_freq.index[0]
-
-
-def predict_regression(target):
-    return target.mean()
-
-
-def contains_one_type(target):
-    return target.unique().shape[0] == 1
-
-
-def is_empty(data):
-    return data.empty
\ No newline at end of file
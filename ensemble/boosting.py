@@ -0,0 +1,123 @@
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from tree.flat import FlatTree, encode_features
+from tree.matrix import encode
+from tree.store import save_flats, load_flats
+from cart.carttree import CARTTree
+
+
+class GradientBoostingRegressor:
+    """Gradient-boosted regression trees for squared error.
+
+    Every round fits a shallow CARTTree, scored with the mse criterion, to
+    the residuals of the current model. The training data is encoded (and
+    binned, with max_bins) once; rounds only swap in the new residuals as
+    target of the same matrix.
+    """
+
+    def __init__(self, n_rounds: int = 100, learning_rate: float = 0.1, max_depth: int = 3,
+                 max_bins: int = 255, early_stopping_rounds: int = None):
+        self.n_rounds = n_rounds
+        self.learning_rate = learning_rate
+        self.max_depth = max_depth
+        self.max_bins = max_bins
+        self.early_stopping_rounds = early_stopping_rounds
+        self.init = None
+        self.trees = []
+        self.best_round = None
+        self.features = []
+        self.categories = []
+        self._flats = []
+
+    def train(self, data: pd.DataFrame, target: pd.Series,
+              validation: Tuple[pd.DataFrame, pd.Series] = None):
+        """Fit n_rounds trees, or fewer when early stopping on validation.
+
+        With early_stopping_rounds and a validation (data, target) pair,
+        training stops once validation error has not improved for that many
+        rounds, and the model is cut back to its best round.
+        """
+        matrix = encode(data, target, self.max_bins)
+        y = matrix.y_values
+        self.features = matrix.names
+        self.categories = matrix.categories
+        X = encode_features(data, self.features, self.categories)
+
+        self.init = y.mean()
+        self.trees = []
+        self._flats = []
+        fitted = np.full(y.shape[0], self.init)
+
+        if validation is not None:
+            (val_data, val_target) = validation
+            X_val = encode_features(val_data, self.features, self.categories)
+            y_val = val_target.to_numpy(dtype=np.float64)
+            val_fitted = np.full(y_val.shape[0], self.init)
+        best_error = np.inf
+        self.best_round = None
+
+        for i in range(self.n_rounds):
+            tree = CARTTree(max_depth=self.max_depth, criterion='mse')
+            tree.train_encoded(matrix.with_target(y - fitted))
+            flat = tree.compile().with_features(self.features, self.categories)
+            self.trees.append(tree)
+            self._flats.append(flat)
+            fitted += self.learning_rate * self._leaf_values(flat, X)
+
+            if validation is None:
+                continue
+            val_fitted += self.learning_rate * self._leaf_values(flat, X_val)
+            error = np.mean((y_val - val_fitted)**2)
+            if error < best_error:
+                best_error = error
+                self.best_round = i
+            elif self.early_stopping_rounds is not None and \
+                    i - self.best_round >= self.early_stopping_rounds:
+                break
+
+        if self.best_round is not None and self.early_stopping_rounds is not None:
+            self.trees = self.trees[:self.best_round + 1]
+            self._flats = self._flats[:self.best_round + 1]
+
+    def save(self, path: str):
+        """Write the model to path in the binary format of tree.store"""
+        meta = {'model': type(self).__name__, 'init': self.init,
+                'learning_rate': self.learning_rate, 'features': self.features,
+                'categories': [list(c) if c is not None else None for c in self.categories]}
+        save_flats(path, self._flats, meta)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> 'GradientBoostingRegressor':
+        """Return a model predicting with the rounds saved at path, memory-mapped
+        unless mmap is False"""
+        (flats, meta) = load_flats(path, mmap)
+        model = cls(n_rounds=len(flats), learning_rate=meta['learning_rate'])
+        model.init = meta['init']
+        model.features = meta['features']
+        model.categories = [np.array(c, dtype=object) if c is not None else None
+                            for c in meta['categories']]
+        model._flats = flats
+        return model
+
+    def _leaf_values(self, flat: FlatTree, X: np.ndarray) -> np.ndarray:
+        """Return the leaf value of flat for every row of X, 0 where no branch matched"""
+        leaves = flat.predict_leaves(X)
+        values = np.zeros(X.shape[0])
+        found = leaves >= 0
+        values[found] = flat.values[leaves[found]]
+        return values
+
+    def predict_batch(self, data: pd.DataFrame) -> pd.Series:
+        """Return one prediction per row of data, indexed like data"""
+        X = encode_features(data, self.features, self.categories)
+        predictions = np.full(X.shape[0], self.init)
+        for flat in self._flats:
+            predictions += self.learning_rate * self._leaf_values(flat, X)
+        return pd.Series(data=predictions, index=data.index)
+
+    def predict(self, data: pd.DataFrame) -> float:
+        """Predict target for the first row of data"""
+        return self.predict_batch(data.iloc[:1]).iloc[0]
@@ -0,0 +1,169 @@
+import copy
+from typing import List, Union
+
+import numpy as np
+import pandas as pd
+
+from tree.criterion import Criterion
+from tree.flat import FlatTree, encode_features, merge_features
+from tree.matrix import TrainingMatrix, encode
+from tree.parallel import MatrixPool
+from tree.store import save_flats, load_flats
+from cart.carttree import CARTTree
+
+
+def _train_member(template, matrix: TrainingMatrix, seed: int, bootstrap: bool):
+    """Return the root of a copy of template trained on a bootstrap sample drawn with seed"""
+    tree = copy.copy(template)
+    tree.random_state = seed
+    rows = None
+    if bootstrap:
+        rows = np.sort(np.random.default_rng(seed).integers(0, matrix.n_rows, matrix.n_rows))
+    tree.train_encoded(matrix, rows)
+    return tree.root
+
+
+class RandomForest:
+    """Bagged ensemble of CARTTree or DecisionTree members.
+
+    Every member trains on its own bootstrap sample of one shared encoded
+    matrix and considers max_features random columns per split. Members
+    vote on categorical targets and are averaged on numeric ones.
+
+    Members split by criterion, 'mse' on numeric targets and the default
+    of tree_class on categorical ones when None; any other keyword, such
+    as min_samples_leaf or categorical_splits, is passed to tree_class.
+    """
+
+    def __init__(self, n_trees: int = 100, tree_class=CARTTree,
+                 max_features: Union[int, float, str] = 'sqrt', max_depth: int = None,
+                 max_bins: int = None, bootstrap: bool = True, n_jobs: int = None,
+                 random_state: int = None, criterion: Union[str, Criterion] = None,
+                 **tree_params):
+        self.n_trees = n_trees
+        self.tree_class = tree_class
+        self.max_features = max_features
+        self.max_depth = max_depth
+        self.max_bins = max_bins
+        self.bootstrap = bootstrap
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.criterion = criterion
+        self.tree_params = tree_params
+        self.trees = []
+        self.classes = None
+        self.is_regression = False
+        self._compiled = None
+
+    def train(self, data: pd.DataFrame, target: pd.Series):
+        self.train_encoded(encode(data, target, self.max_bins))
+
+    def train_encoded(self, matrix: TrainingMatrix):
+        """Train all members on one encoded matrix.
+
+        With n_jobs the matrix is placed in shared memory once and members
+        are trained on worker processes, which send back only the trees.
+        """
+        params = dict(self.tree_params)
+        criterion = self.criterion
+        if criterion is None and matrix.is_regression:
+            criterion = 'mse'
+        if criterion is not None:
+            params['criterion'] = criterion
+        template = self.tree_class(max_depth=self.max_depth, max_features=self.max_features, **params)
+        seeds = np.random.default_rng(self.random_state).integers(2**63, size=self.n_trees)
+
+        if self.n_jobs is not None and self.n_jobs != 1:
+            pool = MatrixPool(template, matrix, self.n_jobs)
+            try:
+                futures = [pool.submit(_train_member, seed, self.bootstrap) for seed in seeds]
+                roots = [future.result() for future in futures]
+            finally:
+                pool.close()
+        else:
+            roots = [_train_member(template, matrix, seed, self.bootstrap) for seed in seeds]
+
+        self.trees = []
+        for (seed, root) in zip(seeds, roots):
+            tree = copy.copy(template)
+            tree.random_state = seed
+            tree.root = root
+            self.trees.append(tree)
+
+        self.classes = matrix.classes
+        self.is_regression = matrix.is_regression
+        self._compiled = None
+
+    def compile(self) -> List[FlatTree]:
+        """Return the members as FlatTrees reading one shared feature table"""
+        if self._compiled is None:
+            flats = [tree.compile() for tree in self.trees]
+            (features, categories) = merge_features(flats)
+            self._compiled = [flat.with_features(features, categories) for flat in flats]
+        return self._compiled
+
+    def save(self, path: str):
+        """Write the compiled members to path in the binary format of tree.store"""
+        meta = {'model': type(self).__name__, 'classes': list(self.classes),
+                'is_regression': self.is_regression}
+        save_flats(path, self.compile(), meta)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> 'RandomForest':
+        """Return a forest predicting with the members saved at path.
+
+        Members are memory-mapped FlatTrees unless mmap is False; the
+        returned forest can predict but keeps no Node graphs to retrain from.
+        """
+        (flats, meta) = load_flats(path, mmap)
+        forest = cls(n_trees=len(flats))
+        forest.classes = np.array(meta['classes'], dtype=object)
+        forest.is_regression = meta['is_regression']
+        forest._compiled = flats
+        return forest
+
+    def predict_batch(self, data: pd.DataFrame) -> pd.Series:
+        """Return one prediction per row of data, indexed like data.
+
+        The batch is encoded once and every member scores all of its rows
+        with the flat traversal kernel; rows no member reaches a leaf for are
+        predicted as None.
+        """
+        flats = self.compile()
+        if not flats:
+            return pd.Series(data=[None] * data.shape[0], index=data.index, dtype=object)
+        X = encode_features(data, flats[0].features, flats[0].categories)
+        n = X.shape[0]
+
+        if self.is_regression:
+            sums = np.zeros(n)
+            counts = np.zeros(n)
+            for flat in flats:
+                leaves = flat.predict_leaves(X)
+                found = leaves >= 0
+                sums[found] += flat.values[leaves[found]].astype(np.float64)
+                counts += found
+            predictions = np.full(n, None, dtype=object)
+            voted = counts > 0
+            predictions[voted] = sums[voted] / counts[voted]
+            return pd.Series(data=predictions, index=data.index).infer_objects()
+
+        n_classes = self.classes.shape[0]
+        classes = pd.Index(self.classes)
+        votes = np.zeros(n * n_classes, dtype=np.int64)
+        for flat in flats:
+            leaves = flat.predict_leaves(X)
+            found = np.flatnonzero(leaves >= 0)
+            leaf_class = classes.get_indexer(flat.values)
+            votes += np.bincount(found * n_classes + leaf_class[leaves[found]],
+                                 minlength=n * n_classes)
+        votes = votes.reshape(n, n_classes)
+
+        predictions = np.full(n, None, dtype=object)
+        voted = votes.sum(axis=1) > 0
+        predictions[voted] = self.classes[np.argmax(votes[voted], axis=1)]
+        return pd.Series(data=predictions, index=data.index).infer_objects()
+
+    def predict(self, data: pd.DataFrame) -> Union[float, str]:
+        """Predict target for the first row of data"""
+        return self.predict_batch(data.iloc[:1]).iloc[0]
@@ -0,0 +1,72 @@
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from bench.suite import FULL_CASES, QUICK_CASES, run_case
+
+
+def git_commit() -> str:
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(old_path: str, new_path: str):
+    """Print the time and peak memory ratio new/old of every result in both files"""
+    def load(path):
+        with open(path) as f:
+            run = json.load(f)
+        return run, {json.dumps({k: v for (k, v) in r.items() if k not in ('seconds', 'peak_bytes')},
+                                sort_keys=True): r for r in run['results']}
+
+    (old_run, old) = load(old_path)
+    (new_run, new) = load(new_path)
+    print(f"{old_run['commit']} -> {new_run['commit']}")
+    for (key, result) in new.items():
+        if key not in old:
+            continue
+        time_ratio = result['seconds'] / max(old[key]['seconds'], 1e-12)
+        mem_ratio = result['peak_bytes'] / max(old[key]['peak_bytes'], 1)
+        print(f"{result['op']:32} rows={result['n_rows']:<7} cols={result['n_columns']:<4} "
+              f"time x{time_ratio:6.2f}  mem x{mem_ratio:6.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark training and prediction')
+    parser.add_argument('--full', action='store_true', help='run the large dataset shapes too')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', nargs='*', help='run operations whose name contains any of these')
+    parser.add_argument('--output', default='bench_output.json')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'),
+                        help='compare two result files instead of running')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        sys.exit()
+
+    results = []
+    for case in (FULL_CASES if args.full else QUICK_CASES):
+        for result in run_case(case, args.repeat, args.only):
+            print(f"{result['op']:32} rows={result['n_rows']:<7} cols={result['n_columns']:<4} "
+                  f"{result['seconds']:9.4f}s {result['peak_bytes'] / 2**20:9.1f} MiB")
+            results.append(result)
+
+    run = {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(run, f, indent=1)
@@ -0,0 +1,114 @@
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, List, Mapping, Tuple
+
+import pandas as pd
+
+
+def score_batch(model, data: pd.DataFrame) -> List[Any]:
+    """Return one prediction per row of data, from the model's vectorized path:
+    predict_batch for trees and ensembles, predict for a FlatTree"""
+    if hasattr(model, 'predict_batch'):
+        predictions = model.predict_batch(data)
+    else:
+        predictions = model.predict(data)
+    return list(predictions)
+
+
+class ModelServer:
+    """Scores single rows for asyncio callers in micro-batches.
+
+    Rows awaiting predict are collected until max_batch_size of them are
+    waiting or the first of them has waited max_wait_ms, then scored
+    together by score_batch on executor, so the event loop never runs a
+    tree traversal. Without an executor, the server runs batches on a
+    thread pool of n_workers threads that it shuts down on close. A process
+    pool works too; every batch then pickles the model, which is cheapest
+    for a compiled FlatTree.
+
+    swap replaces the model without dropping requests: batches already
+    scoring finish on the model they started with, and every row not yet
+    dispatched is scored by the new one.
+    """
+
+    def __init__(self, model, max_batch_size: int = 64, max_wait_ms: float = 2.0,
+                 executor: Executor = None, n_workers: int = 1):
+        if max_batch_size < 1:
+            raise ValueError('max_batch_size must be at least 1')
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._owns_executor = executor is None
+        self.executor = executor if executor is not None else ThreadPoolExecutor(n_workers)
+        self.n_batches = 0
+        self._pending: List[Tuple[Mapping, asyncio.Future]] = []
+        self._timer = None
+        self._in_flight = set()
+        self._closed = False
+
+    async def __aenter__(self) -> 'ModelServer':
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def predict(self, row: Mapping):
+        """Return the model's prediction for row, a mapping from attribute name
+        to value such as a dict or a Series"""
+        if self._closed:
+            raise RuntimeError('ModelServer is closed')
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((row, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._flush)
+        return await future
+
+    def swap(self, model):
+        """Score every batch dispatched from now on with model"""
+        self.model = model
+
+    async def close(self):
+        """Score the rows still waiting, wait for every batch in flight and shut
+        down the executor when the server made it"""
+        self._closed = True
+        while self._pending:
+            self._flush()
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        if self._owns_executor:
+            self.executor.shutdown()
+
+    def _flush(self):
+        """Dispatch up to max_batch_size waiting rows as one batch"""
+        loop = asyncio.get_running_loop()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch = self._pending[:self.max_batch_size]
+        del self._pending[:self.max_batch_size]
+        if self._pending:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._flush)
+        if not batch:
+            return
+
+        data = pd.DataFrame([dict(row) for (row, _) in batch])
+        scoring = loop.run_in_executor(self.executor, score_batch, self.model, data)
+        self.n_batches += 1
+        self._in_flight.add(scoring)
+        scoring.add_done_callback(lambda done: self._resolve(done, batch))
+
+    def _resolve(self, scoring: asyncio.Future, batch: List[Tuple[Mapping, asyncio.Future]]):
+        """Hand every row of batch its prediction, or the error scoring raised"""
+        self._in_flight.discard(scoring)
+        error = asyncio.CancelledError() if scoring.cancelled() else scoring.exception()
+        predictions = scoring.result() if error is None else [None] * len(batch)
+        for ((_, future), prediction) in zip(batch, predictions):
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(prediction)
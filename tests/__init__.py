@@ -1,4 +1,24 @@
 from tests.test_utils import *
 from tests.test_desctree import *
 from tests.test_cart_utils import *
-from tests.test_carttree import *
\ No newline at end of file
+from tests.test_carttree import *
+from tests.test_matrix import *
+from tests.test_binning import *
+from tests.test_flat import *
+from tests.test_node import *
+from tests.test_parallel import *
+from tests.test_forest import *
+from tests.test_boosting import *
+from tests.test_store import *
+from tests.test_bench import *
+from tests.test_instrument import *
+from tests.test_stream import *
+from tests.test_hoeffding import *
+from tests.test_criterion import *
+from tests.test_missing import *
+from tests.test_prune import *
+from tests.test_categorical import *
+from tests.test_codegen import *
+from tests.test_presort import *
+from tests.test_cache import *
+from tests.test_serve import *
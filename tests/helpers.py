@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+
+def make_data(n, columns=('col1', 'col2', 'col3'), missing=0.0, noise=0.0, seed=0, target='class',
+              n_categories=3):
+    """Return n rows of the columns named in columns and a target.
+
+    col1 holds integers 0 to 9 as floats, col2 n_categories categories,
+    'x', 'y' and 'z' unless n_categories is set, col3 normal values
+    rounded to 2 decimals and col4 integers 0 to 2; any other column
+    holds normal values rounded to 2 decimals.
+
+    target 'class' is 'a' where col1 > 4 and col2 is not in the last third
+    of the categories ('z'), 'b' elsewhere, flipped for a fraction noise
+    of the rows. 'category' is 'a' where col2 is in the first third of the
+    categories, 'b' elsewhere. 'regression' is sin(col1), plus 2 where
+    col2 is the first category, plus normal noise of standard deviation
+    noise. A fraction missing of the values of col1 and col2 are then set
+    missing.
+    """
+    rng = np.random.default_rng(seed)
+    if n_categories == 3:
+        categories = np.array(['x', 'y', 'z'], dtype=object)
+    else:
+        categories = np.array(['c%d' % i for i in range(n_categories)], dtype=object)
+    data = pd.DataFrame(data={'col1': rng.integers(0, 10, n).astype(float),
+                              'col2': rng.choice(categories, n),
+                              'col3': rng.normal(size=n).round(2),
+                              'col4': rng.integers(0, 3, n)})
+    if target == 'class':
+        last = data['col2'].isin(categories[2 * n_categories // 3:])
+        noisy = rng.random(n) < noise
+        y = pd.Series(data=np.where(((data['col1'] > 4) & ~last) ^ noisy, 'a', 'b'))
+    elif target == 'category':
+        y = pd.Series(data=np.where(data['col2'].isin(categories[:n_categories // 3]), 'a', 'b'))
+    else:
+        y = np.sin(data['col1']) + np.where(data['col2'] == categories[0], 2.0, 0.0) + \
+            rng.normal(0, noise, n)
+    for name in columns:
+        if name not in data:
+            data[name] = rng.normal(size=n).round(2)
+    if missing > 0:
+        data.loc[rng.random(n) < missing, 'col1'] = np.nan
+        data.loc[rng.random(n) < missing, 'col2'] = None
+    return data[list(columns)], y
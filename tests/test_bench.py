@@ -0,0 +1,46 @@
+import unittest
+from bench.datasets import make_dataset
+from bench.suite import run_case
+
+
+class TestMakeDataset(unittest.TestCase):
+    def test_whenMixedColumns_returnsRequestedShape(self):
+        (data, target) = make_dataset(100, 4, numeric_fraction=0.5, cardinality=3, n_classes=3)
+
+        self.assertEqual((100, 4), data.shape)
+        self.assertEqual(['num0', 'num1', 'cat0', 'cat1'], list(data.columns))
+        self.assertEqual(3, data['cat0'].nunique())
+        self.assertEqual(3, target.nunique())
+
+    def test_whenNoClasses_returnsNumericTarget(self):
+        (_, target) = make_dataset(50, 2, n_classes=0)
+
+        self.assertEqual('float64', target.dtype)
+
+
+class TestRunCase(unittest.TestCase):
+    def test_whenRun_returnsTimeAndMemoryPerOperation(self):
+        case = {'n_rows': 50, 'n_columns': 3, 'numeric_fraction': 0.5, 'cardinality': 3, 'n_classes': 2}
+
+        results = run_case(case, repeat=1, only=['CARTTree'])
+
+        self.assertTrue(results)
+        self.assertTrue(all(r['op'].startswith('CARTTree') for r in results))
+        self.assertTrue(all(r['seconds'] >= 0 and r['peak_bytes'] > 0 for r in results))
+
+    def test_whenNumericTarget_benchmarksSquaredErrorTrees(self):
+        case = {'n_rows': 50, 'n_columns': 3, 'numeric_fraction': 0.5, 'cardinality': 3, 'n_classes': 0}
+
+        ops = [r['op'] for r in run_case(case, repeat=1)]
+
+        self.assertIn('DecisionTree.train', ops)
+        self.assertIn('CARTTree._best_split', ops)
+        self.assertNotIn('util.information_gain', ops)
+        self.assertNotIn('cart_utils.gini_index', ops)
+
+    def test_whenCategoricalTarget_benchmarksKernels(self):
+        case = {'n_rows': 50, 'n_columns': 3, 'numeric_fraction': 0.5, 'cardinality': 3, 'n_classes': 2}
+
+        ops = [r['op'] for r in run_case(case, repeat=1, only=['util', 'cart_utils'])]
+
+        self.assertEqual(['util.information_gain', 'cart_utils.gini_index'], ops)
@@ -0,0 +1,66 @@
+import unittest
+import numpy as np
+import pandas as pd
+from tree.binning import bin_column, bin_class_counts
+from tree.desctree import DecisionTree
+from cart.carttree import CARTTree
+
+
+class TestBinColumn(unittest.TestCase):
+    def test_whenFewDistinctValues_returnsOneBinPerValue(self):
+        values = np.array([3.0, 1.0, 2.0, 3.0])
+
+        (codes, bins) = bin_column(values, 255)
+
+        self.assertEqual(np.uint8, codes.dtype)
+        self.assertEqual([2, 0, 1, 2], list(codes))
+        self.assertEqual([1.0, 2.0, 3.0], list(bins.lower))
+        self.assertEqual([1.0, 2.0, 3.0], list(bins.upper))
+
+    def test_whenManyDistinctValues_returnsAtMostMaxBins(self):
+        values = np.arange(100, dtype=float)
+
+        (codes, bins) = bin_column(values, 4)
+
+        self.assertEqual([0.0, 25.0, 50.0, 75.0], list(bins.lower))
+        self.assertEqual([24.0, 49.0, 74.0, 99.0], list(bins.upper))
+        self.assertEqual(1, codes[49])
+        self.assertEqual(2, codes[50])
+
+
+class TestBinClassCounts(unittest.TestCase):
+    def test_whenEmptyBins_returnsOnlyPresentBins(self):
+        codes = np.array([0, 2, 2], dtype=np.uint8)
+        y = np.array([1, 0, 1])
+
+        (present, counts) = bin_class_counts(codes, y, 3, 2)
+
+        self.assertEqual([0, 2], list(present))
+        self.assertEqual([[0, 1], [1, 1]], counts.tolist())
+
+
+class TestBinnedTrees(unittest.TestCase):
+    def test_whenBinsCoverAllValues_predictsAsUnbinned(self):
+        rng = np.random.default_rng(0)
+        data = pd.DataFrame(data={'col1': rng.integers(0, 20, 200), 'col2': rng.normal(size=200).round(1)})
+        target = pd.Series(data=np.where(data['col1'] + 10 * data['col2'] > 10, 'a', 'b'))
+
+        for tree_class in (DecisionTree, CARTTree):
+            exact = tree_class()
+            exact.train(data, target)
+            binned = tree_class(max_bins=255)
+            binned.train(data, target)
+
+            for i in range(0, 200, 7):
+                row = data.iloc[[i]]
+                self.assertEqual(exact.predict(row), binned.predict(row))
+
+    def test_whenFewBins_stillLearnsThreshold(self):
+        data = pd.DataFrame(data={'col1': np.arange(1000, dtype=float)})
+        target = pd.Series(data=np.where(data['col1'] < 500, 'a', 'b'))
+        tree = CARTTree(max_bins=16)
+
+        tree.train(data, target)
+
+        self.assertEqual('a', tree.predict(pd.DataFrame(data={'col1': [10.0]})))
+        self.assertEqual('b', tree.predict(pd.DataFrame(data={'col1': [990.0]})))
@@ -0,0 +1,36 @@
+import unittest
+from ensemble.boosting import GradientBoostingRegressor
+from tests.helpers import make_data
+
+
+class TestGradientBoostingRegressor(unittest.TestCase):
+    def test_whenMoreRounds_trainingErrorDecreases(self):
+        (data, target) = make_data(500, ('col1', 'col2'), noise=0.1, target='regression')
+        errors = []
+
+        for n_rounds in (1, 10, 50):
+            model = GradientBoostingRegressor(n_rounds=n_rounds, max_depth=2)
+            model.train(data, target)
+            errors.append(((model.predict_batch(data) - target)**2).mean())
+
+        self.assertTrue(errors[0] > errors[1] > errors[2])
+        self.assertLess(errors[2], 0.2)
+
+    def test_whenZeroRounds_predictsMean(self):
+        (data, target) = make_data(50, ('col1', 'col2'), noise=0.1, target='regression')
+        model = GradientBoostingRegressor(n_rounds=0)
+
+        model.train(data, target)
+
+        self.assertAlmostEqual(target.mean(), model.predict(data))
+
+    def test_whenEarlyStopping_keepsBestRound(self):
+        (data, target) = make_data(300, ('col1', 'col2'), noise=0.1, target='regression')
+        validation = make_data(200, ('col1', 'col2'), noise=0.1, seed=1, target='regression')
+        model = GradientBoostingRegressor(n_rounds=500, learning_rate=0.5, max_depth=3,
+                                          early_stopping_rounds=5)
+
+        model.train(data, target, validation)
+
+        self.assertLess(len(model.trees), 500)
+        self.assertEqual(model.best_round + 1, len(model.trees))
@@ -0,0 +1,94 @@
+import unittest
+import numpy as np
+import pandas as pd
+from tree.cache import CacheStats, PredictionCache, tree_attributes
+from tree.desctree import DecisionTree
+from cart.carttree import CARTTree
+from tests.helpers import make_data
+
+
+class TestPredictionCache(unittest.TestCase):
+    def test_whenRowsRepeat_predictsFromTheCache(self):
+        (data, target) = make_data(200, missing=0.1)
+
+        for tree_class in (DecisionTree, CARTTree):
+            tree = tree_class(max_depth=3, cache_size=100)
+            tree.train(data, target)
+            uncached = tree_class(max_depth=3)
+            uncached.train(data, target)
+
+            predictions = [tree.predict(data.iloc[[i % 50]]) for i in range(200)]
+            stats = tree.cache_stats()
+
+            self.assertEqual([uncached.predict(data.iloc[[i % 50]]) for i in range(200)], predictions)
+            self.assertEqual(200, stats.hits + stats.misses)
+            self.assertGreaterEqual(stats.hits, 150)
+            self.assertEqual(0, stats.evictions)
+
+    def test_key_onlyHoldsTheAttributesTheTreeTests(self):
+        data = pd.DataFrame(data={'col1': [1.0, 2.0, 3.0, 4.0], 'unused': [1.0, 2.0, 3.0, 4.0]})
+        target = pd.Series(data=['a', 'a', 'b', 'b'])
+        tree = CARTTree(max_depth=1, cache_size=10)
+        tree.train(data, target)
+
+        tree.predict(pd.DataFrame(data={'col1': [1.0], 'unused': [5.0]}))
+        tree.predict(pd.DataFrame(data={'col1': [1.0], 'unused': [6.0]}))
+
+        self.assertEqual(['col1'], tree_attributes(tree.root))
+        self.assertEqual(CacheStats(1, 1, 0, 1, 10), tree.cache_stats())
+
+    def test_whenMissingValues_keysThemAlike(self):
+        (data, target) = make_data(200, missing=0.1)
+        tree = DecisionTree(cache_size=10)
+        tree.train(data, target)
+        row = pd.DataFrame(data={'col1': [np.nan], 'col2': ['x'], 'col3': [0.0]})
+
+        first = tree.predict(row)
+        second = tree.predict(row.copy())
+
+        self.assertEqual(first, second)
+        self.assertEqual(1, tree.cache_stats().hits)
+
+    def test_whenFull_evictsTheLeastRecentlyUsedRow(self):
+        data = pd.DataFrame(data={'col1': [1.0, 2.0, 3.0, 4.0]})
+        target = pd.Series(data=['a', 'a', 'b', 'b'])
+        tree = CARTTree()
+        tree.train(data, target)
+        cache = PredictionCache(tree.root, 2)
+
+        for value in (1.0, 2.0, 1.0, 3.0, 1.0, 2.0):
+            cache.predict(pd.DataFrame(data={'col1': [value]}))
+
+        self.assertEqual(CacheStats(2, 4, 2, 2, 2), cache.stats())
+
+    def test_whenRetrained_startsAnEmptyCache(self):
+        (data, target) = make_data(200, missing=0.1)
+        tree = DecisionTree(cache_size=10)
+        tree.train(data, target)
+        tree.predict(data.iloc[[0]])
+
+        tree.train(data, target.map({'a': 'b', 'b': 'a'}))
+
+        self.assertEqual(CacheStats(0, 0, 0, 0, 10), tree.cache_stats())
+        self.assertNotEqual(target.iloc[0], tree.predict(data.iloc[[0]]))
+
+    def test_whenPruned_startsAnEmptyCache(self):
+        (data, target) = make_data(200, noise=0.2)
+        tree = DecisionTree(cache_size=200)
+        tree.train(data, target)
+        for i in range(200):
+            tree.predict(data.iloc[[i]])
+
+        tree.prune(tree.cost_complexity_pruning_path().ccp_alphas[-2])
+
+        self.assertEqual(CacheStats(0, 0, 0, 0, 200), tree.cache_stats())
+        self.assertEqual(list(tree.predict_batch(data)), [tree.predict(data.iloc[[i]]) for i in range(200)])
+
+    def test_whenNoCacheSize_predictsWithoutCaching(self):
+        (data, target) = make_data(50, missing=0.1)
+        tree = CARTTree()
+        tree.train(data, target)
+
+        tree.predict(data.iloc[[0]])
+
+        self.assertEqual(CacheStats(0, 0, 0, 0, 0), tree.cache_stats())
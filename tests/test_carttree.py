@@ -1,6 +1,7 @@
 import unittest
 import pandas as pd
 from cart.carttree import CARTTree
+from tree.leaf import Leaf
 
 
 class TestCARTTree(unittest.TestCase):
@@ -55,3 +56,46 @@ class TestBestSplit(unittest.TestCase):
         (_, _, val, _) = tree._best_split(df, target)
 
         self.assertEqual(expected, val)
+
+
+class TestPredictBatch(unittest.TestCase):
+    def test_ManyRows_ReturnsSamePredictionsAsPredict(self):
+        attribute_data = {'col1': [1, 2, 1, 1, 1], 'col2': ['x', 'y', 'x', 'y', 'x']}
+        train_x = pd.DataFrame(data=attribute_data)
+        target = pd.Series(data=['a', 'a', 'b', 'b', 'b'])
+        tree = CARTTree()
+        tree.train(train_x, target)
+        predict_x = pd.DataFrame(data={'col1': [1, 3, 2, 1], 'col2': ['x', 'x', 'y', 'y']})
+        expected = [tree.predict(predict_x.iloc[[i]]) for i in range(4)]
+
+        predictions = tree.predict_batch(predict_x)
+
+        self.assertEqual(expected, list(predictions))
+
+
+class TestMaxDepth(unittest.TestCase):
+    def test_MaxDepthOne_TrainsStump(self):
+        attribute_data = {'col1': [1, 2, 1, 1, 1], 'col2': ['x', 'y', 'x', 'y', 'x']}
+        train_x = pd.DataFrame(data=attribute_data)
+        target = pd.Series(data=['a', 'a', 'b', 'b', 'b'])
+        tree = CARTTree(max_depth=1)
+
+        tree.train(train_x, target)
+
+        self.assertTrue(all(isinstance(branch.child, Leaf) for branch in tree.root.branchs))
+
+
+class TestMseCriterion(unittest.TestCase):
+    def test_NumericTarget_SplitsWhereMeansDiffer(self):
+        train_x = pd.DataFrame(data={'col1': [1, 2, 3, 4, 5, 6]})
+        target = pd.Series(data=[1.0, 1.1, 0.9, 5.0, 5.2, 4.8])
+        tree = CARTTree(criterion='mse')
+
+        tree.train(train_x, target)
+
+        self.assertEqual(3, tree.root.branchs[0].val)
+        self.assertAlmostEqual(1.0, tree.predict(pd.DataFrame(data={'col1': [2]})))
+
+    def test_UnknownCriterion_Raises(self):
+        with self.assertRaises(ValueError):
+            CARTTree(criterion='hinge')
@@ -0,0 +1,139 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from tree.criterion import get_criterion
+from tree.desctree import DecisionTree
+from tree.node import Node
+from tree.store import load_tree
+from tree.traverse import iter_nodes
+from cart.carttree import CARTTree
+from tests.helpers import make_data
+
+
+def n_nodes(tree):
+    return len(list(iter_nodes(tree.root)))
+
+
+class TestCategoryOrder(unittest.TestCase):
+    def test_whenTwoClasses_ordersByClassFraction(self):
+        stats = np.array([[3, 1], [0, 2], [1, 1]])
+
+        self.assertEqual([0, 2, 1], list(get_criterion('gini').category_order(stats)))
+
+    def test_whenMulticlass_hasNoOrder(self):
+        self.assertIsNone(get_criterion('gini').category_order(np.array([[1, 1, 1], [2, 0, 0]])))
+
+    def test_whenMse_ordersByMean(self):
+        stats = np.array([[2, 10.0, 50.0], [1, 1.0, 1.0]])
+
+        self.assertEqual([1, 0], list(get_criterion('mse').category_order(stats)))
+
+
+class TestOrderedSplits(unittest.TestCase):
+    def test_whenOrdered_splitsOffTheCategorySetInOneBinarySplit(self):
+        (data, target) = make_data(400, ('col2', 'col3'), target='category', n_categories=40)
+
+        for tree_class in (DecisionTree, CARTTree):
+            tree = tree_class(categorical_splits='ordered')
+            tree.train(data, target)
+
+            self.assertIsInstance(tree.root, Node)
+            self.assertEqual('col2', tree.root.attr_name)
+            self.assertEqual(['isin', 'notin'], [branch.exp.__name__ for branch in tree.root.branchs])
+            self.assertEqual(3, n_nodes(tree))
+            self.assertEqual(list(target), list(tree.predict_batch(data)))
+
+    def test_whenOrdered_growsSmallerTreesThanTheDefault(self):
+        (data, target) = make_data(400, ('col2', 'col3'), target='category', n_categories=40)
+
+        for tree_class in (DecisionTree, CARTTree):
+            default = tree_class()
+            default.train(data, target)
+            ordered = tree_class(categorical_splits='ordered')
+            ordered.train(data, target)
+
+            self.assertLess(n_nodes(ordered), n_nodes(default))
+
+    def test_whenRegression_splitsOffAPrefixOfTheOrderedMeans(self):
+        (data, _) = make_data(400, ('col2', 'col3'), n_categories=40)
+        target = pd.Series(data=data['col2'].str[1:].astype(int) % 3 * 10.0)
+
+        tree = CARTTree(criterion='mse', categorical_splits='ordered', max_depth=1)
+        tree.train(data, target)
+        low = set(data['col2'][target == 0.0])
+        middle = set(data['col2'][target == 10.0])
+
+        self.assertIn(tree.root.branchs[0].val, (low, low | middle))
+
+    def test_whenMulticlass_fallsBackToTheDefaultSplits(self):
+        data = pd.DataFrame(data={'col1': ['x', 'y', 'z', 'x', 'y', 'z']})
+        target = pd.Series(data=['a', 'b', 'c', 'a', 'b', 'c'])
+
+        for tree_class in (DecisionTree, CARTTree):
+            default = tree_class()
+            default.train(data, target)
+            ordered = tree_class(categorical_splits='ordered')
+            ordered.train(data, target)
+
+            self.assertEqual(n_nodes(default), n_nodes(ordered))
+            self.assertEqual(list(default.predict_batch(data)), list(ordered.predict_batch(data)))
+
+    def test_whenUnknownCategoricalSplits_raisesValueError(self):
+        self.assertRaises(ValueError, DecisionTree, categorical_splits='binary')
+        self.assertRaises(ValueError, CARTTree, categorical_splits='multiway')
+
+    def test_whenStreamed_matchesInMemoryTraining(self):
+        (data, target) = make_data(400, ('col2', 'col3'), target='category', n_categories=40)
+        table = data.assign(label=target)
+
+        for tree_class in (DecisionTree, CARTTree):
+            tree = tree_class(categorical_splits='ordered')
+            tree.train_chunks([table.iloc[:200], table.iloc[200:]], 'label')
+
+            self.assertEqual(3, n_nodes(tree))
+            self.assertEqual(list(target), list(tree.predict_batch(data)))
+
+
+class TestOrderedPrediction(unittest.TestCase):
+    def test_allPredictionPathsAgree_includingUnseenAndMissingCategories(self):
+        (data, target) = make_data(400, ('col2', 'col3'), target='category', n_categories=40)
+        predict_x = pd.DataFrame(data={'col2': ['c1', 'c30', 'unseen', None, 'c5'],
+                                       'col3': [0.1, -0.3, 0.2, 0.0, 1.5]})
+
+        for tree_class in (DecisionTree, CARTTree):
+            tree = tree_class(categorical_splits='ordered')
+            tree.train(data, target)
+            flat = tree.compile()
+
+            batch = list(tree.predict_batch(predict_x))
+
+            self.assertEqual(batch, [tree.predict(predict_x.iloc[[i]]) for i in range(5)])
+            self.assertEqual(batch, list(flat.predict(predict_x)))
+            self.assertEqual(['a', 'b'], batch[:2])
+            self.assertNotIn(None, batch)
+
+    def test_whenFeaturesReordered_keepsTheCategorySets(self):
+        (data, target) = make_data(400, ('col2', 'col3'), target='category', n_categories=40)
+        tree = CARTTree(categorical_splits='ordered')
+        tree.train(data, target)
+        flat = tree.compile()
+
+        reordered = flat.with_features(['col3', 'col2'],
+                                       [None, np.array(sorted(data['col2'].unique())[::-1], dtype=object)])
+
+        self.assertEqual(list(flat.predict(data)), list(reordered.predict(data[['col3', 'col2']])))
+
+    def test_whenSavedAndLoaded_keepsTheCategorySets(self):
+        (data, target) = make_data(400, ('col2', 'col3'), target='category', n_categories=40)
+        tree = DecisionTree(categorical_splits='ordered')
+        tree.train(data, target)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'tree.bin')
+            tree.save(path)
+            flat = load_tree(path, mmap=False)
+
+            self.assertEqual(list(tree.compile().bits), list(flat.bits))
+            self.assertEqual(list(target), list(flat.predict(data)))
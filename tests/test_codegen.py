@@ -0,0 +1,102 @@
+import unittest
+import pandas as pd
+from tree.branch import Branch
+from tree.codegen import compile_predictor, to_python_source
+from tree.desctree import DecisionTree
+from tree.leaf import Leaf
+from tree.node import Node
+from tree.util import gte, lt
+from cart.carttree import CARTTree
+from tests.helpers import make_data
+
+
+def rows_of(data):
+    return [dict(zip(data.columns, values)) for values in data.itertuples(index=False)]
+
+
+class TestCompilePredictor(unittest.TestCase):
+    def test_whenCompiled_predictsAsTheTree(self):
+        (data, target) = make_data(300, missing=0.1)
+        trees = [DecisionTree(max_depth=4), CARTTree(), DecisionTree(categorical_splits='ordered'),
+                 CARTTree(categorical_splits='ordered', max_bins=8)]
+
+        for tree in trees:
+            tree.train(data, target)
+            predict_row = tree.compile_predictor()
+
+            self.assertEqual(list(tree.predict_batch(data)), [predict_row(row) for row in rows_of(data)])
+
+    def test_whenRegression_predictsAsTheTree(self):
+        (data, _) = make_data(300, missing=0.1)
+        target = data['col3'] * 2 + 1
+
+        tree = CARTTree(criterion='mse', max_depth=5)
+        tree.train(data, target)
+        predict_row = tree.compile_predictor()
+
+        self.assertEqual(list(tree.predict_batch(data)), [predict_row(row) for row in rows_of(data)])
+
+    def test_whenRowMatchesNoBranch_predictsNone(self):
+        data = pd.DataFrame(data={'col1': ['x', 'y', 'x']})
+        target = pd.Series(data=['a', 'b', 'a'])
+        tree = DecisionTree()
+        tree.train(data, target)
+
+        self.assertIsNone(tree.compile_predictor()({'col1': 'unseen'}))
+
+    def test_whenTreeIsDeeperThanPythonNesting_splitsItIntoFunctions(self):
+        root = Leaf('deep')
+        for depth in reversed(range(250)):
+            root = Node(0.1, 'col1', [Branch(depth, lt, Leaf(depth)), Branch(depth, gte, root)])
+
+        predict_row = compile_predictor(root)
+
+        self.assertEqual(4, predict_row({'col1': 3.5}))
+        self.assertEqual('deep', predict_row({'col1': 1000}))
+
+    def test_whenUntrained_raisesValueError(self):
+        self.assertRaises(ValueError, CARTTree().compile_predictor)
+
+
+class TestPredictorCache(unittest.TestCase):
+    def test_whenCompiledTwice_returnsTheSameFunction(self):
+        (data, target) = make_data(100, missing=0.1)
+        tree = CARTTree()
+        tree.train(data, target)
+
+        self.assertIs(tree.compile_predictor(), tree.compile_predictor())
+
+    def test_whenRetrainedOrPruned_recompiles(self):
+        (data, target) = make_data(200, noise=0.2)
+        tree = DecisionTree()
+        tree.train(data, target)
+        first = tree.compile_predictor()
+
+        tree.train(data.iloc[:100], target.iloc[:100])
+        second = tree.compile_predictor()
+        tree.prune(tree.cost_complexity_pruning_path().ccp_alphas[-2])
+        predictor = tree.compile_predictor()
+
+        self.assertIsNot(first, second)
+        self.assertIsNot(second, predictor)
+        self.assertEqual(list(tree.predict_batch(data)), [predictor(row) for (_, row) in data.iterrows()])
+
+
+class TestPythonSource(unittest.TestCase):
+    def test_source_definesTheNamedFunctionOnItsOwn(self):
+        (data, target) = make_data(300, missing=0.1)
+        tree = CARTTree(categorical_splits='ordered')
+        tree.train(data, target)
+        namespace = {}
+
+        exec(tree.to_python_source('score'), namespace)
+
+        self.assertEqual(list(tree.predict_batch(data)), [namespace['score'](row) for row in rows_of(data)])
+
+    def test_source_isTheSameForTheSameTree(self):
+        (data, target) = make_data(300, missing=0.1)
+        tree = DecisionTree(categorical_splits='ordered')
+        tree.train(data, target)
+
+        self.assertEqual(to_python_source(tree.root), tree.to_python_source())
+        self.assertIn('def predict_row(row):', tree.to_python_source())
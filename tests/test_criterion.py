@@ -0,0 +1,149 @@
+import unittest
+import numpy as np
+import pandas as pd
+from tree.criterion import Criterion, Entropy, Gini, get_criterion
+from tree.desctree import DecisionTree
+from tree.util import information_gain_thresholds, information_gain_categories, node_counts
+from cart.cart_utils import gini_index, lte, gt, eq, neq
+from cart.carttree import CARTTree
+
+
+class TestGetCriterion(unittest.TestCase):
+    def test_whenUnknownName_raisesValueError(self):
+        self.assertRaises(ValueError, get_criterion, 'hinge')
+        self.assertRaises(ValueError, DecisionTree, criterion='hinge')
+
+
+class TestBuiltinCriteria(unittest.TestCase):
+    def test_entropy_matchesInformationGainKernels(self):
+        counts = np.array([[1, 0], [2, 1], [0, 3]])
+        entropy = get_criterion('entropy')
+        parent = node_counts(counts.sum(axis=0))
+
+        gains = entropy.gain(entropy.thresholds(counts, False, parent), parent)
+
+        self.assertTrue(np.allclose(information_gain_thresholds(counts), gains))
+        self.assertEqual(information_gain_categories(counts),
+                         entropy.round(entropy.gain(entropy.multiway(counts), parent)))
+
+    def test_gini_matchesGiniIndexKernel(self):
+        attribute = pd.Series(data=[2, 2, 1, 3, 3])
+        target = pd.Series(data=['a', 'a', 'a', 'b', 'a'])
+        counts = np.array([[1, 0], [2, 0], [1, 1]])
+        categories = pd.Series(data=['x', 'x', 'y', 'z', 'z'])
+        category_counts = np.array([[2, 0], [1, 0], [1, 1]])
+        gini = get_criterion('gini')
+
+        self.assertEqual([gini_index(target, attribute, val, lte, gt) for val in (1, 2, 3)],
+                         list(gini.round(gini.thresholds(counts, True))))
+        self.assertEqual([gini_index(target, categories, val, eq, neq) for val in ('x', 'y', 'z')],
+                         list(gini.round(gini.categories(category_counts))))
+
+    def test_whenGrouped_scoresThresholdsLikeClassCounts(self):
+        # class codes sorted by value, grouped as values [0, 0], [1], [2, 2, 2]
+        codes = np.array([0, 1, 1, 2, 2, 1])
+        starts = np.array([0, 2, 3])
+        counts = np.array([[1, 1, 0], [0, 1, 0], [0, 1, 2]])
+        missing = np.array([2, 0, 1])
+        parent = node_counts(counts.sum(axis=0) + missing)
+
+        for criterion in (get_criterion('entropy'), get_criterion('gini')):
+            for inclusive in (False, True):
+                self.assertTrue(np.allclose(criterion.thresholds(counts, inclusive),
+                                            criterion.thresholds((codes, starts), inclusive)))
+                (dense, dense_left) = criterion.thresholds_missing(counts, inclusive, parent, missing)
+                (grouped, grouped_left) = criterion.thresholds_missing((codes, starts), inclusive,
+                                                                       parent, missing)
+                self.assertTrue(np.allclose(dense, grouped))
+                self.assertEqual(list(dense_left), list(grouped_left))
+
+    def test_mse_scoresWeightedSquaredError(self):
+        # values 1, 2, 3 with targets [1, 3], [3], [10]
+        sums = np.array([[2, 4, 10], [1, 3, 9], [1, 10, 100]], dtype=float)
+        expected = [(2 + 24.5) / 4, (8 / 3 + 0) / 4, 46.75 / 4]
+
+        errors = get_criterion('mse').thresholds(sums, True)
+
+        self.assertTrue(np.allclose(expected, errors))
+
+    def test_mae_scoresDeviationFromMedians(self):
+        # sorted groups [1, 3], [3], [10]
+        groups = (np.array([1.0, 3.0, 3.0, 10.0]), np.array([0, 2, 3]))
+        expected = [(2 + 7) / 4, (2 + 0) / 4, (9 + 0) / 4]
+
+        errors = get_criterion('mae').thresholds(groups, True)
+
+        self.assertTrue(np.allclose(expected, errors))
+
+
+class TestTreeCriterion(unittest.TestCase):
+    def setUp(self):
+        self.data = pd.DataFrame(data={'col1': [1, 2, 3, 4, 5, 6], 'col2': ['x', 'y', 'x', 'y', 'x', 'x']})
+        self.target = pd.Series(data=['a', 'a', 'a', 'b', 'b', 'b'])
+
+    def test_whenDecisionTreeUsesGini_splitsLikeEntropy(self):
+        tree = DecisionTree(criterion='gini')
+
+        tree.train(self.data, self.target)
+
+        self.assertEqual('col1', tree.root.attr_name)
+        self.assertEqual(4, tree.root.branchs[0].val)
+
+    def test_whenCARTTreeUsesEntropy_learnsTarget(self):
+        tree = CARTTree(criterion='entropy')
+
+        tree.train(self.data, self.target)
+
+        self.assertTrue((tree.predict_batch(self.data) == self.target).all())
+
+    def test_whenMaeCriterion_splitsOffOutlier(self):
+        target = pd.Series(data=[1.0, 1.1, 0.9, 5.0, 5.2, 50.0])
+        for tree in (CARTTree(criterion='mae'), DecisionTree(criterion='mae')):
+            tree.train(self.data[['col1']], target)
+
+            self.assertEqual('col1', tree.root.attr_name)
+            self.assertEqual(5 if isinstance(tree, CARTTree) else 6, tree.root.branchs[0].val)
+
+    def test_whenTargetHasManyClasses_groupsThemInsteadOfCountingPerValue(self):
+        rng = np.random.default_rng(0)
+        data = pd.DataFrame(data={'col1': rng.normal(size=300), 'col2': rng.integers(0, 10, 300)})
+        data.loc[rng.random(300) < 0.1, 'col1'] = np.nan
+        target = pd.Series(data=data['col2'] * 10 + rng.integers(0, 3, 300))
+
+        for criterion_class in (Entropy, Gini):
+            dense = criterion_class()
+            dense.max_dense_classes = 1000
+            for tree_class in (DecisionTree, CARTTree):
+                for params in ({}, {'engine': 'presort'}, {'max_bins': 8}):
+                    tree = tree_class(criterion=criterion_class.name, max_depth=4, **params)
+                    tree.train(data, target)
+                    counted = tree_class(criterion=dense, max_depth=4, **params)
+                    counted.train(data, target)
+
+                    self.assertEqual(counted.to_python_source(), tree.to_python_source())
+
+    def test_whenRegressionCriterionAndCategoricalTarget_raisesValueError(self):
+        for tree_class in (DecisionTree, CARTTree):
+            for criterion in ('mse', 'mae'):
+                with self.assertRaisesRegex(ValueError, 'numeric target'):
+                    tree_class(criterion=criterion).train(self.data, self.target)
+
+    def test_whenTargetHasMissingValues_raisesValueError(self):
+        for tree_class in (DecisionTree, CARTTree):
+            for target in (pd.Series(data=['a', 'a', None, 'b', 'b', 'b']),
+                           pd.Series(data=[1.0, 1.0, np.nan, 2.0, 2.0, 2.0])):
+                with self.assertRaisesRegex(ValueError, 'missing'):
+                    tree_class().train(self.data, target)
+
+    def test_whenCustomCriterion_isUsed(self):
+        class Misclassification(Criterion):
+            name = 'misclassification'
+
+            def impurity(self, stats):
+                return 1 - stats.max(axis=-1) / np.maximum(stats.sum(axis=-1), 1)
+
+        tree = CARTTree(criterion=Misclassification())
+
+        tree.train(self.data, self.target)
+
+        self.assertEqual('col1', tree.root.attr_name)
@@ -1,6 +1,6 @@
 import unittest
 import pandas as pd
-from tree.desctree import DecisionTree, make_prediction
+from tree.desctree import DecisionTree
 
 
 class TestDecisionTree(unittest.TestCase):
@@ -35,7 +35,7 @@ class TestDecisionTree(unittest.TestCase):
         self.assertEqual(expected, prediction)
 
 
-class TestBestSplit(unittest.TestCase):
+class TestDecisionTreeBestSplit(unittest.TestCase):
     def test_whenSecondArgIsBest_returnsCorrectArgName(self):
         attribute_data = {'col1': [1, 2, 1, 2, 1], 'col2': ['x', 'y', 'x', 'x', 'x']}
         target_data = ['a', 'a', 'b', 'b', 'b']
@@ -61,52 +61,29 @@ class TestBestSplit(unittest.TestCase):
         self.assertEqual(expected, val)
 
 
-class TestMakeSplitNum(unittest.TestCase):
-    def test_whenSplitOnAttribute2_returnsTargetsWhereAttributeIs2(self):
+class TestDecisionTreePredictBatch(unittest.TestCase):
+    def test_whenManyRows_returnsSamePredictionsAsPredict(self):
+        attribute_data = {'col1': [1, 2, 1, 1, 1], 'col2': ['x', 'y', 'x', 'y', 'x']}
         target_data = ['a', 'a', 'b', 'b', 'b']
-        attribute_data = [1, 2, 2, 2, 2]
+        train_x = pd.DataFrame(data=attribute_data)
         target = pd.Series(data=target_data)
-        attribute = pd.Series(data=attribute_data)
         tree = DecisionTree()
-        expected = pd.Series(data=['a', 'b', 'b', 'b'], index=[1, 2, 3, 4])
-
-        data_splits = tree._make_split(target, attribute, 2, True)
-        new_target = data_splits[1]['data']
+        tree.train(train_x, target)
+        predict_x = pd.DataFrame(data={'col1': [1, 3, 2, 1], 'col2': ['x', 'x', 'y', 'y']}, index=[5, 6, 7, 8])
+        expected = [tree.predict(predict_x.iloc[[i]]) for i in range(4)]
 
-        self.assertTrue(expected.equals(new_target))
+        predictions = tree.predict_batch(predict_x)
 
+        self.assertEqual(expected, list(predictions))
+        self.assertEqual([5, 6, 7, 8], list(predictions.index))
 
-class TestMakeSplitCat(unittest.TestCase):
-    def test_whenSplitOnAttributeX_returnsTargetsWhereAttributeIsX(self):
-        target_data = ['a', 'a', 'b', 'b', 'b']
-        attribute_data = ['x', 'y', 'z', 'x', 'x']
-        target = pd.Series(data=target_data)
-        attribute = pd.Series(data=attribute_data)
-        vals = attribute.unique()
+    def test_whenNoBranchMatches_returnsNone(self):
+        train_x = pd.DataFrame(data={'col2': ['x', 'y']})
+        target = pd.Series(data=['a', 'b'])
         tree = DecisionTree()
-        expected = pd.Series(data=['a', 'b', 'b'], index=[0, 3, 4])
-
-        data_splits = tree._make_split(target, attribute, vals, False)
-        new_target = data_splits[0]['data']
-
-        self.assertTrue(expected.equals(new_target))
-
-
-class TestMakePrediction(unittest.TestCase):
-    def test_whenCategoryBIsDominant_returnsCatBAsPrediction(self):
-        target_data = ['a', 'a', 'b', 'b', 'b']
-        target = pd.Series(data=target_data)
-        expected = 'b'
-
-        prediction = make_prediction(target)
-
-        self.assertEqual(expected, prediction)
-
-    def test_whenNumericTarget_returnsAverageOfTarget(self):
-        target_data = [2, 1, 2, 2]
-        target = pd.Series(data=target_data)
-        expected = 1.75
+        tree.train(train_x, target)
+        predict_x = pd.DataFrame(data={'col2': ['z', 'y']})
 
-        prediction = make_prediction(target)
+        predictions = tree.predict_batch(predict_x)
 
-        self.assertEqual(expected, prediction)
\ No newline at end of file
+        self.assertEqual([None, 'b'], list(predictions))
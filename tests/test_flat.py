@@ -0,0 +1,41 @@
+import unittest
+import pandas as pd
+from tree.desctree import DecisionTree
+from cart.carttree import CARTTree
+from tests.helpers import make_data
+
+
+class TestCompile(unittest.TestCase):
+    def test_whenCompiled_predictsAsPredictBatch(self):
+        (data, target) = make_data(300)
+        predict_x = pd.concat([data, pd.DataFrame(data={'col1': [3], 'col2': ['w'], 'col3': [0.0]})])
+
+        for tree_class in (DecisionTree, CARTTree):
+            tree = tree_class()
+            tree.train(data, target)
+
+            flat = tree.compile()
+
+            self.assertEqual(list(tree.predict_batch(predict_x)), list(flat.predict(predict_x)))
+
+    def test_whenSingleLeaf_returnsLeafPrediction(self):
+        data = pd.DataFrame(data={'col1': [1, 2]})
+        target = pd.Series(data=[1.5, 1.5])
+        tree = CARTTree()
+        tree.train(data, target)
+
+        flat = tree.compile()
+
+        self.assertEqual(1, flat.n_nodes)
+        self.assertEqual([1.5, 1.5], list(flat.predict(data)))
+
+    def test_whenCategoricalBranches_encodesCategories(self):
+        data = pd.DataFrame(data={'col2': ['x', 'y', 'x']})
+        target = pd.Series(data=['a', 'b', 'a'])
+        tree = DecisionTree()
+        tree.train(data, target)
+
+        flat = tree.compile()
+
+        self.assertEqual(['x', 'y'], list(flat.categories[0]))
+        self.assertEqual([2, 2], list(flat.op))
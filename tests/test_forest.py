@@ -0,0 +1,102 @@
+import unittest
+import numpy as np
+import pandas as pd
+from ensemble.forest import RandomForest
+from tree.desctree import DecisionTree
+from tree.flat import merge_features
+from cart.carttree import CARTTree
+from tests.helpers import make_data
+
+
+class TestRandomForest(unittest.TestCase):
+    def test_whenTrained_predictsTrainingTarget(self):
+        (data, target) = make_data(300)
+        forest = RandomForest(n_trees=10, max_features=2, random_state=0)
+
+        forest.train(data, target)
+        predictions = forest.predict_batch(data)
+
+        self.assertEqual(10, len(forest.trees))
+        self.assertGreater((predictions == target).mean(), 0.95)
+
+    def test_whenPredictBatch_matchesMajorityOfMembers(self):
+        (data, target) = make_data(200)
+        forest = RandomForest(n_trees=5, tree_class=DecisionTree, max_features=2, random_state=1)
+        forest.train(data, target)
+        member_predictions = pd.DataFrame({i: tree.predict_batch(data) for (i, tree) in enumerate(forest.trees)})
+
+        predictions = forest.predict_batch(data)
+
+        for i in range(0, 200, 11):
+            counts = member_predictions.iloc[i].value_counts()
+            self.assertEqual(counts.max(), counts[predictions.iloc[i]])
+
+    def test_whenNumericTarget_averagesMembers(self):
+        (data, _) = make_data(200)
+        target = data['col1'] * 2.0
+        forest = RandomForest(n_trees=4, max_features=1.0, random_state=0)
+        forest.train(data, target)
+        expected = np.mean([tree.predict_batch(data) for tree in forest.trees], axis=0)
+
+        predictions = forest.predict_batch(data)
+
+        self.assertTrue(np.allclose(expected, predictions))
+
+    def test_whenNumericTarget_splitsMembersBySquaredError(self):
+        (data, _) = make_data(200)
+        target = data['col1'] * 2.0 + data['col3']
+
+        for tree_class in (CARTTree, DecisionTree):
+            forest = RandomForest(n_trees=2, tree_class=tree_class, max_depth=3, random_state=0)
+            forest.train(data, target)
+
+            self.assertEqual(['mse', 'mse'], [tree.criterion for tree in forest.trees])
+
+    def test_whenTreeParams_passesThemToMembers(self):
+        (data, target) = make_data(200)
+        forest = RandomForest(n_trees=2, criterion='entropy', min_samples_leaf=5, random_state=0)
+
+        forest.train(data, target)
+
+        self.assertEqual(['entropy', 'entropy'], [tree.criterion for tree in forest.trees])
+        self.assertEqual([5, 5], [tree.min_samples_leaf for tree in forest.trees])
+        self.assertGreater((forest.predict_batch(data) == target).mean(), 0.95)
+
+    def test_whenSameRandomState_trainsSameForestInParallel(self):
+        (data, target) = make_data(200)
+        serial = RandomForest(n_trees=4, random_state=3)
+        serial.train(data, target)
+        parallel = RandomForest(n_trees=4, random_state=3, n_jobs=2)
+        parallel.train(data, target)
+
+        self.assertEqual(list(serial.predict_batch(data)), list(parallel.predict_batch(data)))
+
+
+class TestMaxFeatures(unittest.TestCase):
+    def test_whenOneFeature_splitsOnSampledColumns(self):
+        (data, target) = make_data(200)
+        names = set()
+
+        for seed in range(5):
+            tree = CARTTree(max_depth=1, max_features=1, random_state=seed)
+            tree.train(data, target)
+            names.add(tree.root.attr_name)
+
+        self.assertGreater(len(names), 1)
+
+
+class TestMergeFeatures(unittest.TestCase):
+    def test_whenTreesShareFeatures_returnsUnionOfCategories(self):
+        data = pd.DataFrame(data={'col2': ['x', 'y', 'z']})
+        first = DecisionTree()
+        first.train(data.iloc[:2], pd.Series(data=['a', 'b']))
+        second = DecisionTree()
+        second.train(data.iloc[1:], pd.Series(data=['a', 'b'], index=[1, 2]))
+        flats = [first.compile(), second.compile()]
+
+        (features, categories) = merge_features(flats)
+        merged = flats[1].with_features(features, categories)
+
+        self.assertEqual(['col2'], features)
+        self.assertEqual(['x', 'y', 'z'], list(categories[0]))
+        self.assertEqual(list(flats[1].predict(data)), list(merged.predict(data)))
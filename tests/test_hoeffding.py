@@ -0,0 +1,57 @@
+import unittest
+import numpy as np
+import pandas as pd
+from tree.hoeffding import HoeffdingTree
+from tests.helpers import make_data
+
+
+class TestHoeffdingTree(unittest.TestCase):
+    def test_whenFewRows_staysLeafPredictingMajority(self):
+        tree = HoeffdingTree(grace_period=100)
+        (data, target) = make_data(50)
+
+        tree.partial_fit(data, target)
+
+        self.assertEqual(target.value_counts().index[0], tree.predict(data))
+        self.assertEqual(1, tree.compile().n_nodes)
+
+    def test_whenBatchesArrive_splitsOnInformativeColumn(self):
+        tree = HoeffdingTree(grace_period=200)
+        for seed in range(10):
+            tree.partial_fit(*make_data(500, seed=seed))
+
+        (data, target) = make_data(1000, seed=99)
+        self.assertEqual('col1', tree.root.attr_name)
+        self.assertGreater((tree.predict_batch(data) == target).mean(), 0.95)
+
+    def test_whenNewCategoryAfterSplit_addsBranch(self):
+        tree = HoeffdingTree(grace_period=10, delta=0.5)
+        data = pd.DataFrame(data={'col1': ['x', 'y'] * 20})
+        tree.partial_fit(data, pd.Series(data=['a', 'b'] * 20))
+
+        tree.partial_fit(pd.DataFrame(data={'col1': ['z']}), pd.Series(data=['c']))
+
+        self.assertEqual(['x', 'y', 'z'], [branch.val for branch in tree.root.branchs])
+        self.assertEqual('c', tree.predict(pd.DataFrame(data={'col1': ['z']})))
+
+    def test_whenValueMissingAfterSplit_routesRowsToDefaultBranch(self):
+        tree = HoeffdingTree(grace_period=200, max_depth=1)
+        for seed in range(10):
+            tree.partial_fit(*make_data(500, seed=seed))
+        default = tree.root.branchs[tree.root.missing].child
+        n_seen = [branch.child.n_seen for branch in tree.root.branchs]
+
+        (data, target) = make_data(50, seed=99)
+        data['col1'] = np.nan
+        tree.partial_fit(data, target)
+
+        self.assertEqual('col1', tree.root.attr_name)
+        self.assertEqual(sum(n_seen) + 50, sum(branch.child.n_seen for branch in tree.root.branchs))
+        self.assertEqual(n_seen[tree.root.missing] + 50, default.n_seen)
+        self.assertEqual(default.prediction, tree.predict(data))
+
+    def test_hoeffdingBound_shrinksWithRows(self):
+        tree = HoeffdingTree()
+        tree.partial_fit(*make_data(10))
+
+        self.assertGreater(tree.hoeffding_bound(100), tree.hoeffding_bound(10000))
@@ -0,0 +1,79 @@
+import unittest
+import numpy as np
+from tree.desctree import DecisionTree
+from tree.instrument import TrainingCallback, TrainingProfiler, make_hooks
+from cart.carttree import CARTTree
+from tests.helpers import make_data
+
+
+class RecordingCallback(TrainingCallback):
+    def __init__(self):
+        self.events = []
+
+    def on_train_begin(self, tree, matrix):
+        self.events.append('begin')
+
+    def on_node_begin(self, depth, n_rows):
+        self.events.append(('node', depth, n_rows))
+
+    def on_split(self, column, value, score, score_seconds, split_seconds):
+        self.events.append(('split', column, value))
+
+    def on_leaf(self, prediction):
+        self.events.append(('leaf', prediction))
+
+    def on_train_end(self, tree):
+        self.events.append('end')
+
+
+class TestMakeHooks(unittest.TestCase):
+    def test_whenNoCallbacks_returnsNone(self):
+        self.assertIsNone(make_hooks(None))
+        self.assertIsNone(make_hooks([]))
+
+
+class TestTrainingCallbacks(unittest.TestCase):
+    def test_whenCARTTreeTrains_reportsNodesInBuildOrder(self):
+        callback = RecordingCallback()
+        (data, target) = make_data(30, ('col1', 'col2'))
+
+        CARTTree(callbacks=[callback]).train(data, target)
+
+        self.assertEqual(['begin', ('node', 0, 30), ('split', 'col1', 3), ('node', 1, 10), ('leaf', 'b'),
+                          ('node', 1, 20), ('split', 'col2', 'z'), ('node', 2, 4), ('leaf', 'b'),
+                          ('node', 2, 16), ('leaf', 'a'), 'end'], callback.events)
+
+    def test_whenDecisionTreeTrains_reportsSplitValue(self):
+        callback = RecordingCallback()
+        (data, target) = make_data(30, ('col1', 'col2'))
+
+        DecisionTree(callbacks=[callback]).train(data, target)
+
+        self.assertEqual(('split', 'col1', 5), callback.events[2])
+
+    def test_whenTraced_treeIsUnchanged(self):
+        (data, target) = make_data(30, ('col1', 'col2'))
+        plain = CARTTree()
+        plain.train(data, target)
+        traced = CARTTree(callbacks=[TrainingProfiler()])
+        traced.train(data, target)
+
+        self.assertTrue(np.array_equal(plain.compile().feature, traced.compile().feature))
+        self.assertIsNone(traced._hooks)
+
+
+class TestTrainingProfiler(unittest.TestCase):
+    def test_whenTrained_recordsColumnsAndNodes(self):
+        profiler = TrainingProfiler()
+        (data, target) = make_data(30, ('col1', 'col2'))
+
+        DecisionTree(callbacks=[profiler]).train(data, target)
+
+        root = profiler.nodes[0]
+        self.assertEqual((0, 30, 'col1'), (root['depth'], root['rows'], root['column']))
+        self.assertEqual([('col1', 9), ('col2', 3)],
+                         [(c['column'], c['candidates']) for c in root['columns']])
+        self.assertEqual(6, len(profiler.nodes))
+        columns = {total['column']: total for total in profiler.slowest_columns()}
+        self.assertEqual(1, columns['col1']['chosen'])
+        self.assertIn('Slowest columns:', profiler.report())
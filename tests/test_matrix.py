@@ -0,0 +1,102 @@
+import tracemalloc
+import unittest
+import numpy as np
+import pandas as pd
+from tree.desctree import DecisionTree
+from tree.matrix import encode
+from cart.carttree import CARTTree
+from tests.helpers import make_data
+
+
+COLUMNS = tuple(f'col{i}' for i in range(1, 21))
+
+
+class TestEncode(unittest.TestCase):
+    def test_whenMixedColumns_returnsCodesAndFloats(self):
+        data = pd.DataFrame(data={'col1': [1, 2, 1], 'col2': ['y', 'x', 'y']})
+        target = pd.Series(data=['a', 'b', 'b'])
+
+        matrix = encode(data, target)
+
+        self.assertEqual(np.float64, matrix.columns[0].dtype)
+        self.assertEqual([0, 1, 0], list(matrix.columns[1]))
+        self.assertEqual(['y', 'x'], list(matrix.categories[1]))
+        self.assertEqual([0, 1, 1], list(matrix.y))
+        self.assertFalse(matrix.is_regression)
+
+    def test_whenNumericTarget_keepsTargetValues(self):
+        data = pd.DataFrame(data={'col1': [1, 2, 1]})
+        target = pd.Series(data=[2, 1, 2])
+
+        matrix = encode(data, target)
+
+        self.assertTrue(matrix.is_regression)
+        self.assertEqual(1.5, matrix.prediction(np.array([0, 1])))
+
+    def test_whenTargetHasMissingValues_raisesValueError(self):
+        data = pd.DataFrame(data={'col1': [1, 2, 1]})
+
+        self.assertRaises(ValueError, encode, data, pd.Series(data=['a', None, 'b']))
+        self.assertRaises(ValueError, encode, data, pd.Series(data=[1.0, np.nan, 2.0]))
+
+
+class TestZeroCopy(unittest.TestCase):
+    def test_whenFloatColumns_holdsReadOnlyViewsOfTheData(self):
+        (data, target) = make_data(100, COLUMNS)
+        y_values = pd.Series(data=np.arange(100, dtype=np.float64))
+
+        matrix = encode(data, y_values)
+
+        self.assertTrue(np.shares_memory(matrix.columns[0], data['col1'].to_numpy()))
+        self.assertTrue(np.shares_memory(matrix.y_values, y_values.to_numpy()))
+        self.assertFalse(matrix.columns[0].flags.writeable)
+        self.assertFalse(matrix.y_values.flags.writeable)
+        self.assertTrue(data['col1'].to_numpy().flags.writeable)
+
+    def test_whenTrained_leavesDataAndTargetUnchanged(self):
+        (data, target) = make_data(300, COLUMNS)
+        (expected_data, expected_target) = (data.copy(), target.copy())
+
+        for tree_class in (DecisionTree, CARTTree):
+            tree = tree_class(engine='presort')
+            tree.train(data, target)
+
+            pd.testing.assert_frame_equal(expected_data, data)
+            pd.testing.assert_series_equal(expected_target, target)
+
+    def test_whenTrainedTwiceOnOneFrame_growsTheSameTree(self):
+        (data, target) = make_data(300, COLUMNS)
+
+        for tree_class in (DecisionTree, CARTTree):
+            first = tree_class()
+            first.train(data, target)
+            second = tree_class()
+            second.train(data, target)
+
+            self.assertEqual(first.to_python_source(), second.to_python_source())
+
+    def test_whenTrained_peakMemoryStaysBelowTheInputSize(self):
+        (data, target) = make_data(20000, COLUMNS)
+        data = data.drop(columns='col2')
+        size = data.memory_usage(index=False).sum()
+
+        for tree_class in (DecisionTree, CARTTree):
+            tracemalloc.start()
+            try:
+                tree_class(max_depth=6).train(data, target)
+                (_, peak) = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+            self.assertLess(peak, size)
+
+
+class TestPrediction(unittest.TestCase):
+    def test_whenCategoryBIsDominant_returnsB(self):
+        data = pd.DataFrame(data={'col1': [1, 2, 1, 1, 1]})
+        target = pd.Series(data=['a', 'a', 'b', 'b', 'b'])
+        matrix = encode(data, target)
+
+        prediction = matrix.prediction(matrix.all_rows())
+
+        self.assertEqual('b', prediction)
@@ -0,0 +1,169 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from tree.binning import bin_column
+from tree.criterion import get_criterion
+from tree.desctree import DecisionTree
+from tree.matrix import encode
+from tree.store import load_tree
+from tree.util import node_counts
+from cart.carttree import CARTTree
+from tests.helpers import make_data
+
+
+class TestMissingEncoding(unittest.TestCase):
+    def test_binColumn_givesNaNTheCodeAfterTheLastBin(self):
+        (codes, bins) = bin_column(np.array([2.0, np.nan, 1.0]), 255)
+
+        self.assertEqual([1, 2, 0], list(codes))
+        self.assertEqual([1.0, 2.0], list(bins.lower))
+
+    def test_whenColumnHasMissingValues_statisticsLeaveThemOut(self):
+        data = pd.DataFrame(data={'num': [1.0, np.nan, 2.0], 'cat': ['x', None, 'x']})
+        target = pd.Series(data=['a', 'b', 'a'])
+        matrix = encode(data, target)
+
+        self.assertEqual([True, True], matrix.has_missing)
+        self.assertEqual([False, True, False], list(matrix.missing_rows(0, matrix.all_rows())))
+        self.assertEqual([[2, 0]], matrix.category_class_counts(1, matrix.all_rows())[1].tolist())
+        self.assertEqual([1.0, 2.0], list(matrix.numeric_class_counts(0, matrix.all_rows())[0]))
+
+
+class TestMissingCriterion(unittest.TestCase):
+    def test_thresholdsMissing_sendsMissingRowsToTheBetterSide(self):
+        gini = get_criterion('gini')
+        stats = np.array([[2, 0], [0, 2]])
+        parent = node_counts(np.array([2, 3]))
+
+        (impurities, missing_left) = gini.thresholds_missing(stats, True, parent, np.array([0, 1]))
+
+        self.assertFalse(missing_left[0])
+        self.assertEqual(0.0, impurities[0])
+
+
+class TestMissingTraining(unittest.TestCase):
+    def test_whenMissingValuesPredictOneClass_learnsTheirBranch(self):
+        data = pd.DataFrame(data={'col1': [1.0, 2.0, 3.0, 4.0, np.nan, np.nan]})
+
+        for tree_class in (DecisionTree, CARTTree):
+            for missing_class in ('a', 'b'):
+                target = pd.Series(data=['a', 'a', 'b', 'b', missing_class, missing_class])
+                tree = tree_class()
+                tree.train(data, target)
+
+                self.assertEqual(missing_class, tree.predict(pd.DataFrame(data={'col1': [np.nan]})))
+                self.assertEqual(list(target), list(tree.predict_batch(data)))
+
+    def test_whenMissingRowsAreAClassOfTheirOwn_splitsThemOff(self):
+        data = pd.DataFrame(data={'col1': [1.0, 2.0, np.nan, 3.0, 4.0, np.nan]})
+        target = pd.Series(data=['a', 'a', 'b', 'a', 'a', 'b'])
+
+        for tree_class in (DecisionTree, CARTTree):
+            tree = tree_class()
+            tree.train(data, target)
+
+            self.assertEqual(list(target), list(tree.predict_batch(data)))
+
+    def test_whenTrainingSawNoMissingValues_routesThemToTheLargestBranch(self):
+        data = pd.DataFrame(data={'col1': [1.0, 2.0, 3.0, 4.0, 5.0]})
+        target = pd.Series(data=['a', 'a', 'a', 'b', 'b'])
+
+        for tree_class in (DecisionTree, CARTTree):
+            tree = tree_class()
+            tree.train(data, target)
+
+            self.assertEqual('a', tree.predict(pd.DataFrame(data={'col1': [np.nan]})))
+
+    def test_whenMissingValues_noRowIsLost(self):
+        (data, target) = make_data(300, missing=0.2)
+
+        for tree_class in (DecisionTree, CARTTree):
+            tree = tree_class()
+            tree.train(data, target)
+
+            predictions = tree.predict_batch(data)
+
+            self.assertFalse(predictions.isna().any())
+
+    def test_whenBinned_predictsEveryRow(self):
+        (data, target) = make_data(300, missing=0.2)
+
+        for tree_class in (DecisionTree, CARTTree):
+            tree = tree_class(max_bins=4)
+            tree.train(data, target)
+
+            self.assertFalse(tree.predict_batch(data).isna().any())
+
+    def test_whenStreamed_matchesInMemoryBinnedTraining(self):
+        (data, target) = make_data(300, missing=0.2)
+        table = data.assign(label=target)
+        chunks = [table.iloc[i:i + 70] for i in range(0, 300, 70)]
+
+        for tree_class in (DecisionTree, CARTTree):
+            binned = tree_class(max_bins=255)
+            binned.train(data, target)
+            streamed = tree_class()
+            streamed.train_chunks(chunks, 'label')
+
+            self.assertEqual(list(binned.predict_batch(data)), list(streamed.predict_batch(data)))
+
+    def test_whenRegression_learnsTheBranchOfMissingValues(self):
+        data = pd.DataFrame(data={'col1': [1.0, 2.0, 3.0, 4.0, np.nan, np.nan]})
+        target = pd.Series(data=[1.0, 1.0, 5.0, 5.0, 5.0, 5.0])
+
+        for criterion in ('mse', 'mae'):
+            tree = CARTTree(criterion=criterion, max_depth=1)
+            tree.train(data, target)
+
+            self.assertEqual(5.0, tree.predict(pd.DataFrame(data={'col1': [np.nan]})))
+
+
+class TestAllMissingNode(unittest.TestCase):
+    def test_whenEveryRowOfANodeMissesAColumn_skipsTheColumn(self):
+        for column in ('col1', 'col2'):
+            (data, _) = make_data(200, ('col3', column))
+            data.loc[data['col3'] > 0, column] = None
+            labels = pd.Series(data=np.where(data['col3'] > 0.5, 'p', 'q'))
+            values = pd.Series(data=np.where(data['col3'] > 0.5, 1.0, 0.0) + data['col3'])
+            cases = [(DecisionTree, {}, labels), (CARTTree, {}, labels),
+                     (CARTTree, {'criterion': 'mse'}, values), (CARTTree, {'criterion': 'mae'}, values),
+                     (CARTTree, {'max_bins': 16}, labels)]
+
+            for (tree_class, params, target) in cases:
+                for engine in ('sort', 'presort'):
+                    tree = tree_class(engine=engine, **params)
+                    tree.train(data, target)
+
+                    self.assertEqual('col3', tree.root.attr_name)
+                    self.assertFalse(tree.predict_batch(data).isna().any())
+
+
+class TestMissingPrediction(unittest.TestCase):
+    def test_whenMissingValues_allPredictionPathsAgree(self):
+        (data, target) = make_data(300, missing=0.2)
+        predict_x = data.iloc[:50]
+
+        for tree_class in (DecisionTree, CARTTree):
+            tree = tree_class(max_depth=3)
+            tree.train(data, target)
+            flat = tree.compile()
+
+            batch = list(tree.predict_batch(predict_x))
+
+            self.assertEqual(batch, [tree.predict(predict_x.iloc[[i]]) for i in range(50)])
+            self.assertEqual(batch, list(flat.predict(predict_x)))
+
+    def test_whenSavedAndLoaded_keepsMissingBranches(self):
+        (data, target) = make_data(300, missing=0.2)
+        tree = CARTTree()
+        tree.train(data, target)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'tree.bin')
+            tree.save(path)
+            flat = load_tree(path, mmap=False)
+
+            self.assertEqual(list(tree.compile().missing), list(flat.missing))
+            self.assertEqual(list(tree.predict_batch(data)), list(flat.predict(data)))
@@ -0,0 +1,38 @@
+import unittest
+import sys
+import pandas as pd
+from tree.node import Node
+from tree.branch import Branch
+from tree.leaf import Leaf
+from tree.util import eq
+from tree.desctree import DecisionTree
+
+
+class TestNode(unittest.TestCase):
+    def test_whenBranchAdded_storesBranchsAsTuple(self):
+        node = Node(0.5, 'col1')
+
+        node.add_branch(Branch('x', eq, Leaf('a')))
+
+        self.assertIsInstance(node.branchs, tuple)
+        self.assertEqual(1, len(node.branchs))
+
+    def test_whenSlotted_hasNoInstanceDict(self):
+        for obj in (Node(0.5, 'col1'), Branch('x', eq), Leaf('a')):
+            self.assertFalse(hasattr(obj, '__dict__'))
+
+
+class TestMemoryUsage(unittest.TestCase):
+    def test_whenTrained_reportsBytesPerKind(self):
+        train_x = pd.DataFrame(data={'col2': ['x', 'y', 'z']})
+        target = pd.Series(data=['a', 'b', 'b'])
+        tree = DecisionTree()
+        tree.train(train_x, target)
+        node = tree.root
+        expected = {'Node': sys.getsizeof(node) + sys.getsizeof(node.branchs),
+                    'Branch': 3 * sys.getsizeof(node.branchs[0]),
+                    'Leaf': 3 * sys.getsizeof(node.branchs[0].child)}
+
+        usage = tree.memory_usage()
+
+        self.assertEqual(expected, usage)
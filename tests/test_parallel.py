@@ -0,0 +1,96 @@
+import unittest
+from concurrent.futures import Future
+import numpy as np
+from tree.desctree import DecisionTree
+from tree.matrix import encode
+from tree.parallel import MatrixPool, SharedArrays, attach_arrays, resolve_n_jobs
+from cart.carttree import CARTTree
+from tests.helpers import make_data
+
+
+COLUMNS = ('col1', 'col2', 'col3', 'col4')
+
+
+class TestSharedArrays(unittest.TestCase):
+    def test_whenAttached_returnsSameReadOnlyValues(self):
+        shared = SharedArrays([np.arange(5), None])
+        try:
+            (blocks, arrays) = attach_arrays(shared.specs)
+
+            self.assertEqual([0, 1, 2, 3, 4], list(arrays[0]))
+            self.assertIsNone(arrays[1])
+            self.assertFalse(arrays[0].flags.writeable)
+            del arrays
+            for block in blocks:
+                block.close()
+        finally:
+            shared.close()
+
+
+class TestResolveNJobs(unittest.TestCase):
+    def test_whenMinusOne_returnsAtLeastOne(self):
+        self.assertGreaterEqual(resolve_n_jobs(-1), 1)
+        self.assertEqual(1, resolve_n_jobs(None))
+
+
+class TestMatrixPool(unittest.TestCase):
+    def test_whenScoredOnWorkers_returnsSerialScoresInColumnOrder(self):
+        (data, target) = make_data(200, COLUMNS)
+        matrix = encode(data, target)
+        rows = matrix.all_rows()
+        cols = np.arange(matrix.n_columns)
+
+        for backend in ('process', 'thread'):
+            tree = CARTTree()
+            pool = MatrixPool(tree, matrix, 2, backend=backend, min_rows=0)
+            try:
+                scores = pool.score_columns('_best_split_value', rows, cols)
+            finally:
+                pool.close()
+
+            self.assertEqual([tree._best_split_value(matrix, rows, col) for col in cols], scores)
+
+
+class TestParallelTrain(unittest.TestCase):
+    def test_whenNJobs_trainsSameTreeAsSerial(self):
+        (data, target) = make_data(5000, COLUMNS)
+
+        for tree_class in (DecisionTree, CARTTree):
+            serial = tree_class()
+            serial.train(data, target)
+            parallel = tree_class(n_jobs=2)
+            parallel.train(data, target)
+
+            self.assertEqual(list(serial.predict_batch(data)), list(parallel.predict_batch(data)))
+            self.assertIsNone(parallel._pool)
+
+
+class TestParallelSubtrees(unittest.TestCase):
+    def test_whenParallelDepth_trainsSameTreeAsSerial(self):
+        (data, target) = make_data(600, COLUMNS)
+
+        for tree_class in (DecisionTree, CARTTree):
+            for params in ({}, {'max_features': 2, 'random_state': 5}):
+                serial = tree_class(**params)
+                serial.train(data, target)
+                for parallel_depth in (1, 2):
+                    parallel = tree_class(n_jobs=2, parallel_depth=parallel_depth, **params)
+                    parallel.train(data, target)
+
+                    self.assertEqual(serial.compile().n_nodes, parallel.compile().n_nodes)
+                    self.assertEqual(serial.to_python_source(), parallel.to_python_source())
+                    self.assertEqual(list(serial.predict_batch(data)), list(parallel.predict_batch(data)))
+
+    def test_whenThreadBackend_resolvesDeferredBranches(self):
+        (data, target) = make_data(300, COLUMNS)
+        tree = CARTTree(parallel_depth=1)
+        matrix = encode(data, target)
+        tree._pool = MatrixPool(tree, matrix, 2, backend='thread')
+        try:
+            root = tree._train_tree(matrix, matrix.all_rows(), np.ones(matrix.n_columns, dtype=bool), 0)
+            tree._pool.resolve_subtrees()
+        finally:
+            tree._pool.close()
+            tree._pool = None
+
+        self.assertFalse(any(isinstance(branch.child, Future) for branch in root.branchs))
@@ -0,0 +1,88 @@
+import unittest
+import numpy as np
+from tree.desctree import DecisionTree
+from tree.matrix import encode
+from tree.presort import presort
+from cart.carttree import CARTTree
+from tests.helpers import make_data
+
+
+COLUMNS = ('col1', 'col2', 'col3', 'col4')
+
+
+class TestPresortedMatrix(unittest.TestCase):
+    def test_whenChildIsFiltered_keepsItsRowsSorted(self):
+        (data, target) = make_data(200, COLUMNS, missing=0.1, noise=0.1)
+        matrix = encode(data, target)
+        rows = matrix.all_rows()
+        active = np.ones(4, dtype=bool)
+        node = presort(matrix, rows, active)
+        mask = matrix.columns[0] > 5
+
+        child = node.child(rows[mask], mask, active)
+
+        for col in (0, 3):
+            self.assertEqual(np.argsort(matrix.columns[col][rows[mask]], kind='stable').tolist(),
+                             child.orders[col].tolist())
+            self.assertTrue(all(np.array_equal(a, b) for (a, b) in
+                                zip(matrix.numeric_class_counts(col, child.rows),
+                                    child.numeric_class_counts(col, child.rows))))
+
+    def test_whenColumnIsInactive_dropsItsOrder(self):
+        (data, target) = make_data(50, COLUMNS, missing=0.1, noise=0.1)
+        matrix = encode(data, target)
+        rows = matrix.all_rows()
+        node = presort(matrix, rows, np.ones(4, dtype=bool))
+
+        child = node.child(rows, np.ones(50, dtype=bool), np.array([True, True, True, False]))
+
+        self.assertEqual([0, 2], sorted(child.orders))
+
+
+class TestPresortEngine(unittest.TestCase):
+    def assertSameTree(self, tree_class, data, target, **params):
+        sort = tree_class(**params)
+        sort.train(data, target)
+        presorted = tree_class(engine='presort', **params)
+        presorted.train(data, target)
+        self.assertEqual(sort.to_python_source(), presorted.to_python_source())
+
+    def test_whenClassifying_growsTheSameTreeAsSorting(self):
+        (data, target) = make_data(400, COLUMNS, missing=0.1, noise=0.1)
+
+        for tree_class in (DecisionTree, CARTTree):
+            self.assertSameTree(tree_class, data, target)
+            self.assertSameTree(tree_class, data, target, criterion='gini', min_samples_leaf=5)
+
+    def test_whenRegression_growsTheSameTreeAsSorting(self):
+        (data, target) = make_data(400, COLUMNS, missing=0.1, target='regression')
+
+        for criterion in ('mse', 'mae'):
+            self.assertSameTree(CARTTree, data, target, criterion=criterion, max_depth=6)
+
+    def test_whenRowsAreABootstrapSample_growsTheSameTreeAsSorting(self):
+        (data, target) = make_data(300, COLUMNS, missing=0.1, noise=0.1)
+        matrix = encode(data, target)
+        rows = np.random.default_rng(1).integers(0, 300, 300)
+
+        for tree_class in (DecisionTree, CARTTree):
+            sort = tree_class()
+            sort.train_encoded(matrix, rows)
+            presorted = tree_class(engine='presort')
+            presorted.train_encoded(matrix, rows)
+
+            self.assertEqual(sort.to_python_source(), presorted.to_python_source())
+
+    def test_whenTrainingInParallel_growsTheSameTreeAsSorting(self):
+        (data, target) = make_data(300, COLUMNS, missing=0.1, noise=0.1)
+
+        self.assertSameTree(CARTTree, data, target, n_jobs=2, parallel_depth=1)
+
+    def test_whenBinned_growsTheSameTreeAsSorting(self):
+        (data, target) = make_data(300, COLUMNS, missing=0.1, noise=0.1)
+
+        self.assertSameTree(DecisionTree, data, target, max_bins=16)
+
+    def test_whenUnknownEngine_raisesValueError(self):
+        self.assertRaises(ValueError, DecisionTree, engine='sliq')
+        self.assertRaises(ValueError, CARTTree, engine='sliq')
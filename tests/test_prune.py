@@ -0,0 +1,158 @@
+import unittest
+import numpy as np
+import pandas as pd
+from tree.desctree import DecisionTree
+from tree.leaf import Leaf
+from tree.node import Node
+from tree.prune import pruning_path
+from tree.traverse import iter_nodes
+from cart.carttree import CARTTree
+from tests.helpers import make_data
+
+
+def weakest_link_path(root):
+    """Return the pruning path found the textbook way: repeatedly collapse the
+    nodes with the smallest g(t), recomputing every subtree after each step"""
+    n_total = root.n_rows
+    collapsed = set()
+
+    def subtree(node):
+        if isinstance(node, Leaf) or id(node) in collapsed:
+            return node.n_rows / n_total * node.impurity, 1
+        costs = [subtree(branch.child) for branch in node.branchs]
+        return sum(c[0] for c in costs), sum(c[1] for c in costs)
+
+    def open_nodes(node):
+        if isinstance(node, Leaf) or id(node) in collapsed:
+            return []
+        return [node] + [n for branch in node.branchs for n in open_nodes(branch.child)]
+
+    alphas = [0.0]
+    impurities = [subtree(root)[0]]
+    alpha = 0.0
+    while open_nodes(root):
+        g = {}
+        for node in open_nodes(root):
+            (r, leaves) = subtree(node)
+            g[id(node)] = max((node.n_rows / n_total * node.impurity - r) / (leaves - 1), alpha)
+        alpha = min(g.values())
+        collapsed.update(key for (key, value) in g.items() if np.isclose(value, alpha))
+        if alpha > alphas[-1]:
+            alphas.append(alpha)
+            impurities.append(subtree(root)[0])
+        else:
+            impurities[-1] = subtree(root)[0]
+    return np.array(alphas), np.array(impurities)
+
+
+class TestPruningPath(unittest.TestCase):
+    def test_whenTrained_matchesRepeatedWeakestLinkPruning(self):
+        (data, target) = make_data(300, noise=0.2)
+
+        for tree in (DecisionTree(max_depth=4), CARTTree(max_depth=6)):
+            tree.train(data, target)
+
+            path = tree.cost_complexity_pruning_path()
+            (alphas, impurities) = weakest_link_path(tree.root)
+
+            self.assertTrue(np.allclose(alphas, path.ccp_alphas))
+            self.assertTrue(np.allclose(impurities, path.impurities))
+
+    def test_lastAlpha_prunesToTheRoot(self):
+        (data, target) = make_data(300, noise=0.2)
+        tree = CARTTree()
+        tree.train(data, target)
+        path = tree.cost_complexity_pruning_path()
+
+        tree.prune(path.ccp_alphas[-1])
+
+        self.assertIsInstance(tree.root, Leaf)
+        self.assertTrue(np.isclose(path.impurities[-1], tree.root.impurity))
+        self.assertTrue(np.all(np.diff(path.ccp_alphas) > 0))
+
+    def test_whenSingleLeaf_hasOnePoint(self):
+        data = pd.DataFrame(data={'col1': [1, 2]})
+        target = pd.Series(data=['a', 'a'])
+        tree = CARTTree()
+        tree.train(data, target)
+
+        path = tree.cost_complexity_pruning_path()
+
+        self.assertEqual([0.0], list(path.ccp_alphas))
+
+    def test_whenNoNodeStatistics_raisesValueError(self):
+        self.assertRaises(ValueError, pruning_path, Node(0.5, 'col1', [], None))
+
+
+class TestCcpAlpha(unittest.TestCase):
+    def test_whenCcpAlphaSet_prunesToTheTreeOfThatAlpha(self):
+        (data, target) = make_data(300, noise=0.2)
+        full = CARTTree()
+        full.train(data, target)
+        path = full.cost_complexity_pruning_path()
+        alpha = path.ccp_alphas[len(path.ccp_alphas) // 2]
+
+        pruned = CARTTree(ccp_alpha=alpha)
+        pruned.train(data, target)
+        leaves = [node for node in iter_nodes(pruned.root) if isinstance(node, Leaf)]
+        impurity = sum(leaf.n_rows / 300 * leaf.impurity for leaf in leaves)
+
+        self.assertLess(len(leaves), len([n for n in iter_nodes(full.root) if isinstance(n, Leaf)]))
+        self.assertTrue(np.isclose(path.impurities[len(path.ccp_alphas) // 2], impurity))
+
+    def test_whenStreamed_canBePruned(self):
+        (data, target) = make_data(300, noise=0.2)
+        table = data.assign(label=target)
+        tree = DecisionTree(ccp_alpha=0.01)
+
+        tree.train_chunks([table.iloc[:150], table.iloc[150:]], 'label')
+
+        self.assertEqual(tree.cost_complexity_pruning_path().ccp_alphas[0], 0.0)
+        self.assertFalse(tree.predict_batch(data).isna().any())
+
+
+class TestPrePruning(unittest.TestCase):
+    def test_minSamplesLeaf_keepsEveryLeafAtLeastThatLarge(self):
+        (data, target) = make_data(300, noise=0.2)
+
+        for tree_class in (DecisionTree, CARTTree):
+            tree = tree_class(min_samples_leaf=20)
+            tree.train(data, target)
+
+            sizes = [node.n_rows for node in iter_nodes(tree.root) if isinstance(node, Leaf)]
+
+            self.assertGreaterEqual(min(sizes), 20)
+
+    def test_whenMinSamplesLeafDefault_neverLeavesASideEmpty(self):
+        data = pd.DataFrame(data={'col1': [1.0, 1.0, 1.0, 1.0]})
+        target = pd.Series(data=['x', 'y', 'x', 'y'])
+
+        for tree_class in (DecisionTree, CARTTree):
+            tree = tree_class()
+            tree.train(data, target)
+
+            self.assertIsInstance(tree.root, Leaf)
+            self.assertEqual('x', tree.predict(pd.DataFrame(data={'col1': [2.0]})))
+
+    def test_minSamplesSplit_leavesSmallNodesUnsplit(self):
+        (data, target) = make_data(300, noise=0.2)
+
+        for tree_class in (DecisionTree, CARTTree):
+            tree = tree_class(min_samples_split=50)
+            tree.train(data, target)
+
+            split_sizes = [node.n_rows for node in iter_nodes(tree.root) if isinstance(node, Node)]
+
+            self.assertGreaterEqual(min(split_sizes), 50)
+
+    def test_minImpurityDecrease_skipsWeakSplits(self):
+        (data, target) = make_data(300, noise=0.2)
+
+        for tree_class in (DecisionTree, CARTTree):
+            full = tree_class()
+            full.train(data, target)
+            tree = tree_class(min_impurity_decrease=0.01)
+            tree.train(data, target)
+
+            self.assertLess(len(list(iter_nodes(tree.root))), len(list(iter_nodes(full.root))))
+            self.assertIsInstance(tree.root, Node)
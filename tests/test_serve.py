@@ -0,0 +1,115 @@
+import asyncio
+import threading
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from cart.carttree import CARTTree
+from serve.server import ModelServer, score_batch
+from tests.helpers import make_data
+
+
+def constant_tree(prediction):
+    tree = CARTTree()
+    tree.train(pd.DataFrame(data={'col1': [1.0, 2.0]}), pd.Series(data=[prediction, prediction]))
+    return tree
+
+
+class HeldModel:
+    """A model whose batches wait in the executor until released"""
+
+    def __init__(self, model):
+        self.model = model
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def predict_batch(self, data):
+        self.started.set()
+        self.release.wait(5)
+        return self.model.predict_batch(data)
+
+
+class TestModelServer(unittest.IsolatedAsyncioTestCase):
+    async def test_whenRequestsAreConcurrent_scoresThemInMicroBatches(self):
+        (data, target) = make_data(100, ('col1', 'col2'))
+        tree = CARTTree()
+        tree.train(data, target)
+        rows = [row for (_, row) in data.iloc[:10].iterrows()]
+
+        async with ModelServer(tree, max_batch_size=4, max_wait_ms=50) as server:
+            predictions = await asyncio.gather(*(server.predict(row) for row in rows))
+
+        self.assertEqual(list(tree.predict_batch(data.iloc[:10])), predictions)
+        self.assertEqual(3, server.n_batches)
+
+    async def test_whenBatchIsNotFull_scoresItAfterMaxWait(self):
+        (data, target) = make_data(100, ('col1', 'col2'))
+        tree = CARTTree()
+        tree.train(data, target)
+
+        async with ModelServer(tree, max_batch_size=100, max_wait_ms=1) as server:
+            prediction = await asyncio.wait_for(server.predict({'col1': 7.0, 'col2': 'x'}), 5)
+
+        self.assertEqual('a', prediction)
+        self.assertEqual(1, server.n_batches)
+
+    async def test_whenSwapped_finishesInFlightBatchesOnTheOldModel(self):
+        old = HeldModel(constant_tree('old'))
+        server = ModelServer(old, max_batch_size=1)
+        in_flight = asyncio.ensure_future(server.predict({'col1': 1.0}))
+        await asyncio.get_running_loop().run_in_executor(None, old.started.wait, 5)
+
+        server.swap(constant_tree('new'))
+        later = asyncio.ensure_future(server.predict({'col1': 1.0}))
+        await asyncio.sleep(0)
+        old.release.set()
+        await server.close()
+
+        self.assertEqual('old', await in_flight)
+        self.assertEqual('new', await later)
+
+    async def test_whenScoringFails_raisesToEveryCallerOfTheBatch(self):
+        (data, target) = make_data(100, ('col1', 'col2'))
+        tree = CARTTree()
+        tree.train(data, target)
+
+        async with ModelServer(tree, max_batch_size=2) as server:
+            results = await asyncio.gather(server.predict({'other': 1.0}), server.predict({'other': 2.0}),
+                                           return_exceptions=True)
+
+        self.assertTrue(all(isinstance(result, KeyError) for result in results))
+
+    async def test_whenClosed_scoresWaitingRowsAndRefusesNewOnes(self):
+        server = ModelServer(constant_tree('a'), max_batch_size=10, max_wait_ms=10000)
+        waiting = asyncio.ensure_future(server.predict({'col1': 1.0}))
+        await asyncio.sleep(0)
+
+        await server.close()
+
+        self.assertEqual('a', await waiting)
+        with self.assertRaises(RuntimeError):
+            await server.predict({'col1': 1.0})
+
+    async def test_whenProcessPool_scoresACompiledTree(self):
+        (data, target) = make_data(100, ('col1', 'col2'))
+        tree = CARTTree()
+        tree.train(data, target)
+        rows = [row for (_, row) in data.iloc[:6].iterrows()]
+
+        with ProcessPoolExecutor(1) as executor:
+            async with ModelServer(tree.compile(), max_batch_size=3, executor=executor) as server:
+                predictions = await asyncio.gather(*(server.predict(row) for row in rows))
+
+        self.assertEqual(list(tree.predict_batch(data.iloc[:6])), predictions)
+
+
+class TestScoreBatch(unittest.TestCase):
+    def test_whenTreeOrFlatTree_returnsOnePredictionPerRow(self):
+        (data, target) = make_data(100, ('col1', 'col2'))
+        tree = CARTTree()
+        tree.train(data, target)
+
+        self.assertEqual(list(target), score_batch(tree, data))
+        self.assertEqual(list(target), score_batch(tree.compile(), data))
+
+    def test_whenBatchSizeBelowOne_raisesValueError(self):
+        self.assertRaises(ValueError, ModelServer, constant_tree('a'), max_batch_size=0)
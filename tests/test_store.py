@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from ensemble.boosting import GradientBoostingRegressor
+from ensemble.forest import RandomForest
+from tree.desctree import DecisionTree
+from tree.store import MAGIC, load_flats
+from cart.carttree import CARTTree
+from tests.helpers import make_data
+
+
+class TestSaveLoad(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'model.bin')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_whenTreeSaved_loadedTreePredictsTheSame(self):
+        (data, target) = make_data(200)
+
+        for tree_class in (DecisionTree, CARTTree):
+            for mmap in (True, False):
+                tree = tree_class()
+                tree.train(data, target)
+
+                tree.save(self.path)
+                loaded = tree_class.load(self.path, mmap=mmap)
+
+                self.assertEqual(list(tree.predict_batch(data)), list(loaded.predict(data)))
+
+    def test_whenMemoryMapped_arraysAreReadOnly(self):
+        (data, target) = make_data(50)
+        tree = CARTTree()
+        tree.train(data, target)
+        tree.save(self.path)
+
+        loaded = CARTTree.load(self.path)
+
+        self.assertFalse(loaded.feature.flags.writeable)
+
+    def test_whenForestSaved_loadedForestPredictsTheSame(self):
+        (data, target) = make_data(200)
+        forest = RandomForest(n_trees=5, random_state=0)
+        forest.train(data, target)
+
+        forest.save(self.path)
+        loaded = RandomForest.load(self.path)
+
+        self.assertEqual(list(forest.predict_batch(data)), list(loaded.predict_batch(data)))
+
+    def test_whenBoostingSaved_loadedModelPredictsTheSame(self):
+        (data, _) = make_data(200)
+        target = data['col1'] * 1.5
+        model = GradientBoostingRegressor(n_rounds=5)
+        model.train(data, target)
+
+        model.save(self.path)
+        loaded = GradientBoostingRegressor.load(self.path)
+
+        self.assertTrue(np.allclose(model.predict_batch(data), loaded.predict_batch(data)))
+
+    def test_whenNotATreeFile_raises(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not a tree')
+
+        with self.assertRaises(ValueError):
+            load_flats(self.path)
+
+    def test_whenVersionUnknown_raises(self):
+        with open(self.path, 'wb') as f:
+            f.write(MAGIC + np.uint32(99).tobytes() + np.uint64(2).tobytes() + b'{}')
+
+        with self.assertRaises(ValueError):
+            load_flats(self.path)
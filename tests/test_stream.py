@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from tree.desctree import DecisionTree
+from tree.stream import ChunkEncoder, iter_chunks
+from cart.carttree import CARTTree
+from tests.helpers import make_data
+
+
+def chunked(table, size):
+    return [table.iloc[i:i + size] for i in range(0, table.shape[0], size)]
+
+
+class TestIterChunks(unittest.TestCase):
+    def test_whenOneShotIterator_raisesTypeError(self):
+        self.assertRaises(TypeError, iter_chunks, iter([make_data(5)[0]]))
+
+
+class TestChunkEncoder(unittest.TestCase):
+    def test_whenFitted_collectsCategoriesAndClassesOverAllChunks(self):
+        table = pd.DataFrame(data={'col1': [1.0, 2.0, 3.0, 4.0], 'col2': ['x', 'x', 'y', 'z'],
+                                   'target': ['a', 'a', 'b', 'c']})
+
+        encoder = ChunkEncoder('target').fit(chunked(table, 2))
+
+        self.assertEqual(['col1', 'col2'], encoder.names)
+        self.assertEqual(['x', 'y', 'z'], list(encoder.categories[1]))
+        self.assertEqual(['a', 'b', 'c'], list(encoder.classes))
+        self.assertEqual([0, 1, 2, 3], list(encoder.encode(table).columns[0]))
+
+    def test_whenSampled_keepsSampleSize(self):
+        (data, target) = make_data(500)
+        table = data.assign(target=target)
+
+        encoder = ChunkEncoder('target', max_bins=4, sample_size=50).fit(chunked(table, 100))
+
+        self.assertEqual(4, encoder.bins[0].n_bins)
+
+    def test_whenTargetHasMissingValues_raisesValueError(self):
+        (data, target) = make_data(20)
+        table = data.assign(target=target)
+        table.loc[5, 'target'] = None
+
+        self.assertRaises(ValueError, CARTTree(max_bins=4).train_chunks, chunked(table, 10), 'target')
+
+
+class TestTrainChunks(unittest.TestCase):
+    def test_whenChunked_matchesInMemoryBinnedTraining(self):
+        (data, target) = make_data(2000)
+        table = data.assign(target=target)
+        for tree_class in (DecisionTree, CARTTree):
+            in_memory = tree_class(max_bins=255, max_depth=4)
+            in_memory.train(data, target)
+            streamed = tree_class(max_bins=255, max_depth=4)
+
+            streamed.train_chunks(chunked(table, 300), 'target')
+
+            self.assertTrue(in_memory.predict_batch(data).equals(streamed.predict_batch(data)))
+
+    def test_whenCsvChunks_learnsTarget(self):
+        (data, target) = make_data(1000)
+        table = data.assign(target=target)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'train.csv')
+            table.to_csv(path, index=False)
+            tree = CARTTree(max_depth=3)
+
+            tree.train_chunks(lambda: pd.read_csv(path, chunksize=128), 'target', sample_size=200)
+
+        accuracy = (tree.predict_batch(data) == target).mean()
+        self.assertGreater(accuracy, 0.95)
+
+    def test_whenMseCriterion_matchesInMemoryBinnedTraining(self):
+        (data, target) = make_data(1000, target='regression')
+        table = data.assign(target=target)
+        in_memory = CARTTree(max_bins=255, max_depth=3, criterion='mse')
+        in_memory.train(data, target)
+        streamed = CARTTree(max_bins=255, max_depth=3, criterion='mse')
+
+        streamed.train_chunks(chunked(table, 300), 'target')
+
+        self.assertTrue(np.allclose(in_memory.predict_batch(data), streamed.predict_batch(data)))
@@ -1,4 +1,5 @@
 import unittest
+import numpy as np
 import pandas as pd
 from tree.util import *
 
@@ -26,6 +27,16 @@ class TestInformationGainCat(unittest.TestCase):
 
         self.assertEqual(expected, ig)
 
+    def test_whenAttributeHasMissingValues_leavesThemOutOfTheParts(self):
+        parent_ser = pd.Series(data=['a', 'b', 'a', 'b', 'a'])
+        attribute_ser = pd.Series(data=['x', np.nan, 'y', 'x', 'y'])
+        expected = 0.571
+
+        (ig, values) = information_gain_cat(parent_ser, attribute_ser)
+
+        self.assertEqual(expected, ig)
+        self.assertEqual(['x', 'y'], list(values))
+
 
 class TestInformationGainNum(unittest.TestCase):
     def test_whenTargetAndAttributeDefined_returnsCorrectInformationGain(self):
@@ -75,5 +86,87 @@ class TestInformationGain(unittest.TestCase):
         self.assertEqual(expected, ig)
 
 
+class TestEntropyCounts(unittest.TestCase):
+    def test_whenCountsPerRow_returnsEntropyOfEachRow(self):
+        counts = np.array([[1, 3], [2, 2], [0, 0]])
+        expected = [0.8113, 1.0, 0.0]
+
+        response = np.round(entropy_counts(counts), 4)
+
+        self.assertEqual(expected, list(response))
+
+
+class TestValueClassCounts(unittest.TestCase):
+    def test_whenUnsortedAttribute_returnsSortedValuesWithCounts(self):
+        attribute = np.array([3, 1, 3, 2])
+        codes = np.array([0, 1, 1, 0])
+        expected_counts = [[0, 1], [1, 0], [1, 1]]
+
+        (values, first_seen, counts) = value_class_counts(attribute, codes, 2)
+
+        self.assertEqual([1, 2, 3], list(values))
+        self.assertEqual([1, 3, 0], list(first_seen))
+        self.assertEqual(expected_counts, counts.tolist())
+
+
+class TestInformationGainNumTies(unittest.TestCase):
+    def test_whenThresholdsTie_returnsValueSeenFirst(self):
+        parent_ser = pd.Series(data=['a', 'b', 'b', 'a'])
+        attribute_ser = pd.Series(data=[3, 2, 1, 4])
+        expected = 3
+
+        (_, val) = information_gain_num(parent_ser, attribute_ser)
+
+        self.assertEqual(expected, val)
+
+    def test_whenThresholdsTieOnlyOnceRounded_returnsLaterValueWithHigherGain(self):
+        # value 3 is seen first and gains 0.42 rounded, value 4 gains just over 0.42
+        parent_ser = pd.Series(data=['a', 'c', 'a', 'b', 'a'])
+        attribute_ser = pd.Series(data=[0, 0, 5, 3, 4])
+        expected = 4
+
+        (_, val) = information_gain_num(parent_ser, attribute_ser)
+
+        self.assertEqual(expected, val)
+
+    def test_bestCandidate_scansCandidatesInOrderSeen(self):
+        scores = np.array([0.50004, 0.5, 0.50001, 0.3])
+        first_seen = np.array([3, 0, 1, 2])
+
+        self.assertEqual(0, best_candidate(scores, first_seen))
+        self.assertEqual(1, best_candidate(np.round(scores, 4), first_seen))
+        self.assertEqual(0, best_candidate(scores, first_seen, None))
+
+    def test_whenNoThresholdGainsInformation_returnsNone(self):
+        parent_ser = pd.Series(data=['a', 'b'])
+        attribute_ser = pd.Series(data=[1, 1])
+
+        (ig, val) = information_gain_num(parent_ser, attribute_ser)
+
+        self.assertEqual(0, ig)
+        self.assertIsNone(val)
+
+
+class TestNodeCounts(unittest.TestCase):
+    def test_whenParentGiven_matchesGainFromColumnTotals(self):
+        counts = np.array([[1, 0], [2, 1], [0, 3]])
+        parent = node_counts(np.array([3, 4]))
+
+        self.assertEqual(7, parent.n)
+        self.assertTrue(np.allclose(information_gain_thresholds(counts),
+                                    information_gain_thresholds(counts, parent)))
+        self.assertEqual(information_gain_categories(counts),
+                         information_gain_categories(counts, parent))
+
+    def test_whenSharedBetweenAttributes_matchesInformationGain(self):
+        target = pd.Series(data=['a', 'b', 'b', 'a', 'b'])
+        attribute = pd.Series(data=['x', 'y', 'y', 'x', 'x'])
+        parent = target_counts(target)
+
+        self.assertEqual([2, 3], list(parent.counts))
+        self.assertEqual(information_gain(target, attribute)[0],
+                         information_gain(target, attribute, parent)[0])
+
+
 if __name__ == '__main__':
     unittest.main()
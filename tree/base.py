@@ -0,0 +1,253 @@
+from time import perf_counter
+from typing import Callable, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from tree.node import Node
+from tree.leaf import Leaf
+from tree.matrix import TrainingMatrix, encode
+from tree.traverse import predict_rows, memory_usage
+from tree.flat import FlatTree, compile_tree
+from tree.codegen import to_python_source, compile_predictor
+from tree.cache import PredictionCache, CacheStats
+from tree.parallel import MatrixPool
+from tree.store import save_tree, load_tree
+from tree.instrument import make_hooks, n_candidates
+from tree.stream import Chunks, DEFAULT_MAX_BINS, SAMPLE_SIZE, train_streaming
+from tree.prune import PruningPath, pruning_path, prune_tree
+from tree.presort import child_matrix
+from tree.util import NodeCounts
+
+
+class BaseTree:
+    """Training driver, prediction, caching and storage shared by DecisionTree
+    and CARTTree.
+
+    Subclasses set the parameters these methods read in __init__ and grow
+    the tree in _train_tree, scoring one column of a node with the method
+    named by score_method, which returns its score, value, type and missing
+    part.
+    """
+
+    score_method = None
+
+    def train(self, data: pd.DataFrame, target: pd.Series):
+        self.train_encoded(encode(data, target, self.max_bins))
+
+    def train_chunks(self, chunks: Chunks, target: str, sample_size: int = SAMPLE_SIZE):
+        """Train on a table too large for memory, read as chunks in one pass per level.
+
+        chunks is a function returning a new iterable of DataFrames per pass,
+        e.g. lambda: pd.read_csv(path, chunksize=100000), or a list of them;
+        each DataFrame holds the feature columns and the target column.
+        Numeric columns are binned into max_bins bins (255 when unset).
+        """
+        self._predictor = None
+        self._cache = None
+        self.root = train_streaming(self, chunks, target, self.max_bins or DEFAULT_MAX_BINS,
+                                    sample_size)
+        if self.ccp_alpha > 0:
+            self.prune(self.ccp_alpha)
+
+    def train_encoded(self, matrix: TrainingMatrix, rows: np.ndarray = None):
+        """Train on an already encoded matrix, restricted to rows when given"""
+        if rows is None:
+            rows = matrix.all_rows()
+        active = np.ones(matrix.n_columns, dtype=bool)
+        self._criterion.check_target(matrix)
+        self._rng = np.random.default_rng(self.random_state)
+        self._n_total = rows.shape[0]
+        self._predictor = None
+        self._cache = None
+        self._hooks = make_hooks(self.callbacks)
+        if self._hooks is not None:
+            self._hooks.on_train_begin(self, matrix)
+        if self.n_jobs is not None and self.n_jobs != 1:
+            self._pool = MatrixPool(self, matrix, self.n_jobs)
+        try:
+            self.root = self._train_tree(matrix, rows, active, 0)
+            if self._pool is not None:
+                self._pool.resolve_subtrees()
+        finally:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool = None
+        if self.ccp_alpha > 0:
+            self.prune(self.ccp_alpha)
+        if self._hooks is not None:
+            self._hooks.on_train_end(self)
+            self._hooks = None
+
+    def cost_complexity_pruning_path(self) -> PruningPath:
+        """Return the effective alphas of minimal cost-complexity pruning of the
+        trained tree and the total leaf impurity of the tree pruned at each.
+
+        Every alpha of the path prunes to a distinct subtree, so training
+        with ccp_alpha set to each gives the whole sequence of pruned trees.
+        """
+        return pruning_path(self.root)
+
+    def prune(self, ccp_alpha: float):
+        """Collapse every subtree whose effective alpha is at most ccp_alpha into a leaf.
+
+        Subtrees are collapsed in place, so the prediction cache and the
+        compiled predictor are dropped here rather than when the root changes.
+        """
+        self.root = prune_tree(self.root, ccp_alpha)
+        self._cache = None
+        self._predictor = None
+
+    def _train_tree(self, matrix: TrainingMatrix, rows: np.ndarray, active: np.ndarray,
+                    depth: int):
+        raise NotImplementedError
+
+    def _make_leaf(self, matrix: TrainingMatrix, rows: np.ndarray, stats: NodeCounts) -> Leaf:
+        leaf = Leaf(matrix.prediction(rows), rows.shape[0], float(stats.impurity))
+        if self._hooks is not None:
+            self._hooks.on_leaf(leaf.prediction)
+        return leaf
+
+    def _train_child(self, matrix: TrainingMatrix, rows: np.ndarray, active: np.ndarray,
+                     depth: int, mask: np.ndarray):
+        """Return the subtree over rows, the rows of the parent's where mask is
+        set, or a future of it built on the worker pool when training with
+        n_jobs and depth is parallel_depth.
+
+        With max_features, every child samples columns from a generator of
+        its own, seeded from its parent's, so a subtree is the same whether
+        it is built here or on a worker.
+        """
+        seed = None if self.max_features is None else self._rng.integers(2**63)
+        if self._pool is not None and depth == self.parallel_depth and rows.shape[0] > 0:
+            return self._pool.submit_subtree(rows, active, depth, seed)
+        matrix = child_matrix(matrix, rows, mask, active)
+        if seed is None:
+            return self._train_tree(matrix, rows, active, depth)
+        (rng, self._rng) = (self._rng, np.random.default_rng(seed))
+        try:
+            return self._train_tree(matrix, rows, active, depth)
+        finally:
+            self._rng = rng
+
+    def should_predict(self, matrix: TrainingMatrix, rows: np.ndarray, active: np.ndarray,
+                       depth: int) -> bool:
+        """Return true if any of stop criterias are reached else false"""
+        n_rows = rows.shape[0] if rows is not None else matrix.n_rows
+        return depth == self.max_depth or n_rows < self.min_samples_split or \
+               matrix.contains_one_type(rows) or not active.any()
+
+    def _decreases_enough(self, decrease: float, parent: NodeCounts) -> bool:
+        """Return whether decrease, weighted by the share of the training rows
+        parent describes, reaches min_impurity_decrease"""
+        n_total = self._n_total or parent.n
+        return decrease * parent.n / n_total >= self.min_impurity_decrease
+
+    def _score_columns(self, matrix: TrainingMatrix, rows: np.ndarray, cols: np.ndarray,
+                       parent: NodeCounts = None) -> List[Tuple]:
+        """Return the score_method scores of every column in cols, on the worker
+        pool when training with n_jobs"""
+        if self._pool is not None:
+            return self._pool.score_columns(self.score_method, rows, cols, parent)
+        if self._hooks is not None:
+            return self._score_columns_traced(matrix, rows, cols, parent)
+        score_column = getattr(self, self.score_method)
+        return [score_column(matrix, rows, col, parent) for col in cols]
+
+    def _score_columns_traced(self, matrix: TrainingMatrix, rows: np.ndarray, cols: np.ndarray,
+                              parent: NodeCounts = None) -> List[Tuple]:
+        """Return the score_method scores of every column in cols, reporting each
+        column's time and candidate count to the training callbacks"""
+        score_column = getattr(self, self.score_method)
+        scores = []
+        for col in cols:
+            start = perf_counter()
+            score = score_column(matrix, rows, col, parent)
+            seconds = perf_counter() - start
+            self._hooks.on_column_scored(matrix.names[col], n_candidates(matrix.columns[col][rows]),
+                                         score[0], seconds)
+            scores.append(score)
+        return scores
+
+    def predict(self, data: pd.DataFrame) -> Union[float, str]:
+        """Predict target for the first row of data, from the prediction cache
+        when the tree was made with a cache_size"""
+        if self.cache_size:
+            return self._prediction_cache().predict(data)
+        return self._predict(data, self.root)
+
+    def cache_stats(self) -> CacheStats:
+        """Return the hits, misses, evictions and size of the prediction cache
+        since the tree was last trained"""
+        if self._cache is None:
+            return CacheStats(0, 0, 0, 0, self.cache_size or 0)
+        return self._cache.stats()
+
+    def _prediction_cache(self) -> PredictionCache:
+        """Return the prediction cache of the trained tree, emptied whenever the
+        tree is retrained or pruned"""
+        if self._cache is None or self._cache.root is not self.root:
+            self._cache = PredictionCache(self.root, self.cache_size)
+        return self._cache
+
+    def predict_batch(self, data: pd.DataFrame) -> pd.Series:
+        """Return a Series with one prediction per row of data"""
+        return predict_rows(self.root, data)
+
+    def memory_usage(self) -> dict:
+        """Return bytes held by the tree's Node, Branch and Leaf objects, per kind"""
+        return memory_usage(self.root)
+
+    def compile(self) -> FlatTree:
+        """Return the trained tree flattened into a FlatTree for fast batch inference"""
+        return compile_tree(self.root)
+
+    def to_python_source(self, name: str = 'predict_row') -> str:
+        """Return the source of a function name(row) predicting as the trained tree
+        for a row given as a mapping from attribute name to value"""
+        return to_python_source(self.root, name)
+
+    def compile_predictor(self) -> Callable:
+        """Return the trained tree compiled into a single-row prediction function,
+        built once per trained tree"""
+        if self._predictor is None or self._predictor[0] is not self.root:
+            self._predictor = (self.root, compile_predictor(self.root))
+        return self._predictor[1]
+
+    def save(self, path: str):
+        """Write the trained tree to path in the binary format of tree.store"""
+        save_tree(path, self.compile(), {'model': type(self).__name__})
+
+    @staticmethod
+    def load(path: str, mmap: bool = True) -> FlatTree:
+        """Return the tree saved at path as a FlatTree, memory-mapped unless mmap is False"""
+        return load_tree(path, mmap)
+
+    def _predict(self, data: pd.DataFrame, node: Node) -> Union[float, str]:
+        """Recursively follows conditions in branchs to find
+        prediction, starting at node"""
+
+        if isinstance(node, Leaf):
+            return node.prediction
+
+        val = data[node.attr_name].iloc[0]
+        if node.missing is not None and pd.isna(val):
+            return self._predict(data, node.branchs[node.missing].child)
+
+        for branch in node.branchs:
+            if branch.exp(val, branch.val):
+                return self._predict(data, branch.child)
+
+        return None
+
+    def print_tree(self) -> None:
+        self._print_tree(self.root)
+
+    def _print_tree(self, node: Node) -> None:
+        if isinstance(node, Leaf):
+            print(f'Pred: {node.prediction}')
+            return
+        for branch in node.branchs:
+            print(f'{node.attr_name} -- {branch.val} {branch.exp.__name__} --> ', end='')
+            self._print_tree(branch.child)
+            print('------')
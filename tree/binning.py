@@ -0,0 +1,66 @@
+from typing import Tuple
+
+import numpy as np
+
+
+class Bins:
+    """Bin boundaries of a quantized numeric column.
+
+    Bin b holds the values from lower[b] up to and including upper[b]; both
+    are values seen in the data, so thresholds on bins are thresholds on
+    the raw values too.
+    """
+
+    def __init__(self, lower: np.ndarray, upper: np.ndarray):
+        self.lower = lower
+        self.upper = upper
+
+    @property
+    def n_bins(self) -> int:
+        return self.lower.shape[0]
+
+
+def bin_dtype(max_bins: int) -> type:
+    """Return the code type for max_bins bins plus the missing value code"""
+    return np.uint8 if max_bins < 256 else np.uint16
+
+
+def bin_column(values: np.ndarray, max_bins: int) -> Tuple[np.ndarray, Bins]:
+    """Return bin codes of values and their Bins, using at most max_bins quantile bins.
+
+    Columns with no more than max_bins distinct values get one bin per value.
+    NaN values are left out of the bins and get code n_bins.
+    """
+    known = ~np.isnan(values)
+    sorted_vals = np.sort(values[known])
+    lower = np.unique(sorted_vals)
+    if lower.shape[0] > max_bins:
+        positions = (np.arange(max_bins) * sorted_vals.shape[0]) // max_bins
+        lower = np.unique(sorted_vals[positions])
+
+    upper_pos = np.searchsorted(sorted_vals, lower[1:], side='left') - 1
+    upper = np.r_[sorted_vals[upper_pos], sorted_vals[-1:]]
+
+    codes = np.searchsorted(lower, values, side='right') - 1
+    codes[~known] = lower.shape[0]
+    return codes.astype(bin_dtype(max_bins)), Bins(lower, upper)
+
+
+def bin_class_counts(codes: np.ndarray, y: np.ndarray, n_bins: int, n_classes: int) \
+        -> Tuple[np.ndarray, np.ndarray]:
+    """Return the non-empty bins among codes and the class counts of y in each"""
+    counts = np.bincount(codes.astype(np.intp) * n_classes + y, minlength=n_bins * n_classes)
+    counts = counts.reshape(-1, n_classes)
+    present = np.flatnonzero(counts.sum(axis=1))
+    return present, counts[present]
+
+
+def bin_target_sums(codes: np.ndarray, y_values: np.ndarray, n_bins: int) \
+        -> Tuple[np.ndarray, np.ndarray]:
+    """Return the non-empty bins among codes and the count, sum and sum of
+    squares of y_values in each"""
+    sums = np.column_stack([np.bincount(codes, minlength=n_bins),
+                            np.bincount(codes, weights=y_values, minlength=n_bins),
+                            np.bincount(codes, weights=y_values * y_values, minlength=n_bins)])
+    present = np.flatnonzero(sums[:, 0])
+    return present, sums[present]
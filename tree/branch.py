@@ -1,4 +1,6 @@
 class Branch:
+    __slots__ = ('val', 'exp', 'child')
+
     def __init__(self, val, exp, child=None):
         self.val = val
         self.exp = exp
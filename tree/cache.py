@@ -0,0 +1,68 @@
+from collections import OrderedDict
+from typing import List, NamedTuple
+
+import pandas as pd
+
+from tree.node import Node
+from tree.traverse import iter_nodes, predict_values
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    max_size: int
+
+
+def tree_attributes(root) -> List[str]:
+    """Return the names of the attributes the nodes under root test, sorted"""
+    return sorted({node.attr_name for node in iter_nodes(root) if isinstance(node, Node)})
+
+
+class PredictionCache:
+    """Bounded LRU cache of the single-row predictions of one trained tree.
+
+    Rows are keyed on their values of the attributes the tree tests, so rows
+    differing only in attributes the tree ignores share an entry. Missing
+    values (None or NaN) are keyed alike. When max_size entries are held,
+    the least recently used one is evicted. Rows with unhashable values are
+    predicted without caching.
+    """
+
+    def __init__(self, root, max_size: int):
+        self.root = root
+        self.max_size = max_size
+        self.attributes = tree_attributes(root)
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def predict(self, data: pd.DataFrame):
+        """Return the prediction for the first row of data"""
+        values = {attr: data[attr].to_numpy()[0] for attr in self.attributes}
+        key = tuple(None if isinstance(val, float) and val != val else val
+                    for val in values.values())
+        entries = self._entries
+        try:
+            prediction = entries[key]
+        except KeyError:
+            pass
+        except TypeError:
+            return predict_values(self.root, values)
+        else:
+            entries.move_to_end(key)
+            self.hits += 1
+            return prediction
+
+        self.misses += 1
+        prediction = predict_values(self.root, values)
+        entries[key] = prediction
+        if len(entries) > self.max_size:
+            entries.popitem(last=False)
+            self.evictions += 1
+        return prediction
+
+    def stats(self) -> CacheStats:
+        return CacheStats(self.hits, self.misses, self.evictions, len(self._entries), self.max_size)
@@ -0,0 +1,120 @@
+import math
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from tree.leaf import Leaf
+
+
+OPERATORS = {'lt': '<', 'gte': '>=', 'eq': '==', 'lte': '<=', 'gt': '>', 'neq': '!=',
+             'isin': 'in', 'notin': 'not in'}
+# Python allows 100 nested blocks per function; subtrees deeper than this
+# many levels into a function are emitted as functions of their own.
+MAX_NESTING = 48
+
+
+class _Source:
+    """Accumulates the functions and constants of a generated predictor"""
+
+    def __init__(self):
+        self.functions: List[List[str]] = []
+        self.constants: Dict[str, Any] = {}
+        self._constant_names: Dict[int, str] = {}
+
+    def literal(self, value) -> str:
+        """Return Python source evaluating to value: a literal for plain numbers,
+        strings, booleans and None, else the name of a module constant"""
+        if isinstance(value, np.generic):
+            value = value.item()
+        if value is None or isinstance(value, (bool, int, str)) or \
+                (isinstance(value, float) and math.isfinite(value)):
+            return repr(value)
+        if id(value) not in self._constant_names:
+            name = f'_c{len(self.constants)}'
+            self._constant_names[id(value)] = name
+            self.constants[name] = value
+        return self._constant_names[id(value)]
+
+    def function(self, name: str, root) -> None:
+        lines = [f'def {name}(row):']
+        self.functions.append(lines)
+        self._emit(lines, root, 1)
+
+    def _emit(self, lines: List[str], node, depth: int) -> None:
+        pad = '    ' * depth
+        if node is None:
+            lines.append(f'{pad}return None')
+            return
+        if isinstance(node, Leaf):
+            lines.append(f'{pad}return {self.literal(node.prediction)}')
+            return
+        if depth > MAX_NESTING:
+            name = f'_node{len(self.functions)}'
+            self.function(name, node)
+            lines.append(f'{pad}return {name}(row)')
+            return
+
+        x = f'x{depth}'
+        lines.append(f'{pad}{x} = row[{self.literal(node.attr_name)}]')
+        keyword = 'if'
+        if node.missing is not None:
+            lines.append(f'{pad}if {x} is None or {x} != {x}:')
+            self._emit(lines, node.branchs[node.missing].child, depth + 1)
+            keyword = 'elif'
+        for branch in node.branchs:
+            operator = OPERATORS[branch.exp.__name__]
+            lines.append(f'{pad}{keyword} {x} {operator} {self.literal(branch.val)}:')
+            self._emit(lines, branch.child, depth + 1)
+            keyword = 'elif'
+        lines.append(f'{pad}return None')
+
+    def source(self) -> str:
+        return '\n\n\n'.join('\n'.join(lines) for lines in reversed(self.functions)) + '\n'
+
+
+def _constant_source(value) -> str:
+    """Return Python source evaluating to value, listing sets in sorted order
+    so the source of a tree does not change between runs"""
+    if isinstance(value, float):
+        return f"float('{value!r}')"
+    if isinstance(value, frozenset):
+        items = [item.item() if isinstance(item, np.generic) else item for item in value]
+        return f'frozenset({sorted(items, key=repr)!r})'
+    return repr(value)
+
+
+def _generate(root, name: str) -> _Source:
+    if root is None:
+        raise ValueError('Tree is not trained')
+    source = _Source()
+    source.function(name, root)
+    return source
+
+
+def to_python_source(root, name: str = 'predict_row') -> str:
+    """Return the source of a function name(row) predicting as the tree under root.
+
+    row is any mapping from attribute name to value, such as a dict or a
+    Series. The tree becomes nested if/elif statements, one per node, so a
+    prediction is a handful of comparisons with no calls or lookups of
+    branch objects. Rows match the first branch whose condition holds, rows
+    missing a node's attribute (None or NaN) follow its missing branch,
+    and rows matching no branch are predicted as None, as in single-row
+    prediction. Split values and predictions that have no Python literal,
+    such as category sets, are referenced as module constants _c0, _c1,
+    ..., which compile_predictor binds.
+    """
+    source = _generate(root, name)
+    if not source.constants:
+        return source.source()
+    lines = [f'{constant} = {_constant_source(value)}'
+             for (constant, value) in source.constants.items()]
+    return '\n'.join(lines) + '\n\n\n' + source.source()
+
+
+def compile_predictor(root) -> Callable:
+    """Return the function of to_python_source compiled, with its constants bound"""
+    source = _generate(root, 'predict_row')
+    namespace = dict(source.constants)
+    exec(compile(source.source(), '<tree>', 'exec'), namespace)
+    return namespace['predict_row']
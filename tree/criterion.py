@@ -0,0 +1,396 @@
+from typing import Tuple, Union
+
+import numpy as np
+
+from tree.util import NodeCounts, entropy_counts, gini_counts, sse_sums, category_target_groups, \
+    value_target_groups
+
+
+def cuts(starts: np.ndarray, n: int, inclusive: bool) -> np.ndarray:
+    """Return the positions thresholds cut n grouped rows at, given the
+    position each group starts at: after each group when inclusive, before
+    it otherwise"""
+    return np.r_[starts[1:], n] if inclusive else starts
+
+
+class Criterion:
+    """Impurity measure scoring many candidate splits of a node at once.
+
+    A criterion works on per-candidate statistics of the rows at a node,
+    gathered by column_stats: class counts per value (statistic 'counts'),
+    count, sum and sum of squares of a numeric target per value ('sums'),
+    or the target values grouped by value ('values'). Additive statistics
+    are cumulated over sorted values for thresholds and subtracted from
+    the node's own statistics for the other side of every split.
+
+    Subclasses implement impurity for each row of statistics; scores of
+    splits are impurities of the parts weighted by their row counts. With
+    decimals set, part impurities are rounded before weighting and scores
+    are compared rounded, as the trees always did for entropy and gini.
+
+    Rows missing the column's value are left out of the per-value
+    statistics; missing_stats returns theirs, and the *_missing variants
+    score every split twice, with the missing rows joined to either side,
+    and report the better side per candidate. Ties send them to the first.
+
+    A table of class counts per value grows with values x classes, which
+    is quadratic in rows for a target with a class per row such as a float
+    one. Criteria whose impurity is a function of a sum of per-class terms
+    define term and term_impurity and set max_dense_classes; past that many
+    classes, numeric columns are described by the node's class codes
+    grouped by value instead, as (codes, group starts), and thresholds are
+    scored from one pass over them.
+    """
+
+    name = None
+    statistic = 'counts'
+    decimals = 4
+    max_dense_classes = None
+
+    def impurity(self, stats: np.ndarray) -> np.ndarray:
+        """Return the impurity of each row of stats"""
+        raise NotImplementedError
+
+    def term(self, counts: np.ndarray) -> np.ndarray:
+        """Return the term each class count adds to a part's impurity"""
+        raise NotImplementedError
+
+    def term_impurity(self, terms: np.ndarray, n: np.ndarray) -> np.ndarray:
+        """Return the impurity of parts of n rows whose count terms sum to terms"""
+        raise NotImplementedError
+
+    def count(self, stats: np.ndarray) -> np.ndarray:
+        """Return the number of rows each row of stats describes"""
+        return stats.sum(axis=-1)
+
+    def sizes(self, stats: np.ndarray) -> np.ndarray:
+        """Return the number of rows of each candidate of column_stats"""
+        if isinstance(stats, tuple):
+            (codes, starts) = stats
+            return np.diff(np.r_[starts, codes.shape[0]])
+        return self.count(stats)
+
+    def threshold_sizes(self, stats: np.ndarray, inclusive: bool, parent: NodeCounts,
+                        missing_left: np.ndarray = None) -> np.ndarray:
+        """Return the number of rows left of each threshold of thresholds, with
+        the missing rows where missing_left"""
+        sizes = self.sizes(stats)
+        left = sizes.cumsum()
+        if not inclusive:
+            left -= sizes
+        if missing_left is not None:
+            left = left + np.where(missing_left, parent.n - sizes.sum(), 0)
+        return left
+
+    def category_order(self, stats: np.ndarray) -> Union[np.ndarray, None]:
+        """Return the order of the rows of stats by mean target, or None when
+        the criterion has none.
+
+        With two classes, or a numeric target under squared error, the best
+        split of categories into two sets sends a prefix of this order left
+        (Fisher 1958, Breiman et al. 1984), so thresholds over stats in this
+        order find it in one scan.
+        """
+        if self.statistic != 'counts' or stats.shape[1] != 2:
+            return None
+        return np.argsort(stats[:, 1] / self.count(stats), kind='stable')
+
+    def round(self, scores):
+        if self.decimals is None:
+            return scores
+        return np.round(scores, self.decimals)
+
+    def check_target(self, matrix):
+        """Raise ValueError when the target of matrix is not one the criterion scores"""
+        if self.statistic != 'counts' and matrix.y_values is None:
+            raise ValueError(f'Criterion {self.name} needs a numeric target')
+
+    def node_stats(self, matrix, rows: np.ndarray) -> NodeCounts:
+        """Return the statistics, row count and impurity of rows of matrix"""
+        stats = matrix.class_counts(rows)
+        return NodeCounts(stats, self.count(stats), self.impurity(stats))
+
+    def column_stats(self, matrix, col: int, rows: np.ndarray) \
+            -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return candidate values of column col over rows, the row each is first
+        seen at and their statistics"""
+        if matrix.is_numeric[col]:
+            if self.max_dense_classes is not None and matrix.n_classes > self.max_dense_classes:
+                return matrix.numeric_class_groups(col, rows)
+            return matrix.numeric_class_counts(col, rows)
+        (codes, counts) = matrix.category_class_counts(col, rows)
+        return codes, np.arange(codes.shape[0]), counts
+
+    def missing_stats(self, matrix, col: int, rows: np.ndarray, stats: np.ndarray,
+                      parent: NodeCounts) -> Union[np.ndarray, None]:
+        """Return the statistics of the rows missing column col, None when there
+        are none, given the statistics column_stats returned for the others"""
+        if isinstance(stats, tuple):
+            missing = parent.counts - np.bincount(stats[0], minlength=parent.counts.shape[0])
+        else:
+            missing = parent.counts - stats.sum(axis=0)
+        return missing if self.count(missing) > 0 else None
+
+    def split_impurity(self, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+        """Return the impurity of splitting rows into left and right, for each
+        pair of rows of left and right, weighted by part sizes"""
+        n_left = self.count(left)
+        n_right = self.count(right)
+        n = n_left + n_right
+        tot = (n_left/n) * self.round(self.impurity(left))
+        tot += (n_right/n) * self.round(self.impurity(right))
+        return tot
+
+    def thresholds(self, stats: np.ndarray, inclusive: bool, parent: NodeCounts = None) \
+            -> np.ndarray:
+        """Return the split impurity of thresholding at each row of stats, sorted
+        by value, with the value itself on the left when inclusive"""
+        if isinstance(stats, tuple):
+            (codes, starts) = stats
+            total = np.bincount(codes) if parent is None else parent.counts
+            return self.grouped_thresholds(codes, cuts(starts, codes.shape[0], inclusive),
+                                           np.zeros_like(total), total)
+        left = stats.cumsum(axis=0)
+        total = left[-1].copy() if parent is None else parent.counts
+        if not inclusive:
+            left -= stats
+        return self.split_impurity(left, total - left)
+
+    def thresholds_missing(self, stats: np.ndarray, inclusive: bool, parent: NodeCounts,
+                           missing: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the split impurity of thresholding at each row of stats as
+        thresholds does, when the rows described by missing join the better
+        side, and whether that is the left side"""
+        if isinstance(stats, tuple):
+            (codes, starts) = stats
+            at = cuts(starts, codes.shape[0], inclusive)
+            missing_right = self.grouped_thresholds(codes, at, np.zeros_like(missing), parent.counts)
+            missing_left = self.grouped_thresholds(codes, at, missing, parent.counts - missing)
+            go_left = missing_left <= missing_right
+            return np.where(go_left, missing_left, missing_right), go_left
+        left = stats.cumsum(axis=0)
+        if not inclusive:
+            left -= stats
+        missing_right = self.split_impurity(left, parent.counts - left)
+        left += missing
+        missing_left = self.split_impurity(left, parent.counts - left)
+        go_left = missing_left <= missing_right
+        return np.where(go_left, missing_left, missing_right), go_left
+
+    def grouped_thresholds(self, codes: np.ndarray, at: np.ndarray, left: np.ndarray,
+                           right: np.ndarray) -> np.ndarray:
+        """Return the split impurity of cutting codes, the class codes of rows
+        sorted by value, before each position of at, when the rows before a
+        cut join class counts left and the rows after it are all that remain
+        of class counts right.
+
+        A row moving left adds term(l + 1) - term(l) to the left part's sum
+        of terms and takes term(r) - term(r - 1) from the right one's, for
+        l and r the rows of its class already on either side; prefix sums of
+        these deltas score every cut in O(rows + classes) memory.
+        """
+        sizes = np.bincount(codes, minlength=left.shape[0])
+        seen = np.empty(codes.shape[0], dtype=np.intp)
+        seen[np.argsort(codes, kind='stable')] = (np.arange(codes.shape[0]) -
+                                                   np.repeat(np.cumsum(sizes) - sizes, sizes))
+        (l, r) = (left[codes] + seen, right[codes] - seen)
+        left_terms = self.term(left).sum() + np.r_[0, np.cumsum(self.term(l + 1) - self.term(l))][at]
+        right_terms = self.term(right).sum() - np.r_[0, np.cumsum(self.term(r) - self.term(r - 1))][at]
+        n_left = left.sum() + at
+        n_right = right.sum() - at
+        n = n_left + n_right
+        tot = (n_left/n) * self.round(self.term_impurity(left_terms, n_left))
+        tot += (n_right/n) * self.round(self.term_impurity(right_terms, n_right))
+        return tot
+
+    def categories(self, stats: np.ndarray, parent: NodeCounts = None) -> np.ndarray:
+        """Return the split impurity of separating each row of stats from the rest"""
+        total = stats.sum(axis=0) if parent is None else parent.counts
+        return self.split_impurity(stats, total - stats)
+
+    def categories_missing(self, stats: np.ndarray, parent: NodeCounts, missing: np.ndarray) \
+            -> Tuple[np.ndarray, np.ndarray]:
+        """Return the split impurity of separating each row of stats from the
+        rest as categories does, when the rows described by missing join the
+        better side, and whether that is the row's side"""
+        missing_rest = self.split_impurity(stats, parent.counts - stats)
+        joined = stats + missing
+        missing_joined = self.split_impurity(joined, parent.counts - joined)
+        go_joined = missing_joined <= missing_rest
+        return np.where(go_joined, missing_joined, missing_rest), go_joined
+
+    def multiway(self, stats: np.ndarray, parent: NodeCounts = None) -> float:
+        """Return the split impurity of one part per row of stats"""
+        m = self.count(stats)
+        return ((m/m.sum()) * self.round(self.impurity(stats))).sum()
+
+    def multiway_missing(self, stats: np.ndarray, parent: NodeCounts, missing: np.ndarray) \
+            -> np.ndarray:
+        """Return the split impurity of one part per row of stats when the rows
+        described by missing join part j, for every j"""
+        n = self.count(parent.counts)
+        own = (self.count(stats)/n) * self.round(self.impurity(stats))
+        joined = stats + missing
+        return own.sum() - own + (self.count(joined)/n) * self.round(self.impurity(joined))
+
+    def gain(self, split_impurity, parent: NodeCounts):
+        """Return the decrease from the parent's impurity to split_impurity"""
+        return self.round(parent.impurity) - split_impurity
+
+
+class Entropy(Criterion):
+    name = 'entropy'
+    max_dense_classes = 64
+
+    def impurity(self, stats):
+        return entropy_counts(stats)
+
+    def term(self, counts):
+        counts = np.asarray(counts, dtype=float)
+        return counts * np.log2(np.maximum(counts, 1))
+
+    def term_impurity(self, terms, n):
+        return np.log2(np.maximum(n, 1)) - terms / np.maximum(n, 1)
+
+
+class Gini(Criterion):
+    name = 'gini'
+    max_dense_classes = 64
+
+    def impurity(self, stats):
+        return gini_counts(stats)
+
+    def term(self, counts):
+        counts = np.asarray(counts, dtype=float)
+        return counts * counts
+
+    def term_impurity(self, terms, n):
+        return 1 - terms / np.maximum(n, 1)**2
+
+
+class MSE(Criterion):
+    """Mean squared error of a numeric target around the part means"""
+
+    name = 'mse'
+    statistic = 'sums'
+    decimals = None
+
+    def impurity(self, stats):
+        return sse_sums(stats) / np.maximum(stats[..., 0], 1)
+
+    def count(self, stats):
+        return stats[..., 0]
+
+    def node_stats(self, matrix, rows):
+        stats = matrix.target_sums(rows)
+        return NodeCounts(stats, stats[0], self.impurity(stats))
+
+    def column_stats(self, matrix, col, rows):
+        if matrix.is_numeric[col]:
+            return matrix.numeric_target_sums(col, rows)
+        (codes, sums) = matrix.category_target_sums(col, rows)
+        return codes, np.arange(codes.shape[0]), sums
+
+    def category_order(self, stats):
+        return np.argsort(stats[:, 1] / stats[:, 0], kind='stable')
+
+    def split_impurity(self, left, right):
+        return (sse_sums(left) + sse_sums(right)) / (left[:, 0] + right[:, 0])
+
+    def multiway(self, stats, parent=None):
+        return sse_sums(stats).sum() / stats[:, 0].sum()
+
+
+def absolute_deviation(y: np.ndarray) -> float:
+    """Return the sum of absolute deviations of y from its median"""
+    if y.shape[0] == 0:
+        return 0.0
+    return np.abs(y - np.median(y)).sum()
+
+
+class MAE(Criterion):
+    """Mean absolute error of a numeric target around the part medians.
+
+    Medians are not additive, so statistics are the target values grouped
+    by candidate value as (values, group starts) and every candidate costs
+    a pass over the node's rows: O(rows x candidates) per column.
+    """
+
+    name = 'mae'
+    statistic = 'values'
+    decimals = None
+
+    def node_stats(self, matrix, rows):
+        y = matrix.y_values[rows]
+        return NodeCounts(y, y.shape[0], absolute_deviation(y) / max(y.shape[0], 1))
+
+    def column_stats(self, matrix, col, rows):
+        if matrix.is_numeric[col]:
+            return matrix.numeric_target_groups(col, rows)
+        (codes, groups) = matrix.category_target_groups(col, rows)
+        return codes, np.arange(codes.shape[0]), groups
+
+    def missing_stats(self, matrix, col, rows, stats, parent):
+        y = matrix.y_values[rows[matrix.missing_rows(col, rows)]]
+        return y if y.shape[0] > 0 else None
+
+    def thresholds(self, stats, inclusive, parent=None):
+        (y, starts) = stats
+        return np.array([absolute_deviation(y[:cut]) + absolute_deviation(y[cut:])
+                         for cut in cuts(starts, y.shape[0], inclusive)]) / y.shape[0]
+
+    def thresholds_missing(self, stats, inclusive, parent, missing):
+        (y, starts) = stats
+        at = cuts(starts, y.shape[0], inclusive)
+        n = y.shape[0] + missing.shape[0]
+        missing_right = np.array([absolute_deviation(y[:cut]) +
+                                  absolute_deviation(np.r_[y[cut:], missing])
+                                  for cut in at]) / n
+        missing_left = np.array([absolute_deviation(np.r_[y[:cut], missing]) +
+                                 absolute_deviation(y[cut:])
+                                 for cut in at]) / n
+        go_left = missing_left <= missing_right
+        return np.where(go_left, missing_left, missing_right), go_left
+
+    def categories(self, stats, parent=None):
+        (y, starts) = stats
+        ends = np.r_[starts[1:], y.shape[0]]
+        return np.array([absolute_deviation(y[start:end]) +
+                         absolute_deviation(np.r_[y[:start], y[end:]])
+                         for (start, end) in zip(starts, ends)]) / y.shape[0]
+
+    def categories_missing(self, stats, parent, missing):
+        (y, starts) = stats
+        ends = np.r_[starts[1:], y.shape[0]]
+        n = y.shape[0] + missing.shape[0]
+        missing_rest = np.array([absolute_deviation(y[start:end]) +
+                                 absolute_deviation(np.r_[y[:start], y[end:], missing])
+                                 for (start, end) in zip(starts, ends)]) / n
+        missing_joined = np.array([absolute_deviation(np.r_[y[start:end], missing]) +
+                                   absolute_deviation(np.r_[y[:start], y[end:]])
+                                   for (start, end) in zip(starts, ends)]) / n
+        go_joined = missing_joined <= missing_rest
+        return np.where(go_joined, missing_joined, missing_rest), go_joined
+
+    def multiway(self, stats, parent=None):
+        (y, starts) = stats
+        return sum(absolute_deviation(part) for part in np.split(y, starts[1:])) / y.shape[0]
+
+    def multiway_missing(self, stats, parent, missing):
+        (y, starts) = stats
+        own = np.array([absolute_deviation(part) for part in np.split(y, starts[1:])])
+        joined = np.array([absolute_deviation(np.r_[part, missing])
+                           for part in np.split(y, starts[1:])])
+        return (own.sum() - own + joined) / (y.shape[0] + missing.shape[0])
+
+
+CRITERIA = {criterion.name: criterion for criterion in (Entropy(), Gini(), MSE(), MAE())}
+
+
+def get_criterion(criterion: Union[str, Criterion]) -> Criterion:
+    """Return the Criterion named criterion, or criterion itself when it is one"""
+    if isinstance(criterion, Criterion):
+        return criterion
+    if criterion not in CRITERIA:
+        raise ValueError(f'Unknown criterion: {criterion}')
+    return CRITERIA[criterion]
@@ -1,147 +1,260 @@
+from concurrent.futures import Future
+from time import perf_counter
+
+import numpy as np
+
 if __name__ == '__main__':
+    from base import BaseTree
     from node import Node
     from branch import Branch
-    from leaf import Leaf
+    from matrix import encode
+    from criterion import get_criterion
+    from presort import node_matrix
     from util import *
 else:
+    from tree.base import BaseTree
     from tree.node import Node
     from tree.branch import Branch
-    from tree.leaf import Leaf
+    from tree.matrix import encode
+    from tree.criterion import get_criterion
+    from tree.presort import node_matrix
     from tree.util import *
 
 
-def make_prediction(target):
-    if target.dtype == 'O':
-        return predict_categorical(target)
-    else:
-        return predict_regression(target)
-
-
-def predict_categorical(target):
-    target_freq = target.value_counts().sort_values(ascending=False)
-    return target_freq.index[0]
-
-
-def predict_regression(target):
-    return target.mean()
-
-
-def contains_one_type(target):
-    return target.unique().shape[0] == 1
-
+class DecisionTree(BaseTree):
+    score_method = '_score_column'
 
-def is_empty(data):
-    return data.empty
-
-"""
-1. Add Gini impurity as option
-2. Add min. purity per split option
-3. Add pruning after training
-"""
-
-
-class DecisionTree:
-
-    def __init__(self, max_depth=None):
+    def __init__(self, max_depth=None, max_bins=None, n_jobs=None, parallel_depth=0,
+                 max_features=None, random_state=None, callbacks=None, criterion='entropy',
+                 min_samples_split=2, min_samples_leaf=1, min_impurity_decrease=0.0,
+                 ccp_alpha=0.0, categorical_splits='multiway', engine='sort', cache_size=None):
+        if categorical_splits not in ('multiway', 'ordered'):
+            raise ValueError(f'Unknown categorical_splits: {categorical_splits}')
+        if engine not in ('sort', 'presort'):
+            raise ValueError(f'Unknown engine: {engine}')
         self.max_depth = max_depth
+        self.categorical_splits = categorical_splits
+        self.engine = engine
+        self.cache_size = cache_size
+        self.min_samples_split = min_samples_split
+        self.min_samples_leaf = min_samples_leaf
+        self.min_impurity_decrease = min_impurity_decrease
+        self.ccp_alpha = ccp_alpha
+        self.max_bins = max_bins
+        self.n_jobs = n_jobs
+        self.parallel_depth = parallel_depth
+        self.max_features = max_features
+        self.random_state = random_state
         self.root = None
-
-    def train(self, data, target):
-        self.root = self._train_tree(data, target, 0)
-
-    def _train_tree(self, data, target, depth):
-        if is_empty(target):
+        self.callbacks = callbacks
+        self.criterion = criterion
+        self._criterion = get_criterion(criterion)
+        self._pool = None
+        self._hooks = None
+        self._n_total = None
+        self._predictor = None
+        self._cache = None
+        self._rng = np.random.default_rng(random_state)
+
+    def _train_tree(self, matrix, rows, active, depth):
+        """Recursively build subtrees over the row indices rows of matrix.
+
+        active marks the columns still available for splitting; a column is
+        cleared for the subtrees below the node that splits on it. With the
+        'presort' engine, numeric columns are sorted once at the node
+        training starts from and children keep their order, see
+        tree.presort; 'sort' sorts them at every node.
+        """
+        if rows.shape[0] == 0:
             return None
-        if self.should_predict(data, target, depth):
-            pred = make_prediction(target)
-            return Leaf(pred)
-
-        (ig, attr_name, vals, is_numeric) = self._best_split_value(data, target)
-
-        best_attr = data.pop(attr_name)
-
-        target_splits = self._make_split(target, best_attr, vals, is_numeric)
-
-        node = Node(ig, attr_name)
-
-        for split in target_splits:
-            branch = Branch(split['val'], split['exp'])
-            child = self._train_tree(data, split['data'], depth - 1)
+        hooks = self._hooks
+        if hooks is not None:
+            hooks.on_node_begin(depth, rows.shape[0])
+        stats = self._criterion.node_stats(matrix, rows)
+        if self.should_predict(matrix, rows, active, depth):
+            return self._make_leaf(matrix, rows, stats)
+
+        matrix = node_matrix(matrix, rows, active, self.engine)
+        if hooks is not None:
+            start = perf_counter()
+        (ig, col, vals, is_numeric, missing) = self._find_split(matrix, rows, active, stats)
+
+        if col is None:
+            return self._make_leaf(matrix, rows, stats)
+
+        active = active.copy()
+        active[col] = False
+
+        if hooks is not None:
+            scored = perf_counter()
+        row_splits = self._split_rows(matrix, rows, col, vals, is_numeric, missing)
+        if missing is None:
+            missing = largest_split(row_splits)
+        if hooks is not None:
+            value = row_splits[0]['val'] if is_numeric else [split['val'] for split in row_splits]
+            hooks.on_split(matrix.names[col], value, ig, scored - start, perf_counter() - scored)
+
+        branchs = []
+        missing_branch = None
+
+        for (part, split) in enumerate(row_splits):
+            child = self._train_child(matrix, split['rows'], active, depth + 1, split['mask'])
 
             if child is None:
                 continue
 
-            branch.child = child
-            node.add_branch(branch)
-
-        return node
+            if part == missing:
+                missing_branch = len(branchs)
+            branch = Branch(split['val'], split['exp'], child)
+            if isinstance(child, Future):
+                self._pool.defer(branch)
+            branchs.append(branch)
 
-    def should_predict(self, data, target, depth):
-        return depth == self.max_depth or \
-               contains_one_type(target) or is_empty(data)
+        return Node(ig, matrix.names[col], branchs, missing_branch, rows.shape[0],
+                    float(stats.impurity), matrix.prediction(rows))
 
     def _best_split_value(self, data, target):
+        """Return information gain, name, value and type of the best attribute in data"""
+        matrix = encode(data, target)
+        active = np.ones(matrix.n_columns, dtype=bool)
+        (ig, col, val, is_numeric, _) = self._find_split(matrix, matrix.all_rows(), active)
+        if col is None:
+            return ig, None, None, None
+        if isinstance(val, frozenset):
+            val = category_set(matrix.categories[col], val)
+        elif not is_numeric:
+            val = matrix.categories[col][val]
+        elif matrix.bins[col] is not None:
+            val = matrix.bins[col].lower[val]
+        return ig, matrix.names[col], val, is_numeric
+
+    def _find_split(self, matrix, rows, active, parent=None):
+        """Return information gain, column index, value and type of the best active
+        column, and the part of the split missing values go to
+
+        The value is a threshold (a bin code for binned columns) for numeric
+        columns and the array of category codes present in rows for
+        categorical ones, or the frozenset of codes of the left branch
+        under ordered categorical splits. The part is an index into the
+        splits of _split_rows, or None when no row at the node misses the
+        value.
+        parent holds the node statistics of rows when the caller has them.
+        Splits decreasing the impurity by less than min_impurity_decrease,
+        weighted by the node's share of the training rows, are not made.
+        """
         best_ig = 0
         best_val = None
         best_is_numeric = None
-        best_arg_name = None
+        best_col = None
+        best_missing = None
 
-        columns = data.columns
+        cols = sample_columns(np.flatnonzero(active), self.max_features, self._rng)
+        if parent is None:
+            parent = self._criterion.node_stats(matrix, rows)
 
-        for col in columns:
-            attribute = data[col]
-            (ig, val, is_numeric) = information_gain(target, attribute)
+        for (col, (ig, val, is_numeric, missing)) in zip(cols, self._score_columns(matrix, rows, cols, parent)):
             if ig > best_ig:
                 best_ig = ig
                 best_val = val
                 best_is_numeric = is_numeric
-                best_arg_name = col
-
-        return best_ig, best_arg_name, best_val, best_is_numeric
-
-    def _make_split(self, target, attribute, val, is_numeric):
-        """
-          val: int representing best split value for numeric attribute IF is_numeric = true
-          val: list representing all values in categorical attribute IF is_numeric = false
+                best_col = col
+                best_missing = missing
+
+        if best_col is not None and self.min_impurity_decrease > 0 and \
+                not self._decreases_enough(best_ig, parent):
+            return 0, None, None, None, None
+        return best_ig, best_col, best_val, best_is_numeric, best_missing
+
+    def _score_column(self, matrix, rows, col, parent=None):
+        """Return gain, best value and type of column col over rows, and the
+        part missing values go to
+
+        Gain is the decrease of the tree's criterion, information gain for
+        entropy. parent holds the node statistics of rows when the caller
+        has them, so they are not recounted per column. Rows missing the
+        value join the part of the split that scores best with them. Splits
+        leaving fewer than min_samples_leaf rows in a part score no gain.
+
+        With categorical_splits 'ordered', categorical columns are split in
+        two sets of categories, scanned as thresholds over the categories
+        ordered by the criterion's category_order when it has one.
         """
-        data_splits = []
+        criterion = self._criterion
+        is_numeric = matrix.is_numeric[col]
+        if parent is None:
+            parent = criterion.node_stats(matrix, rows)
+        (values, first_seen, stats) = criterion.column_stats(matrix, col, rows)
+        if values.shape[0] == 0:
+            return 0, None, is_numeric, None
+        missing = None
+        if matrix.has_missing[col]:
+            missing = criterion.missing_stats(matrix, col, rows, stats, parent)
+
+        order = None
+        if not is_numeric and self.categorical_splits == 'ordered':
+            order = criterion.category_order(stats)
+            if order is not None:
+                (values, first_seen, stats) = (values[order], np.arange(order.shape[0]), stats[order])
+
+        if is_numeric or order is not None:
+            inclusive = order is not None
+            missing_left = None
+            if missing is None:
+                impurities = criterion.thresholds(stats, inclusive, parent)
+            else:
+                (impurities, missing_left) = criterion.thresholds_missing(stats, inclusive, parent, missing)
+            gains = criterion.gain(impurities, parent)
+            left = criterion.threshold_sizes(stats, inclusive, parent, missing_left)
+            gains[np.minimum(left, parent.n - left) < max(self.min_samples_leaf, 1)] = -np.inf
+            best = best_candidate(gains, first_seen, criterion.decimals)
+            part = None if missing is None else int(not missing_left[best])
+            val = values[best] if order is None else frozenset(values[:best + 1].tolist())
+            return criterion.round(gains[best]), val, is_numeric, part
+
+        sizes = criterion.sizes(stats)
+        if missing is None:
+            if sizes.min() < self.min_samples_leaf:
+                return 0, None, False, None
+            gain = criterion.gain(criterion.multiway(stats, parent), parent)
+            return criterion.round(gain), values, False, None
+        impurities = criterion.multiway_missing(stats, parent, missing)
+        min_samples_leaf = max(self.min_samples_leaf, 1)
+        small = sizes < min_samples_leaf
+        joined = sizes + (parent.n - sizes.sum())
+        impurities[(small.sum() - small > 0) | (joined < min_samples_leaf)] = np.inf
+        part = int(np.argmin(impurities))
+        return criterion.round(criterion.gain(impurities[part], parent)), values, False, part
+
+    def _split_rows(self, matrix, rows, col, val, is_numeric, missing=None):
+        """Split rows on column col, in two at a threshold for numeric columns
+        and one part per category otherwise, adding the rows missing the value
+        to split number missing"""
+        attribute = matrix.columns[col][rows]
 
         if is_numeric:
-            target_lt = ljoin_filter(target, attribute, val, lt)
-            target_gte = ljoin_filter(target, attribute, val, gte)
-            data_splits.append({'data': target_lt, 'exp': lt, 'val': val})
-            data_splits.append({'data': target_gte, 'exp': gte, 'val': val})
+            threshold = val
+            if matrix.bins[col] is not None:
+                threshold = matrix.bins[col].lower[val]
+            exps = [lt, gte]
+            masks = [lt(attribute, val), gte(attribute, val)]
+            vals = [threshold, threshold]
+
+        elif isinstance(val, frozenset):
+            cats = category_set(matrix.categories[col], val)
+            exps = [isin, notin]
+            masks = [isin(attribute, val), notin(attribute, val)]
+            vals = [cats, cats]
 
         else:
-            for cat in val:
-                target_split = ljoin_filter(target, attribute, cat, eq)
-                data_splits.append({'data': target_split, 'exp': eq, 'val': cat})
-
-        return data_splits
-
-    def predict(self, data):
-        return self._predict(data, self.root)
-
-    def _predict(self, data, node):
-        if isinstance(node, Leaf):
-            return node.prediction
-
-        val = data[node.attr_name].iloc[0]
-
-        for branch in node.branchs:
-            if branch.exp(val, branch.val):
-                return self._predict(data, branch.child)
-
-        return None
-
-    def print_tree(self):
-        self._print_tree(self.root)
-
-    def _print_tree(self, node):
-        if isinstance(node, Leaf):
-            print(f'Pred: {node.prediction}')
-            return
-        for branch in node.branchs:
-            print(f'{node.attr_name} -- {branch.val} {branch.exp.__name__} --> ', end='')
-            self._print_tree(branch.child)
-            print('------')
+            exps = [eq] * len(val)
+            masks = [eq(attribute, code) for code in val]
+            vals = [matrix.categories[col][code] for code in val]
+
+        if matrix.has_missing[col]:
+            is_missing = matrix.missing_rows(col, rows)
+            masks = [mask & ~is_missing for mask in masks]
+            if missing is not None:
+                masks[missing] |= is_missing
+
+        return [{'rows': rows[mask], 'mask': mask, 'exp': exp, 'val': branch_val}
+                for (exp, mask, branch_val) in zip(exps, masks, vals)]
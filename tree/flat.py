@@ -0,0 +1,299 @@
+import copy
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from tree.leaf import Leaf
+
+
+OP_CODES = {'lt': 0, 'gte': 1, 'eq': 2, 'lte': 3, 'gt': 4, 'neq': 5, 'isin': 6, 'notin': 7}
+NO_NODE = -1
+
+
+class FlatTree:
+    """A trained tree flattened into parallel NumPy arrays.
+
+    Node arrays (one entry per node, the root is node 0):
+    feature -- index into features of the attribute tested, -1 for leaves
+    first_branch, n_branches -- the node's slice of the branch arrays
+    leaf -- index into values of the leaf prediction, -1 for inner nodes
+    missing -- the node's branch, counted from its first, that rows missing
+               the feature follow, -1 for none
+
+    Branch arrays (one entry per branch, grouped by node in branch order):
+    op -- OP_CODES code of the branch expression
+    value -- numeric threshold, category code for eq/neq, or offset into
+             bits of the branch's category set for isin/notin
+    child -- node index of the branch child
+
+    bits holds the category sets of isin/notin branches as bitsets over
+    the codes of their feature's categories, one bit per category, padded
+    to whole bytes; a set's byte k holds codes 8k to 8k + 7, lowest first.
+
+    Features tested with eq/neq/isin/notin are encoded at predict time as
+    codes into categories[feature]; values never seen in training get code
+    -1 and missing values stay NaN.
+    """
+
+    def __init__(self, features: List[str], categories: List[np.ndarray],
+                 feature: np.ndarray, first_branch: np.ndarray, n_branches: np.ndarray,
+                 leaf: np.ndarray, op: np.ndarray, value: np.ndarray, child: np.ndarray,
+                 values: np.ndarray, missing: np.ndarray = None, bits: np.ndarray = None):
+        self.features = features
+        self.categories = categories
+        self.feature = feature
+        self.first_branch = first_branch
+        self.n_branches = n_branches
+        self.leaf = leaf
+        self.op = op
+        self.value = value
+        self.child = child
+        self.values = values
+        if missing is None:
+            missing = np.full(feature.shape[0], NO_NODE, dtype=np.int32)
+        self.missing = missing
+        self.bits = bits if bits is not None else np.zeros(0, dtype=np.uint8)
+
+    @property
+    def n_nodes(self) -> int:
+        return self.feature.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.feature, self.first_branch, self.n_branches, self.leaf,
+                  self.op, self.value, self.child, self.values, self.missing, self.bits)
+        return sum(a.nbytes for a in arrays)
+
+    def encode(self, data: pd.DataFrame) -> np.ndarray:
+        """Return data as a float64 matrix with one column per feature"""
+        return encode_features(data, self.features, self.categories)
+
+    def with_features(self, features: List[str], categories: List[np.ndarray]) -> 'FlatTree':
+        """Return this tree reading its features from a wider feature table.
+
+        features and categories must include this tree's own features and
+        categories; feature indices and category codes are remapped into them.
+        """
+        if not self.features:
+            return copy.copy(self)
+        index = {name: i for (i, name) in enumerate(features)}
+        feature_map = np.array([index[name] for name in self.features], dtype=np.int32)
+        feature = np.where(self.feature >= 0, feature_map[np.maximum(self.feature, 0)], NO_NODE)
+
+        value = self.value.copy()
+        branch_feature = np.repeat(self.feature, self.n_branches)
+        is_category = (self.op == OP_CODES['eq']) | (self.op == OP_CODES['neq'])
+        is_set = self.op >= OP_CODES['isin']
+        code_maps = [None] * len(self.categories)
+        for (f, own) in enumerate(self.categories):
+            if own is None:
+                continue
+            code_maps[f] = pd.Index(categories[feature_map[f]]).get_indexer(own)
+            sel = is_category & (branch_feature == f)
+            value[sel] = code_maps[f][value[sel].astype(np.intp)]
+
+        bits = []
+        offset = 0
+        for b in np.flatnonzero(is_set):
+            f = branch_feature[b]
+            own = unpack_codes(self.bits, int(self.value[b]), self.categories[f].shape[0])
+            packed = pack_codes(code_maps[f][own], categories[feature_map[f]].shape[0])
+            value[b] = offset
+            offset += packed.shape[0]
+            bits.append(packed)
+        bits = np.concatenate(bits) if bits else np.zeros(0, dtype=np.uint8)
+
+        return FlatTree(list(features), list(categories), feature.astype(np.int32),
+                        self.first_branch, self.n_branches, self.leaf, self.op, value,
+                        self.child, self.values, self.missing, bits)
+
+    def predict_leaves(self, X: np.ndarray) -> np.ndarray:
+        """Return the leaf index reached by every row of encoded X, -1 where no
+        branch matched.
+
+        All rows advance one level per step; at a node rows with a NaN
+        feature take the node's missing branch, then each branch slot is
+        tested for the rows not yet matched, in branch order.
+        """
+        n = X.shape[0]
+        leaves = np.full(n, NO_NODE, dtype=np.int32)
+        rows = np.arange(n)
+        node = np.zeros(n, dtype=np.int32)
+
+        while rows.shape[0] > 0:
+            is_leaf = self.feature[node] < 0
+            leaves[rows[is_leaf]] = self.leaf[node[is_leaf]]
+            rows = rows[~is_leaf]
+            node = node[~is_leaf]
+
+            x = X[rows, self.feature[node]]
+            first = self.first_branch[node]
+            count = self.n_branches[node]
+            nxt = np.full(rows.shape[0], NO_NODE, dtype=np.int32)
+
+            default = self.missing[node]
+            to_default = np.flatnonzero((default >= 0) & np.isnan(x))
+            nxt[to_default] = self.child[first[to_default] + default[to_default]]
+
+            for k in range(int(count.max(initial=0))):
+                open_rows = np.flatnonzero((nxt == NO_NODE) & (count > k))
+                b = first[open_rows] + k
+                hit = _compare(self.op[b], x[open_rows], self.value[b], self.bits)
+                nxt[open_rows[hit]] = self.child[b[hit]]
+
+            matched = nxt != NO_NODE
+            rows = rows[matched]
+            node = nxt[matched]
+
+        return leaves
+
+    def predict(self, data: pd.DataFrame) -> pd.Series:
+        """Return one prediction per row of data, None where no branch matched"""
+        leaves = self.predict_leaves(self.encode(data))
+        predictions = np.full(leaves.shape[0], None, dtype=object)
+        found = leaves != NO_NODE
+        predictions[found] = self.values[leaves[found]]
+        return pd.Series(data=predictions, index=data.index).infer_objects()
+
+
+def encode_features(data: pd.DataFrame, features: List[str], categories: List[np.ndarray]) \
+        -> np.ndarray:
+    """Return data as a float64 matrix with one column per feature, categorical
+    features as codes into their categories and missing values as NaN"""
+    X = np.empty((data.shape[0], len(features)), dtype=np.float64, order='F')
+    for (i, name) in enumerate(features):
+        if categories[i] is None:
+            X[:, i] = data[name].to_numpy(dtype=np.float64)
+        else:
+            X[:, i] = pd.Index(categories[i]).get_indexer(data[name])
+            X[data[name].isna().to_numpy(), i] = np.nan
+    return X
+
+
+def merge_features(flats: List[FlatTree]) -> Tuple[List[str], List[np.ndarray]]:
+    """Return the union of the features and categories of flats"""
+    features = []
+    categories = {}
+    for flat in flats:
+        for (name, own) in zip(flat.features, flat.categories):
+            if name not in categories:
+                features.append(name)
+                categories[name] = None
+            if own is not None:
+                merged = categories[name] if categories[name] is not None else {}
+                merged.update(dict.fromkeys(own))
+                categories[name] = merged
+    return features, [np.array(list(categories[name]), dtype=object)
+                      if categories[name] is not None else None for name in features]
+
+
+def pack_codes(codes: np.ndarray, n_categories: int) -> np.ndarray:
+    """Return the bitset of codes among n_categories categories"""
+    members = np.zeros(max(-(-n_categories // 8), 1) * 8, dtype=bool)
+    members[codes] = True
+    return np.packbits(members, bitorder='little')
+
+
+def unpack_codes(bits: np.ndarray, offset: int, n_categories: int) -> np.ndarray:
+    """Return the codes in the bitset of n_categories categories at offset of bits"""
+    width = max(-(-n_categories // 8), 1)
+    members = np.unpackbits(bits[offset:offset + width], bitorder='little')
+    return np.flatnonzero(members[:n_categories])
+
+
+def _in_bits(bits: np.ndarray, offset: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """Return whether each code x is in the bitset at offset of bits; unseen
+    (-1) and missing (NaN) codes are in none"""
+    known = x >= 0
+    codes = np.where(known, x, 0).astype(np.intp)
+    byte = bits[offset.astype(np.intp) + (codes >> 3)]
+    return known & ((byte >> (codes & 7)) & 1).astype(bool)
+
+
+def _compare(op: np.ndarray, x: np.ndarray, value: np.ndarray, bits: np.ndarray) -> np.ndarray:
+    hit = np.select([op == 0, op == 1, op == 2, op == 3, op == 4],
+                    [x < value, x >= value, x == value, x <= value, x > value],
+                    x != value)
+    is_set = np.flatnonzero(op >= OP_CODES['isin'])
+    if is_set.shape[0] > 0:
+        member = _in_bits(bits, value[is_set], x[is_set])
+        hit[is_set] = np.where(op[is_set] == OP_CODES['isin'], member, ~member)
+    return hit
+
+
+def compile_tree(root) -> FlatTree:
+    """Return the tree under root flattened into a FlatTree"""
+    features: List[str] = []
+    feature_ids: Dict[str, int] = {}
+    category_ids: List[Dict] = []
+
+    feature, first_branch, n_branches, leaf, missing = [], [], [], [], []
+    op, value, child = [], [], []
+    sets = []
+    values = []
+
+    nodes = [root]
+    i = 0
+    while i < len(nodes):
+        node = nodes[i]
+        i += 1
+        if isinstance(node, Leaf):
+            feature.append(NO_NODE)
+            first_branch.append(len(op))
+            n_branches.append(0)
+            leaf.append(len(values))
+            missing.append(NO_NODE)
+            values.append(node.prediction)
+            continue
+
+        if node.attr_name not in feature_ids:
+            feature_ids[node.attr_name] = len(features)
+            features.append(node.attr_name)
+            category_ids.append({})
+        f = feature_ids[node.attr_name]
+
+        feature.append(f)
+        first_branch.append(len(op))
+        n_branches.append(len(node.branchs))
+        leaf.append(NO_NODE)
+        missing.append(node.missing if node.missing is not None else NO_NODE)
+
+        for branch in node.branchs:
+            code = OP_CODES[branch.exp.__name__]
+            if code in (OP_CODES['eq'], OP_CODES['neq']):
+                val = category_ids[f].setdefault(branch.val, len(category_ids[f]))
+            elif code >= OP_CODES['isin']:
+                ids = category_ids[f]
+                sets.append((len(op), f, [ids.setdefault(cat, len(ids)) for cat in branch.val]))
+                val = 0
+            else:
+                val = branch.val
+            op.append(code)
+            value.append(val)
+            child.append(len(nodes))
+            nodes.append(branch.child)
+
+    categories = [np.array(list(ids), dtype=object) if ids else None for ids in category_ids]
+    bits = []
+    offset = 0
+    for (b, f, codes) in sets:
+        packed = pack_codes(np.array(codes, dtype=np.intp), len(category_ids[f]))
+        value[b] = offset
+        offset += packed.shape[0]
+        bits.append(packed)
+
+    return FlatTree(features, categories,
+                    np.array(feature, dtype=np.int32), np.array(first_branch, dtype=np.int32),
+                    np.array(n_branches, dtype=np.int32), np.array(leaf, dtype=np.int32),
+                    np.array(op, dtype=np.int8), np.array(value, dtype=np.float64),
+                    np.array(child, dtype=np.int32), _leaf_values(values),
+                    np.array(missing, dtype=np.int32),
+                    np.concatenate(bits) if bits else np.zeros(0, dtype=np.uint8))
+
+
+def _leaf_values(values: list) -> np.ndarray:
+    arr = np.array(values)
+    if arr.dtype.kind not in 'biuf':
+        arr = np.array(values, dtype=object)
+    return arr
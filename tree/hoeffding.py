@@ -0,0 +1,280 @@
+from typing import List, Union
+
+import numpy as np
+import pandas as pd
+
+from tree.binning import bin_column
+from tree.branch import Branch
+from tree.flat import FlatTree, compile_tree
+from tree.leaf import Leaf
+from tree.matrix import is_numeric_column
+from tree.node import Node
+from tree.traverse import predict_rows
+from tree.util import information_gain_categories, information_gain_thresholds, \
+    best_candidate, node_counts, lt, gte, eq
+
+
+class HoeffdingLeaf(Leaf):
+    """Leaf that keeps running class counts of the rows reaching it.
+
+    counts[col] holds class counts per bin (numeric columns) or category
+    code (categorical columns) of the rows seen since the leaf was made;
+    class_totals also includes the parent's counts for the leaf's side of
+    the split, so the leaf predicts sensibly before it has seen rows.
+    """
+    __slots__ = ('depth', 'active', 'counts', 'class_totals', 'n_seen', 'n_at_attempt')
+
+    def __init__(self, depth: int, active: np.ndarray, class_totals: np.ndarray, classes: list):
+        super().__init__(None)
+        self.depth = depth
+        self.active = active
+        self.counts = [None] * active.shape[0]
+        self.class_totals = class_totals
+        self.n_seen = 0
+        self.n_at_attempt = 0
+        self.update_prediction(classes)
+
+    def update_prediction(self, classes: list):
+        if self.class_totals.sum() > 0:
+            self.prediction = classes[np.argmax(self.class_totals)]
+
+
+class HoeffdingNode(Node):
+    """Node that remembers its depth and the columns left active for its
+    children, so branches can be added for categories seen after the split"""
+    __slots__ = ('depth', 'child_active', 'categorical')
+
+    def __init__(self, ig, attr_name, branchs, missing: int, depth: int,
+                 child_active: np.ndarray, categorical: bool):
+        super().__init__(ig, attr_name, branchs, missing)
+        self.depth = depth
+        self.child_active = child_active
+        self.categorical = categorical
+
+
+def _grow(arr: np.ndarray, n_rows: int, n_cols: int) -> np.ndarray:
+    """Return arr zero-padded to at least n_rows x n_cols"""
+    return np.pad(arr, ((0, max(n_rows - arr.shape[0], 0)), (0, max(n_cols - arr.shape[1], 0))))
+
+
+class HoeffdingTree:
+    """Decision tree learned incrementally from batches of rows.
+
+    Rows are routed to leaves, whose class counts are updated; a leaf is
+    split on the attribute with highest information gain once it has seen
+    grace_period new rows since its last attempt and the Hoeffding bound
+    shows, with confidence 1 - delta, that the best attribute beats the
+    runner-up (or the two are within tie_threshold of each other). Splits
+    are those of DecisionTree: numeric attributes in two at a threshold,
+    categorical attributes one branch per category, where categories first
+    seen later get a new leaf branch of their own. Rows missing the
+    attribute of a node follow its branch that held the most rows when it
+    was split, and are left out of the counts of the attribute they miss.
+
+    Numeric attributes are quantized into max_bins bins fitted on the first
+    batch, so an update costs time proportional to the batch size times
+    the depth of the tree, regardless of how many rows came before.
+    """
+
+    def __init__(self, grace_period: int = 200, delta: float = 1e-7,
+                 tie_threshold: float = 0.05, max_depth: int = None, max_bins: int = 64):
+        self.grace_period = grace_period
+        self.delta = delta
+        self.tie_threshold = tie_threshold
+        self.max_depth = max_depth
+        self.max_bins = max_bins
+        self.root = None
+        self.names = None
+        self.is_numeric = None
+        self.edges = None
+        self.categories = None
+        self.classes = []
+        self._class_ids = {}
+
+    def partial_fit(self, data: pd.DataFrame, target: pd.Series):
+        """Update the tree with the rows of data and their target"""
+        if self.root is None:
+            self._start(data)
+        codes = self._encode(data)
+        y = self._encode_target(target)
+
+        for (leaf, parent, rows) in self._route(data):
+            self._update_leaf(leaf, codes, y, rows)
+            if leaf.n_seen - leaf.n_at_attempt >= self.grace_period:
+                leaf.n_at_attempt = leaf.n_seen
+                node = self._attempt_split(leaf)
+                if node is None:
+                    continue
+                if parent is None:
+                    self.root = node
+                else:
+                    parent.child = node
+
+    def _start(self, data: pd.DataFrame):
+        self.names = list(data.columns)
+        self.is_numeric = [is_numeric_column(data[name]) for name in self.names]
+        self.edges = []
+        self.categories = []
+        for (name, numeric) in zip(self.names, self.is_numeric):
+            if numeric:
+                (_, bins) = bin_column(data[name].to_numpy(dtype=np.float64), self.max_bins)
+                self.edges.append(bins.lower)
+                self.categories.append(None)
+            else:
+                self.edges.append(None)
+                self.categories.append({})
+        self.root = self._new_leaf(0, np.ones(len(self.names), dtype=bool), np.zeros(0))
+
+    def _new_leaf(self, depth: int, active: np.ndarray, class_totals: np.ndarray) -> HoeffdingLeaf:
+        return HoeffdingLeaf(depth, active, class_totals.astype(np.int64), self.classes)
+
+    def _encode(self, data: pd.DataFrame) -> List[np.ndarray]:
+        """Return bin codes of numeric columns and category codes of the others,
+        registering categories seen for the first time; missing values are
+        coded -1"""
+        codes = []
+        for (i, name) in enumerate(self.names):
+            missing = data[name].isna().to_numpy()
+            if self.is_numeric[i]:
+                values = data[name].to_numpy(dtype=np.float64)
+                col_codes = np.maximum(np.searchsorted(self.edges[i], values, side='right') - 1, 0)
+            else:
+                ids = self.categories[i]
+                col_codes = np.array([-1 if is_missing else ids.setdefault(val, len(ids))
+                                      for (val, is_missing) in zip(data[name], missing)],
+                                     dtype=np.intp)
+            col_codes[missing] = -1
+            codes.append(col_codes)
+        return codes
+
+    def _encode_target(self, target: pd.Series) -> np.ndarray:
+        y = np.empty(target.shape[0], dtype=np.intp)
+        for (i, val) in enumerate(target):
+            if val not in self._class_ids:
+                self._class_ids[val] = len(self.classes)
+                self.classes.append(val)
+            y[i] = self._class_ids[val]
+        return y
+
+    def _route(self, data: pd.DataFrame):
+        """Yield (leaf, branch leading to it or None for the root, row positions)
+        for every leaf reached by rows of data"""
+        columns = {}
+        stack = [(self.root, None, np.arange(data.shape[0]))]
+
+        while stack:
+            (node, parent, rows) = stack.pop()
+            if rows.shape[0] == 0:
+                continue
+            if isinstance(node, Leaf):
+                yield node, parent, rows
+                continue
+
+            if node.attr_name not in columns:
+                columns[node.attr_name] = data[node.attr_name].to_numpy()
+            values = columns[node.attr_name][rows]
+
+            missing = pd.isna(values)
+            default = node.branchs[node.missing]
+            stack.append((default.child, default, rows[missing]))
+            unmatched = ~missing
+            for branch in node.branchs:
+                mask = unmatched & branch.exp(values, branch.val)
+                unmatched &= ~mask
+                stack.append((branch.child, branch, rows[mask]))
+
+            if not node.categorical:
+                continue
+            for val in pd.unique(values[unmatched]):
+                branch = Branch(val, eq, self._new_leaf(node.depth + 1, node.child_active,
+                                                        np.zeros(len(self.classes))))
+                node.add_branch(branch)
+                stack.append((branch.child, branch, rows[unmatched & (values == val)]))
+
+    def _update_leaf(self, leaf: HoeffdingLeaf, codes: List[np.ndarray], y: np.ndarray,
+                     rows: np.ndarray):
+        k = len(self.classes)
+        y_rows = y[rows]
+        leaf.class_totals = np.pad(leaf.class_totals, (0, k - leaf.class_totals.shape[0]))
+        leaf.class_totals += np.bincount(y_rows, minlength=k)
+        leaf.n_seen += rows.shape[0]
+        for col in np.flatnonzero(leaf.active):
+            col_codes = codes[col][rows]
+            present = col_codes >= 0
+            size = self.edges[col].shape[0] if self.is_numeric[col] else len(self.categories[col])
+            counts = np.bincount(col_codes[present] * k + y_rows[present],
+                                 minlength=size * k).reshape(-1, k)
+            if leaf.counts[col] is None:
+                leaf.counts[col] = counts
+            else:
+                leaf.counts[col] = _grow(leaf.counts[col], size, k) + counts
+        leaf.update_prediction(self.classes)
+
+    def hoeffding_bound(self, n: int) -> float:
+        """Return the Hoeffding bound on information gain after n rows"""
+        value_range = np.log2(max(len(self.classes), 2))
+        return np.sqrt(value_range**2 * np.log(1 / self.delta) / (2 * n))
+
+    def _attempt_split(self, leaf: HoeffdingLeaf) -> Union[Node, None]:
+        """Return a Node splitting leaf when the Hoeffding bound allows it, else None"""
+        if leaf.depth == self.max_depth or np.count_nonzero(leaf.class_totals) <= 1:
+            return None
+
+        cols = np.flatnonzero(leaf.active)
+        if cols.shape[0] == 0:
+            return None
+        candidates = []
+        for col in cols:
+            counts = _grow(leaf.counts[col], 0, len(self.classes))
+            present = np.flatnonzero(counts.sum(axis=1))
+            if present.shape[0] < 2:
+                continue
+            parent = node_counts(counts.sum(axis=0))
+            if self.is_numeric[col]:
+                igs = information_gain_thresholds(counts[present], parent)
+                best = best_candidate(igs, present)
+                candidates.append((round(igs[best], 4), col, present[best]))
+            else:
+                candidates.append((information_gain_categories(counts[present], parent), col, present))
+        if not candidates:
+            return None
+
+        candidates.sort(key=lambda candidate: -candidate[0])
+        (ig, col, val) = candidates[0]
+        runner_up = candidates[1][0] if len(candidates) > 1 else 0
+        epsilon = self.hoeffding_bound(leaf.n_seen)
+        if ig <= 0 or (ig - runner_up <= epsilon and epsilon >= self.tie_threshold):
+            return None
+        return self._split_leaf(leaf, ig, col, val)
+
+    def _split_leaf(self, leaf: HoeffdingLeaf, ig: float, col: int, val) -> Node:
+        counts = _grow(leaf.counts[col], 0, len(self.classes))
+        active = leaf.active.copy()
+        active[col] = False
+        depth = leaf.depth + 1
+        branchs = []
+
+        if self.is_numeric[col]:
+            threshold = self.edges[col][val]
+            branchs.append(Branch(threshold, lt, self._new_leaf(depth, active, counts[:val].sum(axis=0))))
+            branchs.append(Branch(threshold, gte, self._new_leaf(depth, active, counts[val:].sum(axis=0))))
+        else:
+            categories = list(self.categories[col])
+            for code in val:
+                branchs.append(Branch(categories[code], eq, self._new_leaf(depth, active, counts[code])))
+
+        missing = int(np.argmax([branch.child.class_totals.sum() for branch in branchs]))
+        return HoeffdingNode(ig, self.names[col], branchs, missing, leaf.depth, active,
+                             not self.is_numeric[col])
+
+    def predict(self, data: pd.DataFrame) -> Union[float, str]:
+        """Predict target for the first row of data"""
+        return self.predict_batch(data.iloc[:1]).iloc[0]
+
+    def predict_batch(self, data: pd.DataFrame) -> pd.Series:
+        """Return one prediction per row of data, indexed like data"""
+        return predict_rows(self.root, data)
+
+    def compile(self) -> FlatTree:
+        """Return the tree flattened into a FlatTree for fast batch inference"""
+        return compile_tree(self.root)
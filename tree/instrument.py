@@ -0,0 +1,154 @@
+from typing import List, Union
+
+import numpy as np
+
+
+class TrainingCallback:
+    """Receives events while a tree trains; every method is a no-op by default.
+
+    Events of one node arrive in order: on_node_begin, on_column_scored once
+    per scored column, then either on_split or on_leaf. A split node's event
+    comes before any event of its children. Subtrees built on worker
+    processes or threads report no events.
+    """
+
+    def on_train_begin(self, tree, matrix):
+        pass
+
+    def on_node_begin(self, depth: int, n_rows: int):
+        pass
+
+    def on_column_scored(self, column: str, n_candidates: int, score: float, seconds: float):
+        pass
+
+    def on_split(self, column: str, value, score: float, score_seconds: float,
+                 split_seconds: float):
+        pass
+
+    def on_leaf(self, prediction):
+        pass
+
+    def on_train_end(self, tree):
+        pass
+
+
+class CallbackList(TrainingCallback):
+    """Forwards every event to each callback in callbacks"""
+
+    def __init__(self, callbacks: List[TrainingCallback]):
+        self.callbacks = list(callbacks)
+
+    def on_train_begin(self, tree, matrix):
+        for callback in self.callbacks:
+            callback.on_train_begin(tree, matrix)
+
+    def on_node_begin(self, depth, n_rows):
+        for callback in self.callbacks:
+            callback.on_node_begin(depth, n_rows)
+
+    def on_column_scored(self, column, n_candidates, score, seconds):
+        for callback in self.callbacks:
+            callback.on_column_scored(column, n_candidates, score, seconds)
+
+    def on_split(self, column, value, score, score_seconds, split_seconds):
+        for callback in self.callbacks:
+            callback.on_split(column, value, score, score_seconds, split_seconds)
+
+    def on_leaf(self, prediction):
+        for callback in self.callbacks:
+            callback.on_leaf(prediction)
+
+    def on_train_end(self, tree):
+        for callback in self.callbacks:
+            callback.on_train_end(tree)
+
+
+def make_hooks(callbacks: Union[List[TrainingCallback], None]) -> Union[CallbackList, None]:
+    """Return the dispatcher a tree calls for callbacks, or None when there are none
+    so an untraced build pays one None check per node"""
+    if not callbacks:
+        return None
+    return CallbackList(callbacks)
+
+
+def n_candidates(column: np.ndarray) -> int:
+    """Return the number of split candidates scored on column: its distinct values"""
+    return np.unique(column).shape[0]
+
+
+class TrainingProfiler(TrainingCallback):
+    """Records one entry per trained node and summarizes where training time went.
+
+    nodes holds a dict per node with its depth, row count, the columns it
+    scored ({'column', 'candidates', 'score', 'seconds'}), the chosen split
+    (column and value, None for leaves), and seconds spent scoring and
+    partitioning rows.
+    """
+
+    def __init__(self):
+        self.nodes = []
+        self._current = None
+
+    def on_train_begin(self, tree, matrix):
+        self.nodes = []
+        self._current = None
+
+    def on_node_begin(self, depth, n_rows):
+        self._current = {'depth': depth, 'rows': n_rows, 'columns': [], 'column': None,
+                         'value': None, 'score': None, 'score_seconds': 0.0,
+                         'split_seconds': 0.0}
+        self.nodes.append(self._current)
+
+    def on_column_scored(self, column, n_candidates, score, seconds):
+        self._current['columns'].append({'column': column, 'candidates': n_candidates,
+                                         'score': score, 'seconds': seconds})
+
+    def on_split(self, column, value, score, score_seconds, split_seconds):
+        self._current.update(column=column, value=value, score=score,
+                             score_seconds=score_seconds, split_seconds=split_seconds)
+
+    def on_leaf(self, prediction):
+        pass
+
+    def node_seconds(self, node: dict) -> float:
+        return node['score_seconds'] + node['split_seconds']
+
+    def slowest_nodes(self, top: int = 10) -> List[dict]:
+        """Return the top nodes by time spent scoring and partitioning, slowest first"""
+        return sorted(self.nodes, key=self.node_seconds, reverse=True)[:top]
+
+    def slowest_columns(self, top: int = 10) -> List[dict]:
+        """Return per-column totals over all nodes, slowest first: column, seconds,
+        times scored, candidates evaluated and times chosen"""
+        totals = {}
+        for node in self.nodes:
+            for scored in node['columns']:
+                total = totals.setdefault(scored['column'], {
+                    'column': scored['column'], 'seconds': 0.0, 'scored': 0,
+                    'candidates': 0, 'chosen': 0})
+                total['seconds'] += scored['seconds']
+                total['scored'] += 1
+                total['candidates'] += scored['candidates']
+            if node['column'] in totals:
+                totals[node['column']]['chosen'] += 1
+        return sorted(totals.values(), key=lambda total: total['seconds'], reverse=True)[:top]
+
+    def report(self, top: int = 10) -> str:
+        """Return a text summary of total time and the slowest columns and nodes"""
+        score_seconds = sum(node['score_seconds'] for node in self.nodes)
+        split_seconds = sum(node['split_seconds'] for node in self.nodes)
+        lines = [f'{len(self.nodes)} nodes, {score_seconds:.4f}s scoring, '
+                 f'{split_seconds:.4f}s partitioning',
+                 '',
+                 'Slowest columns:']
+        for total in self.slowest_columns(top):
+            lines.append(f"  {total['column']:24} {total['seconds']:9.4f}s  "
+                         f"scored {total['scored']:5}  candidates {total['candidates']:8}  "
+                         f"chosen {total['chosen']}")
+        lines.append('')
+        lines.append('Slowest nodes:')
+        for node in self.slowest_nodes(top):
+            split = f"{node['column']} @ {node['value']}" if node['column'] is not None else 'leaf'
+            lines.append(f"  depth {node['depth']:3}  rows {node['rows']:8}  "
+                         f"{self.node_seconds(node):9.4f}s  {split}")
+        return '\n'.join(lines)
@@ -1,3 +1,7 @@
 class Leaf:
-    def __init__(self, prediction):
+    __slots__ = ('prediction', 'n_rows', 'impurity')
+
+    def __init__(self, prediction, n_rows=None, impurity=None):
         self.prediction = prediction
+        self.n_rows = n_rows
+        self.impurity = impurity
@@ -0,0 +1,247 @@
+from typing import List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from tree.binning import Bins, bin_column, bin_class_counts, bin_target_sums
+from tree.util import value_class_counts, category_class_counts, value_target_sums, \
+    category_target_sums, value_target_groups, category_target_groups
+
+
+class TrainingMatrix:
+    """Training data encoded once into contiguous NumPy columns.
+
+    Categorical columns hold integer codes into categories[i], numeric
+    columns hold float64 values, or bin codes described by bins[i] when
+    the matrix was encoded with max_bins. The target is held as integer
+    class ids into classes, plus its float64 values when it is numeric so
+    leaves can predict the mean. Matrices made by with_target hold only the
+    target values and have no class ids (y is None).
+
+    Missing values are NaN in numeric columns, code n_bins in binned ones
+    and code -1 in categorical ones; has_missing[i] tells whether column i
+    holds any. The per-value statistics leave missing values out.
+
+    Training reads the matrix through row-index arrays and never writes to
+    it. encode keeps float64 columns that are contiguous in the DataFrame,
+    and a float64 target, as read-only views of the caller's data rather
+    than copies.
+    """
+
+    def __init__(self, names: List[str], columns: List[np.ndarray], is_numeric: List[bool],
+                 categories: List[Union[np.ndarray, None]], y: np.ndarray, classes: np.ndarray,
+                 y_values: Union[np.ndarray, None] = None,
+                 bins: Union[List[Union[Bins, None]], None] = None,
+                 has_missing: Union[List[bool], None] = None):
+        self.names = names
+        self.columns = columns
+        self.is_numeric = is_numeric
+        self.categories = categories
+        self.y = y
+        self.classes = classes
+        self.y_values = y_values
+        self.bins = bins if bins is not None else [None] * len(columns)
+        if has_missing is None:
+            has_missing = [bool(self.missing_rows(col, self.all_rows()).any())
+                           for col in range(len(columns))]
+        self.has_missing = has_missing
+
+    @property
+    def n_rows(self) -> int:
+        return (self.y if self.y is not None else self.y_values).shape[0]
+
+    @property
+    def n_columns(self) -> int:
+        return len(self.columns)
+
+    @property
+    def n_classes(self) -> int:
+        return self.classes.shape[0]
+
+    @property
+    def is_regression(self) -> bool:
+        return self.y_values is not None
+
+    def arrays(self) -> List[Union[np.ndarray, None]]:
+        """Return the row-aligned arrays of the matrix: its columns, y and y_values"""
+        return self.columns + [self.y, self.y_values]
+
+    def with_arrays(self, arrays: List[Union[np.ndarray, None]]) -> 'TrainingMatrix':
+        """Return a matrix with this encoding over arrays laid out as by arrays()"""
+        return TrainingMatrix(self.names, arrays[:-2], self.is_numeric, self.categories,
+                              arrays[-2], self.classes, arrays[-1], self.bins, self.has_missing)
+
+    def with_target(self, y_values: np.ndarray) -> 'TrainingMatrix':
+        """Return a matrix sharing these encoded columns with numeric target y_values"""
+        return TrainingMatrix(self.names, self.columns, self.is_numeric, self.categories,
+                              None, np.empty(0), np.ascontiguousarray(y_values, dtype=np.float64),
+                              self.bins, self.has_missing)
+
+    def all_rows(self) -> np.ndarray:
+        return np.arange(self.n_rows)
+
+    def missing_rows(self, col: int, rows: np.ndarray) -> np.ndarray:
+        """Return a mask of the rows whose value of column col is missing"""
+        values = self.columns[col][rows]
+        if not self.is_numeric[col]:
+            return values < 0
+        if self.bins[col] is not None:
+            return values == self.bins[col].n_bins
+        return np.isnan(values)
+
+    def _known(self, col: int, rows: np.ndarray) -> np.ndarray:
+        """Return the rows whose value of column col is not missing"""
+        if not self.has_missing[col]:
+            return rows
+        return rows[~self.missing_rows(col, rows)]
+
+    def class_counts(self, rows: np.ndarray) -> np.ndarray:
+        """Return number of rows per target class"""
+        return np.bincount(self.y[rows], minlength=self.n_classes)
+
+    def target_sums(self, rows: np.ndarray) -> np.ndarray:
+        """Return the count, sum and sum of squares of y_values over rows"""
+        y = self.y_values[rows]
+        return np.array([y.shape[0], y.sum(), (y * y).sum()])
+
+    def contains_one_type(self, rows: np.ndarray) -> bool:
+        y = self.y[rows] if self.y is not None else self.y_values[rows]
+        return bool((y == y[0]).all())
+
+    def numeric_class_counts(self, col: int, rows: np.ndarray) \
+            -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return candidate split values of numeric column col over rows in
+        ascending order, the row position each is first seen at and the class
+        counts for each.
+
+        For binned columns the candidates are the non-empty bin codes, and
+        counts come from a per-bin class histogram instead of a sort.
+        """
+        rows = self._known(col, rows)
+        attribute = self.columns[col][rows]
+        y = self.y[rows]
+        bins = self.bins[col]
+        if bins is None:
+            return value_class_counts(attribute, y, self.n_classes)
+        (present, counts) = bin_class_counts(attribute, y, bins.n_bins, self.n_classes)
+        return present, present, counts
+
+    def category_class_counts(self, col: int, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Return category codes of column col present in rows, in order of first
+        appearance, and the class counts for each"""
+        rows = self._known(col, rows)
+        return category_class_counts(self.columns[col][rows], self.y[rows], self.n_classes)
+
+    def numeric_target_sums(self, col: int, rows: np.ndarray) \
+            -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return candidate split values of numeric column col over rows as
+        numeric_class_counts does, with the count, sum and sum of squares of
+        y_values for each instead of class counts"""
+        rows = self._known(col, rows)
+        attribute = self.columns[col][rows]
+        y_values = self.y_values[rows]
+        bins = self.bins[col]
+        if bins is None:
+            return value_target_sums(attribute, y_values)
+        (present, sums) = bin_target_sums(attribute, y_values, bins.n_bins)
+        return present, present, sums
+
+    def category_target_sums(self, col: int, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Return category codes of column col present in rows, in order of first
+        appearance, and the count, sum and sum of squares of y_values for each"""
+        rows = self._known(col, rows)
+        return category_target_sums(self.columns[col][rows], self.y_values[rows])
+
+    def numeric_target_groups(self, col: int, rows: np.ndarray) \
+            -> Tuple[np.ndarray, np.ndarray, Tuple[np.ndarray, np.ndarray]]:
+        """Return candidate split values of numeric column col over rows as
+        numeric_class_counts does, with y_values grouped by candidate instead
+        of class counts, as (values, group starts)"""
+        rows = self._known(col, rows)
+        (values, first_seen, groups) = value_target_groups(self.columns[col][rows], self.y_values[rows])
+        if self.bins[col] is not None:
+            first_seen = values
+        return values, first_seen, groups
+
+    def numeric_class_groups(self, col: int, rows: np.ndarray) \
+            -> Tuple[np.ndarray, np.ndarray, Tuple[np.ndarray, np.ndarray]]:
+        """Return candidate split values of numeric column col over rows as
+        numeric_class_counts does, with the target codes grouped by candidate
+        instead of counted, as (codes, group starts)"""
+        rows = self._known(col, rows)
+        (values, first_seen, groups) = value_target_groups(self.columns[col][rows], self.y[rows])
+        if self.bins[col] is not None:
+            first_seen = values
+        return values, first_seen, groups
+
+    def category_target_groups(self, col: int, rows: np.ndarray) \
+            -> Tuple[np.ndarray, Tuple[np.ndarray, np.ndarray]]:
+        """Return category codes of column col present in rows, in order of first
+        appearance, and y_values grouped by code in that order"""
+        rows = self._known(col, rows)
+        return category_target_groups(self.columns[col][rows], self.y_values[rows])
+
+    def prediction(self, rows: np.ndarray) -> Union[float, str]:
+        """Return mean of numeric target or most frequent class for rows"""
+        if self.is_regression:
+            return self.y_values[rows].mean()
+        return self.classes[np.argmax(self.class_counts(rows))]
+
+
+def is_numeric_column(ser: pd.Series) -> bool:
+    return pd.api.types.is_numeric_dtype(ser)
+
+
+def read_only(array: np.ndarray) -> np.ndarray:
+    """Return a view of array that cannot be written through"""
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+def encode(data: pd.DataFrame, target: pd.Series, max_bins: int = None) -> TrainingMatrix:
+    """Return data and target encoded as a TrainingMatrix
+
+    With max_bins set, numeric columns are quantized into at most max_bins
+    bins and stored as uint8 (uint16 from 256 bins) bin codes, with missing
+    values as code n_bins. Otherwise float64 columns laid out contiguously
+    in data are not copied: the matrix holds read-only views of them.
+    data and target are never modified; a target with missing values
+    raises ValueError.
+    """
+    names = list(data.columns)
+    columns = []
+    is_numeric = []
+    categories = []
+    bins = []
+
+    for name in names:
+        ser = data[name]
+        if is_numeric_column(ser):
+            values = ser.to_numpy(dtype=np.float64)
+            if max_bins is None:
+                columns.append(read_only(np.ascontiguousarray(values)))
+                bins.append(None)
+            else:
+                (codes, col_bins) = bin_column(values, max_bins)
+                columns.append(codes)
+                bins.append(col_bins)
+            categories.append(None)
+            is_numeric.append(True)
+        else:
+            (codes, uniques) = pd.factorize(ser)
+            columns.append(np.ascontiguousarray(codes, dtype=np.intp))
+            categories.append(np.asarray(uniques, dtype=object))
+            bins.append(None)
+            is_numeric.append(False)
+
+    if target.isna().any():
+        raise ValueError('target has missing values')
+    (y, classes) = pd.factorize(target)
+    y_values = None
+    if is_numeric_column(target):
+        y_values = read_only(target.to_numpy(dtype=np.float64))
+
+    return TrainingMatrix(names, columns, is_numeric, categories,
+                          np.ascontiguousarray(y, dtype=np.intp), np.asarray(classes), y_values,
+                          bins)
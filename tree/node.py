@@ -1,8 +1,15 @@
 class Node:
-    def __init__(self, ig, attr_name):
+    __slots__ = ('ig', 'attr_name', 'branchs', 'missing', 'n_rows', 'impurity', 'prediction')
+
+    def __init__(self, ig, attr_name, branchs=(), missing=None, n_rows=None, impurity=None,
+                 prediction=None):
         self.ig = ig
         self.attr_name = attr_name
-        self.branchs = list()
+        self.branchs = tuple(branchs)
+        self.missing = missing
+        self.n_rows = n_rows
+        self.impurity = impurity
+        self.prediction = prediction
 
     def add_branch(self, branch):
-        self.branchs.append(branch)
+        self.branchs += (branch,)
@@ -0,0 +1,166 @@
+import copy
+import os
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Tuple, Union
+
+import numpy as np
+
+from tree.matrix import TrainingMatrix
+
+
+MIN_PARALLEL_ROWS = 4096
+
+
+def resolve_n_jobs(n_jobs: int) -> int:
+    """Return the number of workers for n_jobs, where -1 means one per CPU"""
+    if n_jobs is None:
+        return 1
+    if n_jobs < 0:
+        return max(os.cpu_count() + 1 + n_jobs, 1)
+    return n_jobs
+
+
+class SharedArrays:
+    """NumPy arrays copied once into shared memory blocks"""
+
+    def __init__(self, arrays: List[Union[np.ndarray, None]]):
+        self.blocks = []
+        self.specs = []
+        for arr in arrays:
+            if arr is None:
+                self.specs.append(None)
+                continue
+            block = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+            np.ndarray(arr.shape, dtype=arr.dtype, buffer=block.buf)[...] = arr
+            self.blocks.append(block)
+            self.specs.append((block.name, arr.shape, arr.dtype.str))
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+
+def attach_arrays(specs) -> Tuple[list, List[Union[np.ndarray, None]]]:
+    """Return the shared memory blocks and read-only arrays described by specs"""
+    blocks = []
+    arrays = []
+    for spec in specs:
+        if spec is None:
+            arrays.append(None)
+            continue
+        (name, shape, dtype) = spec
+        block = shared_memory.SharedMemory(name=name)
+        arr = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        arr.flags.writeable = False
+        blocks.append(block)
+        arrays.append(arr)
+    return blocks, arrays
+
+
+_worker = {}
+
+
+def _init_worker(tree, skeleton: TrainingMatrix, specs):
+    (blocks, arrays) = attach_arrays(specs)
+    _worker['blocks'] = blocks
+    _worker['tree'] = tree
+    _worker['matrix'] = skeleton.with_arrays(arrays)
+
+
+def _score_columns(method: str, rows: np.ndarray, cols: List[int], args: tuple) -> list:
+    score_column = getattr(_worker['tree'], method)
+    matrix = _worker['matrix']
+    return [score_column(matrix, rows, col, *args) for col in cols]
+
+
+def _build_subtree(tree, matrix: TrainingMatrix, rows: np.ndarray, active: np.ndarray,
+                   depth: int, seed: int):
+    tree = copy.copy(tree)
+    tree._rng = np.random.default_rng(seed)
+    return tree._train_tree(matrix, rows, active, depth)
+
+
+def _call(fn, args):
+    return fn(_worker['tree'], _worker['matrix'], *args)
+
+
+class MatrixPool:
+    """Pool of workers that score columns and build subtrees of a TrainingMatrix.
+
+    With the process backend the matrix is copied into shared memory once,
+    when the pool starts, so only row indices travel to workers per task.
+    Column scores come back in column order, so reducing them gives the
+    same split, ties included, as scoring serially. Subtrees submitted with
+    submit_subtree are built serially by a worker and stitched back into
+    their branches by resolve_subtrees.
+    """
+
+    def __init__(self, tree, matrix: TrainingMatrix, n_jobs: int,
+                 backend: str = 'process', min_rows: int = MIN_PARALLEL_ROWS):
+        self.tree = copy.copy(tree)
+        self.tree._hooks = None
+        self.matrix = matrix
+        self.n_jobs = resolve_n_jobs(n_jobs)
+        self.min_rows = min_rows
+        self.shared = None
+        self.pending = []
+
+        if backend == 'process':
+            self.shared = SharedArrays(matrix.arrays())
+            skeleton = matrix.with_arrays([None] * len(self.shared.specs))
+            self.executor = ProcessPoolExecutor(
+                self.n_jobs, initializer=_init_worker,
+                initargs=(self.tree, skeleton, self.shared.specs))
+        elif backend == 'thread':
+            self.executor = ThreadPoolExecutor(self.n_jobs)
+        else:
+            raise ValueError(f'Unknown backend: {backend}')
+
+    def score_columns(self, method: str, rows: np.ndarray, cols: np.ndarray, *args) -> list:
+        """Return tree.method(matrix, rows, col, *args) for every column in cols, in column order"""
+        score_column = getattr(self.tree, method)
+        if rows.shape[0] < self.min_rows or cols.shape[0] < 2:
+            return [score_column(self.matrix, rows, col, *args) for col in cols]
+
+        chunks = [chunk.tolist() for chunk in np.array_split(cols, min(self.n_jobs, cols.shape[0]))]
+        if self.shared is not None:
+            futures = [self.executor.submit(_score_columns, method, rows, chunk, args)
+                       for chunk in chunks]
+        else:
+            futures = [self.executor.submit(lambda chunk: [score_column(self.matrix, rows, col, *args)
+                                                           for col in chunk], chunk)
+                       for chunk in chunks]
+        return [score for future in futures for score in future.result()]
+
+    def submit(self, fn, *args) -> Future:
+        """Return a future of fn(tree, matrix, *args) run on a worker.
+
+        fn must be a module-level function for the process backend.
+        """
+        if self.shared is not None:
+            return self.executor.submit(_call, fn, args)
+        return self.executor.submit(fn, self.tree, self.matrix, *args)
+
+    def submit_subtree(self, rows: np.ndarray, active: np.ndarray, depth: int,
+                       seed: int) -> Future:
+        """Return a future of the subtree tree._train_tree builds over rows,
+        sampling columns with a generator seeded by seed"""
+        return self.submit(_build_subtree, rows, active, depth, seed)
+
+    def defer(self, branch):
+        """Register a branch whose child is a future from submit_subtree"""
+        self.pending.append(branch)
+
+    def resolve_subtrees(self):
+        """Replace the future child of every deferred branch with its subtree"""
+        for branch in self.pending:
+            branch.child = branch.child.result()
+        self.pending = []
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+        if self.shared is not None:
+            self.shared.close()
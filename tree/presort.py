@@ -0,0 +1,102 @@
+from typing import Dict, Union
+
+import numpy as np
+
+from tree.matrix import TrainingMatrix
+from tree.util import value_class_counts, value_target_sums, value_target_groups
+
+
+class PresortedMatrix:
+    """A TrainingMatrix seen from one node, holding the node's rows of every
+    active unbinned numeric column in ascending order of value, as the
+    attribute lists of SLIQ.
+
+    orders[col] holds positions into rows, sorted stably by value with
+    missing values last. The root sorts each column once; child keeps a
+    child's orders by filtering its parent's in order, so no node below
+    the root sorts. The numeric statistics of the node's rows read these
+    orders instead of sorting; every other attribute and method is the
+    wrapped matrix's.
+    """
+
+    def __init__(self, matrix: TrainingMatrix, rows: np.ndarray, orders: Dict[int, np.ndarray]):
+        self.matrix = matrix
+        self.rows = rows
+        self.orders = orders
+
+    def __getattr__(self, name):
+        return getattr(self.matrix, name)
+
+    def child(self, rows: np.ndarray, mask: np.ndarray, active: np.ndarray) -> 'PresortedMatrix':
+        """Return the node over rows, the rows of this node where mask is set,
+        keeping the orders of the columns active in it"""
+        position = np.cumsum(mask, dtype=np.intp) - 1
+        orders = {}
+        for (col, order) in self.orders.items():
+            if active[col]:
+                order = order[mask[order]]
+                orders[col] = position[order].astype(order.dtype)
+        return PresortedMatrix(self.matrix, rows, orders)
+
+    def _order(self, col: int, rows: np.ndarray) -> Union[np.ndarray, None]:
+        """Return the sorted positions of the rows of column col that are not
+        missing, or None when rows are not this node's or col is not presorted"""
+        order = self.orders.get(col)
+        if order is None or rows is not self.rows:
+            return None
+        if self.matrix.has_missing[col]:
+            order = order[~np.isnan(self.matrix.columns[col][rows[order]])]
+        return order
+
+    def numeric_class_counts(self, col: int, rows: np.ndarray):
+        order = self._order(col, rows)
+        if order is None:
+            return self.matrix.numeric_class_counts(col, rows)
+        return value_class_counts(self.matrix.columns[col][rows], self.matrix.y[rows],
+                                  self.matrix.n_classes, order)
+
+    def numeric_class_groups(self, col: int, rows: np.ndarray):
+        order = self._order(col, rows)
+        if order is None:
+            return self.matrix.numeric_class_groups(col, rows)
+        return value_target_groups(self.matrix.columns[col][rows], self.matrix.y[rows], order)
+
+    def numeric_target_sums(self, col: int, rows: np.ndarray):
+        order = self._order(col, rows)
+        if order is None:
+            return self.matrix.numeric_target_sums(col, rows)
+        return value_target_sums(self.matrix.columns[col][rows], self.matrix.y_values[rows], order)
+
+    def numeric_target_groups(self, col: int, rows: np.ndarray):
+        order = self._order(col, rows)
+        if order is None:
+            return self.matrix.numeric_target_groups(col, rows)
+        return value_target_groups(self.matrix.columns[col][rows], self.matrix.y_values[rows], order)
+
+
+def presort(matrix: TrainingMatrix, rows: np.ndarray, active: np.ndarray) -> PresortedMatrix:
+    """Return the node over rows of matrix with its active unbinned numeric
+    columns sorted once"""
+    dtype = np.int32 if rows.shape[0] < 2**31 else np.intp
+    orders = {}
+    for col in np.flatnonzero(active):
+        if matrix.is_numeric[col] and matrix.bins[col] is None:
+            orders[col] = np.argsort(matrix.columns[col][rows], kind='stable').astype(dtype)
+    return PresortedMatrix(matrix, rows, orders)
+
+
+def node_matrix(matrix, rows: np.ndarray, active: np.ndarray, engine: str):
+    """Return the matrix to train the node over rows with: matrix itself
+    under the 'sort' engine, or presorted from here under 'presort' unless
+    it already is"""
+    if engine == 'presort' and not isinstance(matrix, PresortedMatrix):
+        return presort(matrix, rows, active)
+    return matrix
+
+
+def child_matrix(matrix, rows: np.ndarray, mask: np.ndarray, active: np.ndarray):
+    """Return the matrix to train the child over rows, the rows of the
+    node of matrix where mask is set, with"""
+    if isinstance(matrix, PresortedMatrix):
+        return matrix.child(rows, mask, active)
+    return matrix
@@ -0,0 +1,107 @@
+import heapq
+from typing import Dict, List, NamedTuple, Tuple
+
+import numpy as np
+
+from tree.leaf import Leaf
+from tree.node import Node
+from tree.traverse import iter_nodes
+
+
+class PruningPath(NamedTuple):
+    ccp_alphas: np.ndarray
+    impurities: np.ndarray
+
+
+def _collapse_alpha(r_node: float, r_leaves: float, n_leaves: int, lowest: float) -> float:
+    """Return the alpha from which a node costs no more as a leaf than its subtree"""
+    if n_leaves <= 1:
+        return lowest
+    return max((r_node - r_leaves) / (n_leaves - 1), lowest)
+
+
+def collapse_alphas(root) -> Tuple[Dict[int, float], List[Tuple[float, float, int]], float]:
+    """Return the alpha at which minimal cost-complexity pruning collapses
+    every Node under root, keyed by id(node), the pruning events of root and
+    the weighted impurity of root's leaves.
+
+    Each Node and Leaf must carry n_rows and impurity. A subtree's events
+    are the (alpha, impurity increase, leaves removed) steps of its weakest
+    link pruning sequence in increasing alpha. They are found in one pass,
+    children before parents: a node's sequence is its children's merged,
+    cut at the alpha where the node itself becomes cheaper as a leaf, which
+    adds one last event collapsing the node.
+    """
+    if not isinstance(root, (Node, Leaf)) or root.n_rows is None:
+        raise ValueError('Tree has no node statistics to prune by')
+    n_total = root.n_rows
+    alphas = {}
+    subtrees = {}
+
+    for node in reversed(list(iter_nodes(root))):
+        if node.n_rows is None:
+            raise ValueError('Tree has no node statistics to prune by')
+        r_node = node.n_rows / n_total * node.impurity
+        if isinstance(node, Leaf):
+            subtrees[id(node)] = (r_node, 1, [])
+            continue
+
+        children = [subtrees.pop(id(branch.child)) for branch in node.branchs]
+        r_full = sum(child[0] for child in children)
+        n_full = sum(child[1] for child in children)
+        (r_leaves, n_leaves) = (r_full, n_full)
+        events = list(heapq.merge(*(child[2] for child in children)))
+
+        alpha = _collapse_alpha(r_node, r_leaves, n_leaves, 0.0)
+        kept = 0
+        while kept < len(events) and events[kept][0] < alpha:
+            (event_alpha, r_increase, removed) = events[kept]
+            r_leaves += r_increase
+            n_leaves -= removed
+            kept += 1
+            alpha = _collapse_alpha(r_node, r_leaves, n_leaves, event_alpha)
+
+        del events[kept:]
+        events.append((alpha, r_node - r_leaves, n_leaves - 1))
+        alphas[id(node)] = alpha
+        subtrees[id(node)] = (r_full, n_full, events)
+
+    (r_full, _, events) = subtrees[id(root)]
+    return alphas, events, r_full
+
+
+def pruning_path(root) -> PruningPath:
+    """Return the effective alphas of minimal cost-complexity pruning of the
+    tree under root, and the weighted impurity of the leaves of the subtree
+    pruned at each, starting from alpha 0 and the full tree"""
+    (_, events, r_full) = collapse_alphas(root)
+    ccp_alphas = [0.0]
+    impurities = [r_full]
+    for (alpha, r_increase, _) in events:
+        if alpha > ccp_alphas[-1]:
+            ccp_alphas.append(alpha)
+            impurities.append(impurities[-1])
+        impurities[-1] += r_increase
+    return PruningPath(np.array(ccp_alphas), np.array(impurities))
+
+
+def prune_tree(root, ccp_alpha: float):
+    """Return root with every Node whose collapse alpha is at most ccp_alpha
+    replaced by a Leaf predicting as the node's rows did"""
+    (alphas, _, _) = collapse_alphas(root)
+
+    def collapse(node):
+        if isinstance(node, Node) and alphas[id(node)] <= ccp_alpha:
+            return Leaf(node.prediction, node.n_rows, node.impurity)
+        return node
+
+    root = collapse(root)
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, Node):
+            continue
+        for branch in node.branchs:
+            branch.child = collapse(branch.child)
+            stack.append(branch.child)
+    return root
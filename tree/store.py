@@ -0,0 +1,129 @@
+import json
+from typing import List, Tuple
+
+import numpy as np
+
+from tree.flat import FlatTree
+
+
+MAGIC = b'DTREEBIN'
+VERSION = 3
+ALIGN = 64
+ARRAYS = ('feature', 'first_branch', 'n_branches', 'leaf', 'op', 'value', 'child', 'missing',
+          'bits')
+
+# Layout: MAGIC, uint32 version, uint64 header length, UTF-8 JSON header,
+# then every array's raw little-endian bytes at an ALIGN-aligned offset
+# listed in the header. Version 1 files have no missing array; their trees
+# send missing values down no branch. Versions before 3 have no bits array,
+# as their trees have no isin/notin branches.
+
+
+def _to_json(val):
+    if isinstance(val, np.generic):
+        return val.item()
+    raise TypeError(f'Cannot store value of type {type(val).__name__}')
+
+
+def _align(n: int) -> int:
+    return -(-n // ALIGN) * ALIGN
+
+
+def save_flats(path: str, flats: List[FlatTree], meta: dict = None):
+    """Write flats, which must share one feature table, and meta to path"""
+    features = flats[0].features if flats else []
+    categories = flats[0].categories if flats else []
+    blobs = []
+    trees = []
+    offset = 0
+
+    for flat in flats:
+        arrays = {name: getattr(flat, name) for name in ARRAYS}
+        tree = {'arrays': {}}
+        if flat.values.dtype.kind in 'biuf':
+            arrays['values'] = flat.values
+        else:
+            (codes, table) = _value_codes(flat.values)
+            arrays['values'] = codes
+            tree['value_table'] = table
+        for (name, arr) in arrays.items():
+            arr = np.ascontiguousarray(arr, dtype=arr.dtype.newbyteorder('<'))
+            tree['arrays'][name] = [offset, arr.dtype.str, arr.shape[0]]
+            blobs.append((offset, arr))
+            offset = _align(offset + arr.nbytes)
+        trees.append(tree)
+
+    header = {
+        'features': list(features),
+        'categories': [list(c) if c is not None else None for c in categories],
+        'trees': trees,
+        'meta': meta or {},
+    }
+    header_bytes = json.dumps(header, default=_to_json).encode('utf-8')
+    data_start = _align(len(MAGIC) + 12 + len(header_bytes))
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(np.uint32(VERSION).tobytes())
+        f.write(np.uint64(len(header_bytes)).tobytes())
+        f.write(header_bytes)
+        for (start, arr) in blobs:
+            f.seek(data_start + start)
+            f.write(arr.tobytes())
+        f.truncate(data_start + offset)
+
+
+def _value_codes(values: np.ndarray) -> Tuple[np.ndarray, list]:
+    table = list(dict.fromkeys(values.tolist()))
+    index = {val: i for (i, val) in enumerate(table)}
+    return np.array([index[val] for val in values.tolist()], dtype=np.int32), table
+
+
+def load_flats(path: str, mmap: bool = True) -> Tuple[List[FlatTree], dict]:
+    """Return the FlatTrees and meta stored at path.
+
+    With mmap the node and branch arrays are read-only views of the mapped
+    file, so processes loading the same file share one copy in the page
+    cache and nothing is rebuilt per node.
+    """
+    if mmap:
+        buf = np.memmap(path, dtype=np.uint8, mode='r')
+    else:
+        buf = np.fromfile(path, dtype=np.uint8)
+
+    if bytes(buf[:len(MAGIC)]) != MAGIC:
+        raise ValueError(f'{path} is not a saved tree file')
+    pos = len(MAGIC)
+    version = int(buf[pos:pos + 4].view('<u4')[0])
+    if version not in (1, 2, VERSION):
+        raise ValueError(f'Unsupported tree file version {version}, expected {VERSION}')
+    header_len = int(buf[pos + 4:pos + 12].view('<u8')[0])
+    pos += 12
+    header = json.loads(bytes(buf[pos:pos + header_len]).decode('utf-8'))
+    data_start = _align(pos + header_len)
+
+    features = header['features']
+    categories = [np.array(c, dtype=object) if c is not None else None
+                  for c in header['categories']]
+    flats = []
+    for tree in header['trees']:
+        arrays = {}
+        for (name, (offset, dtype, length)) in tree['arrays'].items():
+            start = data_start + offset
+            arrays[name] = np.ndarray((length,), dtype=dtype, buffer=buf, offset=start)
+        values = arrays.pop('values')
+        if 'value_table' in tree:
+            values = np.array(tree['value_table'], dtype=object)[values]
+        flats.append(FlatTree(features, categories, values=values, **arrays))
+
+    return flats, header['meta']
+
+
+def save_tree(path: str, flat: FlatTree, meta: dict = None):
+    save_flats(path, [flat], meta)
+
+
+def load_tree(path: str, mmap: bool = True) -> FlatTree:
+    """Return the single FlatTree stored at path"""
+    (flats, _) = load_flats(path, mmap)
+    return flats[0]
@@ -0,0 +1,407 @@
+from typing import Callable, Iterable, List, Union
+
+import numpy as np
+import pandas as pd
+
+from tree.binning import Bins, bin_column, bin_dtype
+from tree.criterion import get_criterion
+from tree.branch import Branch
+from tree.leaf import Leaf
+from tree.matrix import TrainingMatrix, is_numeric_column
+from tree.node import Node
+
+
+DEFAULT_MAX_BINS = 255
+SAMPLE_SIZE = 100000
+
+Chunks = Union[Callable[[], Iterable[pd.DataFrame]], Iterable[pd.DataFrame]]
+
+
+def iter_chunks(chunks: Chunks) -> Iterable[pd.DataFrame]:
+    """Return a fresh pass over chunks, which is either a function returning an
+    iterable of DataFrames or a re-iterable such as a list"""
+    if callable(chunks):
+        return chunks()
+    if iter(chunks) is chunks:
+        raise TypeError('chunks is a one-shot iterator; pass a function returning a new one per pass')
+    return chunks
+
+
+class ChunkEncoder:
+    """Fixed encoding of a chunked table, fitted in one pass over all chunks.
+
+    Categories and classes are collected in order of first appearance over
+    the whole stream. Numeric columns are binned into at most max_bins
+    quantile bins estimated from a uniform sample of sample_size values
+    per column; bin codes come from the sampled edges, and the Bins'
+    lower and upper are narrowed to the exact values seen per bin by
+    update_bins, so thresholds on bins are thresholds on raw values.
+    Missing values are encoded as TrainingMatrix encodes them: code n_bins
+    in numeric columns and -1 in categorical ones.
+    """
+
+    def __init__(self, target: str, max_bins: int = DEFAULT_MAX_BINS,
+                 sample_size: int = SAMPLE_SIZE, regression: bool = False, seed: int = 0):
+        self.target = target
+        self.max_bins = max_bins
+        self.sample_size = sample_size
+        self.regression = regression
+        self.seed = seed
+        self.names = None
+        self.is_numeric = None
+        self.categories = None
+        self.classes = None
+        self.is_numeric_target = False
+        self.edges = None
+        self.bins = None
+
+    def fit(self, chunks: Chunks) -> 'ChunkEncoder':
+        rng = np.random.default_rng(self.seed)
+        samples = None
+        categories = None
+        classes = {}
+
+        for chunk in iter_chunks(chunks):
+            if self.names is None:
+                self.names = [name for name in chunk.columns if name != self.target]
+                self.is_numeric = [is_numeric_column(chunk[name]) for name in self.names]
+                self.is_numeric_target = is_numeric_column(chunk[self.target])
+                samples = [(np.empty(0), np.empty(0)) if numeric else None
+                           for numeric in self.is_numeric]
+                categories = [None if numeric else {} for numeric in self.is_numeric]
+
+            for (i, name) in enumerate(self.names):
+                if self.is_numeric[i]:
+                    values = chunk[name].to_numpy(dtype=np.float64)
+                    samples[i] = self._sample(samples[i], values[~np.isnan(values)], rng)
+                else:
+                    categories[i].update(dict.fromkeys(pd.unique(chunk[name].dropna())))
+            if not self.regression:
+                classes.update(dict.fromkeys(pd.unique(chunk[self.target])))
+
+        if self.names is None:
+            raise ValueError('chunks holds no data')
+
+        self.categories = [np.array(list(cats), dtype=object) if cats is not None else None
+                           for cats in categories]
+        self.classes = np.asarray(list(classes))
+        self.edges = []
+        self.bins = []
+        for sample in samples:
+            if sample is None:
+                self.edges.append(None)
+                self.bins.append(None)
+                continue
+            (_, bins) = bin_column(sample[0], self.max_bins)
+            self.edges.append(bins.lower.copy())
+            self.bins.append(bins)
+        return self
+
+    def _sample(self, sample, values: np.ndarray, rng):
+        """Return the sample_size values with the lowest random keys among
+        sample and values, which keeps a uniform sample of the stream"""
+        (kept, keys) = sample
+        kept = np.r_[kept, values]
+        keys = np.r_[keys, rng.random(values.shape[0])]
+        if kept.shape[0] > self.sample_size:
+            keep = np.argpartition(keys, self.sample_size)[:self.sample_size]
+            (kept, keys) = (kept[keep], keys[keep])
+        return kept, keys
+
+    def encode(self, chunk: pd.DataFrame) -> TrainingMatrix:
+        """Return chunk encoded with the fitted categories, classes and bins"""
+        columns = []
+        for (i, name) in enumerate(self.names):
+            if self.is_numeric[i]:
+                values = chunk[name].to_numpy(dtype=np.float64)
+                codes = np.maximum(np.searchsorted(self.edges[i], values, side='right') - 1, 0)
+                codes[np.isnan(values)] = self.edges[i].shape[0]
+                columns.append(codes.astype(bin_dtype(self.max_bins)))
+            else:
+                codes = pd.Index(self.categories[i]).get_indexer(chunk[name])
+                columns.append(np.ascontiguousarray(codes, dtype=np.intp))
+
+        target = chunk[self.target]
+        if target.isna().any():
+            raise ValueError('target has missing values')
+        y = None
+        if not self.regression:
+            y = np.ascontiguousarray(pd.Index(self.classes).get_indexer(target), dtype=np.intp)
+        y_values = target.to_numpy(dtype=np.float64) if self.is_numeric_target else None
+        return TrainingMatrix(self.names, columns, self.is_numeric, self.categories, y,
+                              self.classes, y_values, self.bins)
+
+    def empty(self) -> TrainingMatrix:
+        """Return a matrix with this encoding and no rows"""
+        return self.encode(pd.DataFrame({name: pd.Series(dtype=np.float64 if numeric else object)
+                                         for (name, numeric) in zip(self.names + [self.target],
+                                                                    self.is_numeric + [True])}))
+
+    def update_bins(self, chunk: pd.DataFrame, matrix: TrainingMatrix, lower: List, upper: List):
+        """Narrow the running per-bin minimum lower and maximum upper to the raw
+        values of chunk, whose encoding is matrix"""
+        for (i, name) in enumerate(self.names):
+            if not self.is_numeric[i]:
+                continue
+            values = chunk[name].to_numpy(dtype=np.float64)
+            known = ~np.isnan(values)
+            (codes, values) = (matrix.columns[i][known], values[known])
+            np.minimum.at(lower[i], codes, values)
+            np.maximum.at(upper[i], codes, values)
+
+    def set_bins(self, lower: List, upper: List):
+        """Replace the Bins' bounds by the exact per-bin minimum lower and maximum upper"""
+        for (i, bins) in enumerate(self.bins):
+            if bins is None:
+                continue
+            seen = np.isfinite(lower[i])
+            self.bins[i] = Bins(np.where(seen, lower[i], bins.lower), np.where(seen, upper[i], bins.upper))
+
+
+class NodeStats:
+    """Sufficient statistics of the rows reaching one node, summed over all chunks.
+
+    Exposes the part of the TrainingMatrix interface split search uses, so
+    a tree's _find_split scores a node from its histograms: per column a
+    class-count histogram over bin or category codes, and with a numeric
+    target the count, sum and sum of squares of the target per code. Rows
+    missing a column's value are left out of its histograms, so the
+    statistics of the missing rows are the node's totals minus a histogram's.
+    The rows arguments of the interface are ignored.
+    """
+
+    def __init__(self, encoder: ChunkEncoder, sums: bool):
+        self.names = encoder.names
+        self.is_numeric = encoder.is_numeric
+        self.categories = encoder.categories
+        self.bins = encoder.bins
+        self.classes = encoder.classes
+        self.regression = encoder.regression
+        self.is_regression = encoder.is_numeric_target
+        self.has_missing = [True] * len(self.names)
+        self.sizes = [bins.n_bins if bins is not None else cats.shape[0]
+                      for (bins, cats) in zip(encoder.bins, encoder.categories)]
+        k = self.n_classes
+        self.counts = [np.zeros(size * k, dtype=np.int64) for size in self.sizes]
+        self.class_totals = np.zeros(k, dtype=np.int64)
+        self.value_sums = [np.zeros((size, 3)) for size in self.sizes] if sums else None
+        self.n_rows = 0
+        self.y_sum = 0.0
+        self.y_sq = 0.0
+        self.y_min = np.inf
+        self.y_max = -np.inf
+
+    @property
+    def n_classes(self) -> int:
+        return 0 if self.regression else self.classes.shape[0]
+
+    def add(self, matrix: TrainingMatrix, rows: np.ndarray, active: np.ndarray):
+        """Add the rows of matrix to the statistics of the active columns"""
+        self.n_rows += rows.shape[0]
+        k = self.n_classes
+        y = matrix.y[rows] if matrix.y is not None else None
+        y_values = matrix.y_values[rows] if matrix.y_values is not None else None
+        if y is not None:
+            self.class_totals += np.bincount(y, minlength=k)
+        if y_values is not None and rows.shape[0] > 0:
+            self.y_sum += y_values.sum()
+            self.y_sq += (y_values * y_values).sum()
+            self.y_min = min(self.y_min, y_values.min())
+            self.y_max = max(self.y_max, y_values.max())
+
+        for col in np.flatnonzero(active):
+            codes = matrix.columns[col][rows].astype(np.intp)
+            size = self.sizes[col]
+            (col_y, col_values) = (y, y_values)
+            if matrix.has_missing[col]:
+                known = ~matrix.missing_rows(col, rows)
+                codes = codes[known]
+                col_y = y[known] if y is not None else None
+                col_values = y_values[known] if y_values is not None else None
+            if col_y is not None:
+                self.counts[col] += np.bincount(codes * k + col_y, minlength=self.counts[col].shape[0])
+            if self.value_sums is not None:
+                self.value_sums[col] += np.column_stack([
+                    np.bincount(codes, minlength=size),
+                    np.bincount(codes, weights=col_values, minlength=size),
+                    np.bincount(codes, weights=col_values * col_values, minlength=size)])
+
+    def numeric_class_counts(self, col, rows):
+        (present, counts) = self.category_class_counts(col, rows)
+        return present, present, counts
+
+    def category_class_counts(self, col, rows):
+        counts = self.counts[col].reshape(-1, self.n_classes)
+        present = np.flatnonzero(counts.sum(axis=1))
+        return present, counts[present]
+
+    def numeric_class_groups(self, col, rows):
+        (present, counts) = self.category_class_counts(col, rows)
+        codes = np.repeat(np.tile(np.arange(self.n_classes), present.shape[0]), counts.ravel())
+        sizes = counts.sum(axis=1)
+        return present, present, (codes, np.cumsum(sizes) - sizes)
+
+    def numeric_target_sums(self, col, rows):
+        (present, sums) = self.category_target_sums(col, rows)
+        return present, present, sums
+
+    def category_target_sums(self, col, rows):
+        sums = self.value_sums[col]
+        present = np.flatnonzero(sums[:, 0])
+        return present, sums[present]
+
+    def class_counts(self, rows) -> np.ndarray:
+        return self.class_totals
+
+    def target_sums(self, rows) -> np.ndarray:
+        return np.array([self.n_rows, self.y_sum, self.y_sq])
+
+    def contains_one_type(self, rows) -> bool:
+        if self.regression:
+            return self.y_min == self.y_max
+        return np.count_nonzero(self.class_totals) <= 1
+
+    def prediction(self, rows):
+        if self.is_regression:
+            return self.y_sum / self.n_rows
+        return self.classes[np.argmax(self.class_totals)]
+
+
+class _StreamNode:
+    __slots__ = ('depth', 'active', 'n_rows', 'impurity', 'prediction', 'split', 'exps',
+                 'children', 'result')
+
+    def __init__(self, depth: int, active: np.ndarray):
+        self.depth = depth
+        self.active = active
+        self.n_rows = 0
+        self.impurity = None
+        self.prediction = None
+        self.split = None
+        self.exps = None
+        self.children = None
+        self.result = None
+
+
+def train_streaming(tree, chunks: Chunks, target: str, max_bins: int = DEFAULT_MAX_BINS,
+                    sample_size: int = SAMPLE_SIZE):
+    """Return the root of tree grown breadth-first from chunked data.
+
+    chunks yields DataFrames holding the feature columns and the target
+    column. One pass fits the encoding, then every level of the tree takes
+    one pass that routes each chunk's rows through the splits chosen so far
+    and sums histograms for the nodes of the level; only one chunk and the
+    histograms of one level are held in memory at a time. Splits are found
+    by tree._find_split on the histograms and rows are split by
+    tree._split_rows, so the tree's own criterion and split semantics apply,
+    as when training with max_bins.
+    """
+    criterion = get_criterion(tree.criterion)
+    statistic = criterion.statistic
+    if statistic == 'values':
+        raise ValueError(f'Criterion {tree.criterion} needs every target value and cannot be streamed')
+    regression = statistic == 'sums'
+    encoder = ChunkEncoder(target, max_bins, sample_size, regression).fit(chunks)
+    if regression and not encoder.is_numeric_target:
+        raise ValueError(f'Criterion {tree.criterion} needs a numeric target')
+    tree._rng = np.random.default_rng(tree.random_state)
+    empty = encoder.empty()
+    no_rows = np.empty(0, dtype=np.intp)
+
+    nodes = [_StreamNode(0, np.ones(len(encoder.names), dtype=bool))]
+    level = [0]
+    first_pass = True
+
+    while level:
+        stats = {n: NodeStats(encoder, regression) for n in level}
+        if first_pass:
+            lower = [np.full(b.n_bins, np.inf) if b is not None else None for b in encoder.bins]
+            upper = [np.full(b.n_bins, -np.inf) if b is not None else None for b in encoder.bins]
+
+        for chunk in iter_chunks(chunks):
+            matrix = encoder.encode(chunk)
+            if first_pass:
+                encoder.update_bins(chunk, matrix, lower, upper)
+            for (n, rows) in _route(tree, nodes, matrix):
+                if n in stats:
+                    stats[n].add(matrix, rows, nodes[n].active)
+
+        if first_pass:
+            encoder.set_bins(lower, upper)
+            empty = encoder.empty()
+            tree._n_total = stats[0].n_rows
+            first_pass = False
+
+        next_level = []
+        for n in level:
+            node = nodes[n]
+            node_stats = stats[n]
+            node.n_rows = node_stats.n_rows
+            if node_stats.n_rows == 0:
+                continue
+            parent = criterion.node_stats(node_stats, None)
+            node.impurity = float(parent.impurity)
+            node.prediction = node_stats.prediction(None)
+            if tree.should_predict(node_stats, None, node.active, node.depth):
+                node.result = Leaf(node.prediction, node.n_rows, node.impurity)
+                continue
+            (score, col, val, is_numeric, missing) = tree._find_split(node_stats, None, node.active,
+                                                                      parent)
+            if col is None:
+                node.result = Leaf(node.prediction, node.n_rows, node.impurity)
+                continue
+
+            active = node.active.copy()
+            active[col] = False
+            node.split = (score, col, val, is_numeric, missing)
+            node.exps = [(split['exp'], split['val'])
+                         for split in tree._split_rows(empty, no_rows, col, val, is_numeric, missing)]
+            node.children = []
+            for _ in node.exps:
+                node.children.append(len(nodes))
+                next_level.append(len(nodes))
+                nodes.append(_StreamNode(node.depth + 1, active))
+        level = next_level
+
+    return _assemble(nodes, encoder.names)
+
+
+def _route(tree, nodes: List[_StreamNode], matrix: TrainingMatrix):
+    """Yield (node index, rows of matrix reaching it) for every node, parents first"""
+    node_rows = {0: matrix.all_rows()}
+    for (n, node) in enumerate(nodes):
+        if n not in node_rows:
+            continue
+        rows = node_rows.pop(n)
+        yield n, rows
+        if node.split is None or rows.shape[0] == 0:
+            continue
+        (_, col, val, is_numeric, missing) = node.split
+        for (child, split) in zip(node.children,
+                                  tree._split_rows(matrix, rows, col, val, is_numeric, missing)):
+            node_rows[child] = split['rows']
+
+
+def _assemble(nodes: List[_StreamNode], names: List[str]):
+    """Return the root Node or Leaf built from nodes, children before parents.
+
+    Missing values at a node whose split saw none follow the child that
+    received the most rows, as in in-memory training.
+    """
+    for node in reversed(nodes):
+        if node.split is None:
+            continue
+        (score, col, _, _, missing) = node.split
+        if missing is None:
+            missing = int(np.argmax([nodes[child].n_rows for child in node.children]))
+        branchs = []
+        missing_branch = None
+        for (part, ((exp, val), child)) in enumerate(zip(node.exps, node.children)):
+            if nodes[child].result is None:
+                continue
+            if part == missing:
+                missing_branch = len(branchs)
+            branchs.append(Branch(val, exp, nodes[child].result))
+        node.result = Node(score, names[col], branchs, missing_branch, node.n_rows, node.impurity,
+                           node.prediction)
+    return nodes[0].result
@@ -0,0 +1,90 @@
+import sys
+from typing import Dict, Iterator
+
+import numpy as np
+import pandas as pd
+
+from tree.node import Node
+from tree.leaf import Leaf
+
+
+def iter_nodes(root) -> Iterator:
+    """Yield every Node and Leaf under root, parents before children"""
+    stack = [root] if root is not None else []
+    while stack:
+        node = stack.pop()
+        yield node
+        if isinstance(node, Node):
+            stack.extend(branch.child for branch in reversed(node.branchs))
+
+
+def memory_usage(root) -> Dict[str, int]:
+    """Return bytes held by the Node, Branch and Leaf objects under root.
+
+    Node bytes include the node's branch tuple. Split values and leaf
+    predictions are not counted, as they are usually shared with the data.
+    """
+    usage = {'Node': 0, 'Branch': 0, 'Leaf': 0}
+    for node in iter_nodes(root):
+        if isinstance(node, Leaf):
+            usage['Leaf'] += sys.getsizeof(node)
+            continue
+        usage['Node'] += sys.getsizeof(node) + sys.getsizeof(node.branchs)
+        usage['Branch'] += sum(sys.getsizeof(branch) for branch in node.branchs)
+    return usage
+
+
+def predict_values(root, values):
+    """Return the prediction of the tree under root for one row given as a
+    mapping from attribute name to value, routed as single-row prediction
+    routes it, or None when the row matches no branch"""
+    node = root
+    while isinstance(node, Node):
+        val = values[node.attr_name]
+        if node.missing is not None and pd.isna(val):
+            node = node.branchs[node.missing].child
+            continue
+        for branch in node.branchs:
+            if branch.exp(val, branch.val):
+                node = branch.child
+                break
+        else:
+            return None
+    return node.prediction
+
+
+def predict_rows(root, data: pd.DataFrame) -> pd.Series:
+    """Return one prediction per row of data, indexed like data.
+
+    Rows are routed down from root as index partitions: every branch tests
+    its whole partition in one vectorized comparison. A row matches the
+    first branch whose condition holds, as in single-row prediction, and
+    rows matching no branch are predicted as None. Rows missing a node's
+    attribute follow the node's missing branch when it has one.
+    """
+    predictions = np.full(data.shape[0], None, dtype=object)
+    columns = {}
+    stack = [(root, np.arange(data.shape[0]))]
+
+    while stack:
+        (node, rows) = stack.pop()
+        if node is None or rows.shape[0] == 0:
+            continue
+        if isinstance(node, Leaf):
+            predictions[rows] = node.prediction
+            continue
+
+        if node.attr_name not in columns:
+            columns[node.attr_name] = data[node.attr_name].to_numpy()
+        values = columns[node.attr_name][rows]
+
+        unmatched = np.ones(rows.shape[0], dtype=bool)
+        if node.missing is not None:
+            unmatched = ~pd.isna(values)
+            stack.append((node.branchs[node.missing].child, rows[~unmatched]))
+        for branch in node.branchs:
+            mask = unmatched & branch.exp(values, branch.val)
+            unmatched &= ~mask
+            stack.append((branch.child, rows[mask]))
+
+    return pd.Series(data=predictions, index=data.index).infer_objects()
@@ -1,4 +1,4 @@
-from typing import Tuple
+from typing import NamedTuple, Tuple
 import numpy as np
 import pandas as pd
 from typing import Union
@@ -16,6 +16,22 @@ def eq(a, b) -> bool:
     return a == b
 
 
+def isin(a, b) -> bool:
+    """Return whether a, or every element of array a, is in the set b"""
+    if isinstance(a, np.ndarray):
+        return pd.Index(a).isin(b)
+    return a in b
+
+
+def notin(a, b) -> bool:
+    return ~isin(a, b) if isinstance(a, np.ndarray) else a not in b
+
+
+def category_set(categories, codes) -> frozenset:
+    """Return the categories with the given codes as a set"""
+    return frozenset(categories[code] for code in codes)
+
+
 def entropy(ser) -> float:
     """Return entropy for series"""
     pb = ser.value_counts() / ser.shape[0]
@@ -37,8 +53,8 @@ def information_gain_2(e_target, target, attribute, split_val, n, cost_func) ->
     """
     (target_lt, m_lt) = ljoin_filter_count(target, attribute, split_val, lt)
     (target_gte, m_gte) = ljoin_filter_count(target, attribute, split_val, gte)
-    tot = (m_lt / n) * entropy(target_lt)
-    tot += (m_gte / n) * entropy(target_gte)
+    tot = (m_lt / n) * cost_func(target_lt)
+    tot += (m_gte / n) * cost_func(target_gte)
     return e_target - tot
 
 
@@ -56,22 +72,42 @@ def ljoin_filter_count(target, attribute, split_val, exp) -> Tuple[pd.Series, in
     return target_split, count
 
 
-def information_gain_cat(target, attribute) -> Tuple[float, np.array]:
-    """Return highest information gain and values"""
+def category_class_counts(codes, y, n_classes) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the category codes present in codes, in order of first appearance,
+    and the class counts of y for each of them"""
+    (present, first_seen) = np.unique(codes, return_index=True)
+    present = present[np.argsort(first_seen, kind='stable')]
+    n_codes = present.max(initial=-1) + 1
+    counts = np.bincount(codes * n_classes + y, minlength=n_codes * n_classes)
+    return present, counts.reshape(-1, n_classes)[present]
+
 
-    e_target = entropy(target)
-    n = attribute.shape[0]
-    values = attribute.unique()
-    tot = 0
+def information_gain_categories(counts, parent=None) -> float:
+    """Return information gain of splitting rows into one part per row of class counts,
+    given the NodeCounts of all rows as parent or computing them from counts"""
+    if parent is None:
+        parent = node_counts(counts.sum(axis=0))
+    m = counts.sum(axis=1)
+    tot = ((m/parent.n) * np.round(entropy_counts(counts), 4)).sum()
+    ig = round(parent.impurity, 4) - tot
+    return round(ig, 4)
 
-    for val in values:
-        target_after = target.loc[attribute == val]
-        m = target_after.shape[0]
-        tot += (m/n) * entropy(target_after)
 
-    ig = e_target - tot
-    ig = round(ig, 4)
-    return ig, values
+def information_gain_cat(target, attribute, parent=None) -> Tuple[float, np.array]:
+    """Return highest information gain and values.
+
+    Rows missing the attribute count towards the parent's entropy but join
+    no part.
+    """
+
+    (codes, values) = pd.factorize(attribute.loc[target.index])
+    (y, classes) = pd.factorize(target)
+    if parent is None:
+        parent = node_counts(np.bincount(y, minlength=classes.shape[0]))
+    present = codes >= 0
+    (_, counts) = category_class_counts(codes[present], y[present], classes.shape[0])
+    ig = information_gain_categories(counts, parent)
+    return ig, values.to_numpy()
 
 
 def information_gain_split(e_target, target, attribute, split_val, n) -> float:
@@ -86,32 +122,218 @@ def information_gain_split(e_target, target, attribute, split_val, n) -> float:
     return e_target - tot
 
 
-def information_gain_num(target, attribute) -> Tuple[float, Union[int, list]]:
+def entropy_counts(counts) -> np.ndarray:
+    """Return entropy for each row of class counts"""
+    counts = np.asarray(counts, dtype=float)
+    n = counts.sum(axis=-1, keepdims=True)
+    pb = counts / np.maximum(n, 1)
+    log_pb = np.log2(pb, out=np.zeros_like(pb), where=pb > 0)
+    return -(pb * log_pb).sum(axis=-1)
+
+
+def gini_counts(counts) -> np.ndarray:
+    """Return gini impurity for each row of class counts"""
+    counts = np.asarray(counts, dtype=float)
+    n = counts.sum(axis=-1, keepdims=True)
+    pb = counts / np.maximum(n, 1)
+    return 1 - (pb**2).sum(axis=-1)
+
+
+def sse_sums(sums) -> np.ndarray:
+    """Return sum of squared errors around the mean for each row of
+    count, sum and sum of squares"""
+    return sums[..., 2] - sums[..., 1]**2 / np.maximum(sums[..., 0], 1)
+
+
+class NodeCounts(NamedTuple):
+    """Class counts, number and impurity of the rows at a node, computed once
+    and shared by every candidate split scored there"""
+    counts: np.ndarray
+    n: int
+    impurity: float
+
+
+def node_counts(counts, impurity=entropy_counts) -> NodeCounts:
+    """Return NodeCounts of class counts, with impurity from the counts kernel impurity"""
+    return NodeCounts(counts, counts.sum(), impurity(counts))
+
+
+def group_starts(sorted_vals) -> np.ndarray:
+    """Return the positions where a new value starts in sorted_vals, none when it is empty"""
+    return np.flatnonzero(np.r_[sorted_vals.shape[0] > 0, sorted_vals[1:] != sorted_vals[:-1]])
+
+
+def value_class_counts(attribute, codes, n_classes, order=None) \
+        -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return sorted unique values of attribute, the row each value is first seen at
+    and the class counts of codes for each value.
+
+    The attribute is sorted once, unless the caller passes the stable
+    ascending order of the rows to count; rows sharing a value are grouped
+    and their target codes counted in a single bincount.
+    """
+    if order is None:
+        order = np.argsort(attribute, kind='stable')
+    sorted_vals = attribute[order]
+    n = sorted_vals.shape[0]
+    starts = group_starts(sorted_vals)
+    group = np.repeat(np.arange(starts.shape[0]), np.diff(np.r_[starts, n]))
+    counts = np.bincount(group * n_classes + codes[order],
+                         minlength=starts.shape[0] * n_classes)
+    return sorted_vals[starts], order[starts], counts.reshape(-1, n_classes)
+
+
+def value_target_sums(attribute, y_values, order=None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return sorted unique values of attribute, the row each value is first seen at
+    and the count, sum and sum of squares of y_values for each value, over
+    the rows of order as value_class_counts"""
+    if order is None:
+        order = np.argsort(attribute, kind='stable')
+    sorted_vals = attribute[order]
+    n = sorted_vals.shape[0]
+    starts = group_starts(sorted_vals)
+    y = y_values[order]
+    sums = np.column_stack([np.diff(np.r_[starts, n]),
+                            np.add.reduceat(y, starts),
+                            np.add.reduceat(y * y, starts)])
+    return sorted_vals[starts], order[starts], sums
+
+
+def value_target_groups(attribute, y_values, order=None) \
+        -> Tuple[np.ndarray, np.ndarray, Tuple[np.ndarray, np.ndarray]]:
+    """Return sorted unique values of attribute, the row each value is first seen at,
+    and y_values ordered by attribute with the position each value's group starts at,
+    over the rows of order as value_class_counts"""
+    if order is None:
+        order = np.argsort(attribute, kind='stable')
+    sorted_vals = attribute[order]
+    starts = group_starts(sorted_vals)
+    return sorted_vals[starts], order[starts], (y_values[order], starts)
+
+
+def category_target_groups(codes, y_values) -> Tuple[np.ndarray, Tuple[np.ndarray, np.ndarray]]:
+    """Return the category codes present in codes, in order of first appearance,
+    and y_values grouped by code in that order with the position each group starts at"""
+    (present, first_seen) = np.unique(codes, return_index=True)
+    present = present[np.argsort(first_seen, kind='stable')]
+    rank = np.empty(present.max(initial=-1) + 1, dtype=np.intp)
+    rank[present] = np.arange(present.shape[0])
+    order = np.argsort(rank[codes], kind='stable')
+    sizes = np.bincount(rank[codes], minlength=present.shape[0])
+    return present, (y_values[order], np.cumsum(sizes) - sizes)
+
+
+def category_target_sums(codes, y_values) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the category codes present in codes, in order of first appearance,
+    and the count, sum and sum of squares of y_values for each of them"""
+    (present, first_seen) = np.unique(codes, return_index=True)
+    present = present[np.argsort(first_seen, kind='stable')]
+    sums = np.column_stack([np.bincount(codes),
+                            np.bincount(codes, weights=y_values),
+                            np.bincount(codes, weights=y_values * y_values)])
+    return present, sums[present]
+
+
+def information_gain_thresholds(counts, parent=None) -> np.ndarray:
+    """Return information gain of splitting rows lower than each value from the rest,
+    given class counts per sorted unique value.
+
+    The right side of every threshold is derived as parent minus left, from
+    the NodeCounts of all rows given as parent or computed from counts.
+    """
+    if parent is None:
+        parent = node_counts(counts.sum(axis=0))
+    left = counts.cumsum(axis=0) - counts
+    right = parent.counts - left
+    n = parent.n
+    m_lt = left.sum(axis=1)
+    tot = (m_lt/n) * np.round(entropy_counts(left), 4)
+    tot += ((n - m_lt)/n) * np.round(entropy_counts(right), 4)
+    return round(parent.impurity, 4) - tot
+
+
+def best_candidate(scores, first_seen, decimals=4) -> int:
+    """Return index of the best of scores, as a scan over the candidates in
+    the order they are first seen that takes every score higher than the
+    best taken so far rounded to decimals.
+
+    This is the rule of the per-value loop information_gain_num had: exact
+    ties go to the value seen first, but a later score that only ties the
+    best once rounded wins when it is higher unrounded. Without decimals,
+    the highest score seen first wins.
+    """
+    order = np.argsort(first_seen, kind='stable')
+    scores = scores[order]
+    if decimals is None:
+        return order[np.argmax(scores)]
+    best_so_far = np.maximum.accumulate(np.r_[-np.inf, np.round(scores[:-1], decimals)])
+    taken = np.flatnonzero(scores > best_so_far)
+    return order[taken[-1]] if taken.shape[0] > 0 else order[0]
+
+
+def largest_split(splits) -> int:
+    """Return index of the split holding the most rows, ties go to the first.
+
+    Missing values default to it at nodes where training saw none.
+    """
+    return int(np.argmax([split['rows'].shape[0] for split in splits]))
+
+
+def information_gain_num(target, attribute, parent=None) -> Tuple[float, Union[int, list]]:
     """Return highest information gain and value among all unique values in attribute"""
 
-    e_target = entropy(target)
-    n = attribute.shape[0]
-    values = attribute.unique()
-    best_ig = 0
-    for val in values:
-        curr_split_ig = information_gain_split(e_target, target, attribute, val, n)
-        if curr_split_ig > best_ig:
-            best_ig = round(curr_split_ig, 4)
-            best_val = val
+    codes, classes = pd.factorize(target)
+    attribute = attribute.loc[target.index].to_numpy()
+    (values, first_seen, counts) = value_class_counts(attribute, codes, classes.shape[0])
+    igs = information_gain_thresholds(counts, parent)
+    best = best_candidate(igs, first_seen)
+    best_ig = round(igs[best], 4)
+    if best_ig <= 0:
+        return 0, None
+
+    return best_ig, values[best]
 
-    return best_ig, best_val
 
+def target_counts(target) -> NodeCounts:
+    """Return NodeCounts of target, with classes in order of first appearance
+    as pd.factorize numbers them"""
+    (y, classes) = pd.factorize(target)
+    return node_counts(np.bincount(y, minlength=classes.shape[0]))
 
-def information_gain(target, attribute) -> Tuple[float, Union[int, list], bool]:
+
+def information_gain(target, attribute, parent=None) -> Tuple[float, Union[int, list], bool]:
     """Return information gain for attribute, best value/values and if attribute is numeric.
 
     If attribute type is numeric then the value giving the best information gain is only used to calculate
-    information gain, for other types all possible values are used to calculate information gain
+    information gain, for other types all possible values are used to calculate information gain.
+    Pass target_counts(target) as parent to share it between the attributes of one node.
     """
     if attribute.dtype == 'O':
-        (ig, val) = information_gain_cat(target, attribute)
+        (ig, val) = information_gain_cat(target, attribute, parent)
         is_numeric = False
     else:
-        (ig, val) = information_gain_num(target, attribute)
+        (ig, val) = information_gain_num(target, attribute, parent)
         is_numeric = True
     return ig, val, is_numeric
+
+
+def n_sampled_columns(max_features, n_columns) -> int:
+    """Return how many of n_columns to consider per split for max_features:
+    a count, a fraction of the columns, 'sqrt' or 'log2'"""
+    if max_features == 'sqrt':
+        k = int(np.sqrt(n_columns))
+    elif max_features == 'log2':
+        k = int(np.log2(n_columns)) if n_columns > 0 else 0
+    elif isinstance(max_features, float):
+        k = int(max_features * n_columns)
+    else:
+        k = max_features
+    return min(max(k, 1), n_columns)
+
+
+def sample_columns(cols, max_features, rng) -> np.ndarray:
+    """Return a sorted random subset of cols of the size given by max_features"""
+    if max_features is None or cols.shape[0] == 0:
+        return cols
+    k = n_sampled_columns(max_features, cols.shape[0])
+    return np.sort(rng.choice(cols, k, replace=False))